@@ -1,10 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import invalidate_user
 from app.core.database import get_db
 from app.core.deps import require_roles
+from app.core.http_client import outbound_http_stats
 from app.models.user import User, UserRole
 from app.services.audit import audit_event
+from app.services.chat_state import chat_state_stats
+from app.services.gazetteer import gazetteer_stats
+from app.services.integration_registry import integration_config_stats
+from app.services.nlp import extraction_cache_stats
+from app.services.outbox import outbox_stats
+from app.services.reports import report_render_stats
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -37,6 +45,34 @@ def disable_user(user_id: int, db: Session = Depends(get_db), current: User = De
     user.is_active = False
     user.session_version += 1
     db.commit()
-    audit_event(db, "admin_user_disable", "admin", user_id=current.id, details=f"target_user_id={user_id}")
+    invalidate_user(user_id)
+    audit_event(db, "admin_user_disable", "admin", user_id=current.id, details=f"target_user_id={user_id}", durable=True)
     return {"status": "disabled"}
 
+
+
+@router.get("/nlp/stats")
+def nlp_stats(_: User = Depends(require_roles(UserRole.admin))):
+    # Per-process counters of the entity extraction lookups.
+    return {
+        "gazetteer": gazetteer_stats(),
+        "extraction_cache": extraction_cache_stats(),
+        "chat_state": chat_state_stats(),
+    }
+
+
+@router.get("/outbound/stats")
+def outbound_stats(db: Session = Depends(get_db), _: User = Depends(require_roles(UserRole.admin))):
+    # Per-process counters of calls to Meta, Google Calendar and CRM webhooks, by integration.
+    return {
+        "http": outbound_http_stats(),
+        "integration_configs": integration_config_stats(),
+        # Queue depth and delivery latency of the message outbox (all relays).
+        "outbox": outbox_stats(db),
+    }
+
+
+@router.get("/reports/stats")
+def reports_stats(_: User = Depends(require_roles(UserRole.admin))):
+    # Per-process analytics PDF cache hits and render times.
+    return report_render_stats()
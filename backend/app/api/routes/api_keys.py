@@ -3,6 +3,7 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import invalidate_api_key
 from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.deps import require_roles
@@ -81,6 +82,7 @@ def revoke_key(
         raise HTTPException(status_code=404, detail="API key not found")
     row.revoked_at = datetime.utcnow()
     db.commit()
-    audit_event(db, "api_key_revoke", "api_key", user_id=current_user.id, details=f"key_id={row.id}")
+    invalidate_api_key(row.key_hash)
+    audit_event(db, "api_key_revoke", "api_key", user_id=current_user.id, details=f"key_id={row.id}", durable=True)
     return {"status": "revoked"}
 
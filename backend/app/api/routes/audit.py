@@ -6,6 +6,7 @@ from app.core.deps import require_roles
 from app.models.audit import AuditLog
 from app.models.user import User, UserRole
 from app.schemas.audit import AuditLogResponse
+from app.services.audit import audit_stats
 
 router = APIRouter(prefix="/audit", tags=["audit"])
 
@@ -18,3 +19,8 @@ def list_audit_logs(
 ):
     return db.query(AuditLog).order_by(AuditLog.created_at.desc()).limit(limit).all()
 
+
+@router.get("/stats")
+def audit_writer_stats(_: User = Depends(require_roles(UserRole.admin))):
+    # Per-process counters of the buffered audit writer.
+    return audit_stats()
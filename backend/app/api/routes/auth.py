@@ -14,6 +14,7 @@ from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import invalidate_user
 from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.deps import get_current_user
@@ -93,21 +94,27 @@ def login(
             user.locked_until = now + timedelta(minutes=settings.LOGIN_LOCK_MINUTES)
             user.failed_login_attempts = 0
         db.commit()
+        if user.locked_until and user.locked_until > now:
+            invalidate_user(user.id)
         audit_event(
             db,
             "login_failed",
             "auth",
             user_id=user.id,
             ip_address=request.client.host if request.client else None,
+            durable=True,
         )
         raise HTTPException(status_code=400, detail="Incorrect email or password")
 
     if not x_device_id or len(x_device_id) < 8:
         raise HTTPException(status_code=400, detail="x-device-id header is required")
 
+    was_locked = user.locked_until is not None
     user.failed_login_attempts = 0
     user.locked_until = None
     db.commit()
+    if was_locked:
+        invalidate_user(user.id)
 
     access = create_access_token(str(user.id), x_device_id, user.session_version)
     refresh = create_refresh_token(str(user.id), x_device_id, user.session_version)
@@ -152,6 +159,7 @@ def revoke_sessions(
 ):
     current_user.session_version += 1
     db.commit()
+    invalidate_user(current_user.id)
     return {"status": "revoked"}
 
 
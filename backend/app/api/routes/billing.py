@@ -2,6 +2,7 @@ import stripe
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import invalidate_user
 from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.deps import get_current_user, require_roles
@@ -80,6 +81,7 @@ def create_checkout_session(
             customer_id = customer["id"]
             current_user.stripe_customer_id = customer_id
             db.commit()
+            invalidate_user(current_user.id)
 
         session = stripe.checkout.Session.create(
             customer=customer_id,
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, Header, Query, Request
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import invalidate_embed_key
 from app.core.config import get_settings
 from app.core.database import get_db
+from app.core.deps import authenticate_embed_key
 from app.core.security import api_key_hash
 from app.models.embed_key import EmbedKey
 from app.models.lead import Lead, LeadChannel
@@ -15,6 +17,8 @@ from app.schemas.embed import EmbedKeyResponse, EmbedLeadCreate
 from app.services.assignment import assign_best_agent
 from app.services.audit import audit_event
 from app.services.crypto import fernet_from_secret
+from app.services.embeddings import embed_lead
+from app.services.lead_stats import record_leads_created
 from app.services.nlp import extract_entities, score_lead
 
 router = APIRouter(prefix="/embed", tags=["embed"])
@@ -69,6 +73,7 @@ def _ensure_primary_key(db: Session, user: User, request: Request) -> tuple[Embe
             if not plain.startswith(settings.EMBED_KEY_PREFIX):
                 row.revoked_at = datetime.now(timezone.utc).replace(tzinfo=None)
                 db.commit()
+                invalidate_embed_key(row.token_hash)
                 row = None
             else:
                 return row, plain
@@ -76,6 +81,7 @@ def _ensure_primary_key(db: Session, user: User, request: Request) -> tuple[Embe
             # If decrypt fails (key rotated), rotate automatically.
             row.revoked_at = datetime.now(timezone.utc).replace(tzinfo=None)
             db.commit()
+            invalidate_embed_key(row.token_hash)
 
     # Create new (opaque, unguessable).
     base = api_key_hash(f"{user.id}:{datetime.utcnow().timestamp()}", settings.SECRET_KEY)[:32]
@@ -130,29 +136,8 @@ def ingest_embed_lead(
     x_embed_key: str | None = Header(default=None, alias="x-embed-key"),
     key: str | None = Query(default=None),
 ):
-    settings = get_settings()
-    token = (x_embed_key or key or "").strip()
-    if not token:
-        raise HTTPException(status_code=401, detail="Missing embed key")
-
-    token_h = api_key_hash(token, settings.SECRET_KEY)
-    row = db.query(EmbedKey).filter(EmbedKey.token_hash == token_h, EmbedKey.revoked_at.is_(None)).first()
-    if not row:
-        raise HTTPException(status_code=401, detail="Invalid embed key")
-
-    # Optional origin allowlist.
-    origin = (request.headers.get("origin") or "").strip()
-    if row.allowed_origins:
-        allowed = [o.strip() for o in row.allowed_origins.split(",") if o.strip()]
-        if origin and origin not in allowed:
-            raise HTTPException(status_code=403, detail="Origin not allowed")
-
-    user = db.query(User).filter(User.id == int(row.user_id)).first()
-    if not user or not user.is_active:
-        raise HTTPException(status_code=401, detail="Invalid embed key")
-
-    row.last_used_at = datetime.now(timezone.utc).replace(tzinfo=None)
-    db.commit()
+    # Cached key lookup + optional origin allowlist.
+    _, user = authenticate_embed_key(db, request, key=key, x_embed_key=x_embed_key)
 
     raw = (payload.message or "").strip()
     if not raw:
@@ -188,9 +173,11 @@ def ingest_embed_lead(
         budget=payload.budget or extraction.budget,
         timeline=payload.timeline or extraction.timeline,
     )
+    embed_lead(lead)
     db.add(lead)
     db.flush()
     lead.assigned_agent_id = assign_best_agent(db, lead)
+    record_leads_created(db, [lead])
     db.commit()
     db.refresh(lead)
 
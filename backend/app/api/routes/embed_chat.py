@@ -1,143 +1,79 @@
-from datetime import datetime, timezone
+from fastapi import APIRouter, BackgroundTasks, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
-from sqlalchemy.orm import Session
-
-from app.core.config import get_settings
-from app.core.database import get_db
+from app.core.database import SessionLocal
 from app.core.rate_limit import limiter
-from app.core.security import api_key_hash
-from app.models.embed_chat import EmbedConversation, EmbedMessage, EmbedMessageRole
-from app.models.embed_key import EmbedKey
-from app.models.lead import Lead, LeadChannel
-from app.models.user import User
 from app.schemas.embed_chat import EmbedChatMessageRequest, EmbedChatMessageResponse, EmbedPropertySuggestion
-from app.services.agentic.team import agent_team_reply, meta_json
-from app.services.assignment import assign_best_agent
-from app.services.audit import audit_event
+from app.services.agentic.team import find_recommendations, qualify_message
+from app.services.embed_chat import open_chat_turn, persist_chat_turn, run_chat_turn, sse_event, write_transcript
 
 router = APIRouter(prefix="/embed/chat", tags=["embed-chat"])
 
 
-def _auth_embed_key(db: Session, request: Request, key: str | None, x_embed_key: str | None) -> tuple[EmbedKey, User]:
-    settings = get_settings()
-    token = (x_embed_key or key or "").strip()
-    if not token:
-        raise HTTPException(status_code=401, detail="Missing embed key")
-
-    token_h = api_key_hash(token, settings.SECRET_KEY)
-    row = db.query(EmbedKey).filter(EmbedKey.token_hash == token_h, EmbedKey.revoked_at.is_(None)).first()
-    if not row:
-        raise HTTPException(status_code=401, detail="Invalid embed key")
-
-    origin = (request.headers.get("origin") or "").strip()
-    if row.allowed_origins:
-        allowed = [o.strip() for o in row.allowed_origins.split(",") if o.strip()]
-        if origin and origin not in allowed:
-            raise HTTPException(status_code=403, detail="Origin not allowed")
-
-    user = db.query(User).filter(User.id == int(row.user_id)).first()
-    if not user or not user.is_active:
-        raise HTTPException(status_code=401, detail="Invalid embed key")
-
-    row.last_used_at = datetime.now(timezone.utc).replace(tzinfo=None)
-    db.commit()
-    return row, user
-
-
-def _get_or_create_conversation(db: Session, user: User, embed_key: EmbedKey, conversation_id: int | None) -> EmbedConversation:
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
-    if conversation_id:
-        conv = db.query(EmbedConversation).filter(EmbedConversation.id == conversation_id, EmbedConversation.user_id == user.id).first()
-        if conv:
-            conv.last_seen_at = now
-            db.commit()
-            return conv
-
-    conv = EmbedConversation(user_id=user.id, embed_key_id=embed_key.id, last_seen_at=now)
-    db.add(conv)
-    db.commit()
-    db.refresh(conv)
-    return conv
-
-
 @router.post("/message", response_model=EmbedChatMessageResponse)
 @limiter.limit("60/minute")
-def chat_message(
+async def chat_message(
     request: Request,
     payload: EmbedChatMessageRequest,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
     key: str | None = Query(default=None),
     x_embed_key: str | None = Header(default=None, alias="x-embed-key"),
 ):
-    embed_key, user = _auth_embed_key(db, request, key=key, x_embed_key=x_embed_key)
-    conv = _get_or_create_conversation(db, user, embed_key, payload.conversation_id)
-
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
-    db.add(
-        EmbedMessage(
-            conversation_id=conv.id,
-            role=EmbedMessageRole.user,
-            content=payload.message,
-            meta_json=meta_json(page_url=payload.page_url, referrer=payload.referrer),
-            created_at=now,
-        )
+    # The whole turn (auth, reply, one commit) runs in a single worker-thread hop; the event
+    # loop only parses the request and serializes the response.
+    turn = await run_in_threadpool(run_chat_turn, request, payload, key, x_embed_key)
+    if turn.deferred_transcript:
+        background_tasks.add_task(write_transcript, turn.deferred_transcript)
+
+    recs = [EmbedPropertySuggestion(**r) for r in turn.result.recommendations]
+    return EmbedChatMessageResponse(
+        conversation_id=turn.conversation_id, reply=turn.result.reply, lead_id=turn.lead_id, recommendations=recs
     )
-    db.commit()
 
-    result = agent_team_reply(db, payload.message)
-    db.add(
-        EmbedMessage(
-            conversation_id=conv.id,
-            role=EmbedMessageRole.assistant,
-            content=result.reply,
-            meta_json=meta_json(extracted=result.extracted),
-            created_at=now,
-        )
-    )
-    db.commit()
 
-    # Create/append to a Lead record (best-effort).
-    lead_id = None
+@router.post("/stream")
+@limiter.limit("60/minute")
+async def chat_stream(
+    request: Request,
+    payload: EmbedChatMessageRequest,
+    key: str | None = Query(default=None),
+    x_embed_key: str | None = Header(default=None, alias="x-embed-key"),
+):
+    """
+    Same turn as /message as Server-Sent Events, in the order the parts become available:
+    `delta` (reply text; one event today, token chunks once the reply is model-generated),
+    `recommendations`, then `done` with the conversation and lead ids, or `error`.
+    """
+    db = SessionLocal()
     try:
-        email = result.extracted.get("email")
-        phone = result.extracted.get("phone")
-        lead = None
-        if email or phone:
-            q = db.query(Lead)
-            if email:
-                q = q.filter(Lead.email == email)
-            if phone:
-                q = q.filter(Lead.phone == phone)
-            lead = q.order_by(Lead.created_at.desc()).first()
-
-        if not lead:
-            lead = Lead(
-                full_name="Website Visitor",
-                email=result.extracted.get("email"),
-                phone=result.extracted.get("phone"),
-                channel=LeadChannel.website_chat,
-                raw_message=f"[Chat] {payload.message}",
-                property_type=result.extracted.get("property_type"),
-                location=result.extracted.get("location"),
-                budget=result.extracted.get("budget"),
-                timeline=result.extracted.get("timeline"),
-                score=0.0,
-            )
-            db.add(lead)
-            db.flush()
-            lead.assigned_agent_id = assign_best_agent(db, lead)
-            db.commit()
-            db.refresh(lead)
-            audit_event(db, "embed_chat_lead_create", "lead", user_id=user.id, details=f"lead_id={lead.id}")
-        else:
-            lead.raw_message = (lead.raw_message + "\n---\n" + f"[Chat] {payload.message}").strip()
-            db.commit()
-        lead_id = lead.id
+        # Auth failures must still be plain 401/403 responses, so resolve before streaming.
+        ctx = await run_in_threadpool(open_chat_turn, db, request, payload, key, x_embed_key)
     except Exception:
-        # Don't break chat if lead creation fails.
-        pass
-
-    recs = [EmbedPropertySuggestion(**r) for r in result.recommendations]
-    return EmbedChatMessageResponse(conversation_id=conv.id, reply=result.reply, lead_id=lead_id, recommendations=recs)
-
+        db.close()
+        raise
+
+    async def events():
+        try:
+            result = qualify_message(payload.message, ctx.state)
+            yield sse_event("delta", {"text": result.reply})
+            result.recommendations = await run_in_threadpool(find_recommendations, db, result.profile)
+            ctx.state.recommendations = [r["id"] for r in result.recommendations]
+            recs = [EmbedPropertySuggestion(**r).model_dump() for r in result.recommendations]
+            yield sse_event("recommendations", {"items": recs})
+            turn = await run_in_threadpool(persist_chat_turn, db, ctx, payload, result)
+            yield sse_event("done", {"conversation_id": turn.conversation_id, "lead_id": turn.lead_id})
+            if turn.deferred_transcript:
+                await run_in_threadpool(write_transcript, turn.deferred_transcript)
+        except Exception:
+            db.rollback()
+            yield sse_event("error", {"detail": "Request failed"})
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies (nginx) must not buffer the stream or the first event arrives with the last.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -17,8 +17,12 @@ from app.schemas.integration import (
 )
 from app.services.assignment import assign_best_agent
 from app.services.audit import audit_event
+from app.services.embeddings import embed_lead
+from app.services.ingest import bulk_create_leads, lead_rows_from_messages
+from app.services.integration_registry import get_channel_config, invalidate_integration_configs
+from app.services.lead_stats import record_leads_created
 from app.services.messaging import dispatch_message
-from app.services.meta import parse_integration_metadata, parse_meta_messages, verify_meta_signature
+from app.services.meta import parse_meta_messages, verify_meta_signature
 from app.services.nlp import extract_entities, score_lead
 
 router = APIRouter(prefix="/integrations", tags=["integrations"])
@@ -40,6 +44,7 @@ def create_or_update_channel_integration(
 
     db.commit()
     db.refresh(item)
+    invalidate_integration_configs()
     audit_event(db, "integration_upsert", "channel_integration", user_id=current_user.id)
     return item
 
@@ -83,10 +88,9 @@ def verify_meta_webhook(
     hub_mode: str = Query(alias="hub.mode"),
     hub_verify_token: str = Query(alias="hub.verify_token"),
     hub_challenge: str = Query(alias="hub.challenge"),
-    db: Session = Depends(get_db),
 ):
-    integration = db.query(ChannelIntegration).filter(ChannelIntegration.channel == channel).first()
-    metadata = parse_integration_metadata(integration.metadata_json if integration else None)
+    integration = get_channel_config(channel)
+    metadata = integration.metadata if integration else {}
     settings = get_settings()
 
     verify_token = metadata.get("meta_verify_token") or settings.META_VERIFY_TOKEN
@@ -102,7 +106,7 @@ async def ingest_meta_webhook(
     x_hub_signature_256: str | None = Header(default=None, alias="x-hub-signature-256"),
     db: Session = Depends(get_db),
 ):
-    integration = db.query(ChannelIntegration).filter(ChannelIntegration.channel == channel).first()
+    integration = get_channel_config(channel)
     if not integration:
         raise HTTPException(status_code=404, detail="Channel integration not configured")
 
@@ -112,32 +116,15 @@ async def ingest_meta_webhook(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    metadata = parse_integration_metadata(integration.metadata_json)
     settings = get_settings()
-    app_secret = metadata.get("meta_app_secret") or settings.META_APP_SECRET
+    app_secret = integration.metadata.get("meta_app_secret") or settings.META_APP_SECRET
     if app_secret and not verify_meta_signature(app_secret, raw_body, x_hub_signature_256):
         raise HTTPException(status_code=401, detail="Invalid Meta signature")
 
     parsed_messages = parse_meta_messages(channel.value, payload)
-    created_ids: list[int] = []
-    for msg in parsed_messages:
-        extraction = extract_entities((msg.get("message") or "").strip())
-        lead = Lead(
-            full_name=(msg.get("full_name") or "Meta Lead")[:120],
-            email=None,
-            phone=msg.get("phone"),
-            channel=channel,
-            raw_message=(msg.get("message") or "")[:4000],
-            score=score_lead(extraction.intent, extraction.budget, extraction.timeline),
-            property_type=extraction.property_type,
-            location=extraction.location,
-            budget=extraction.budget,
-            timeline=extraction.timeline,
-        )
-        db.add(lead)
-        db.flush()
-        lead.assigned_agent_id = assign_best_agent(db, lead)
-        created_ids.append(lead.id)
+    # One webhook can carry dozens of messages: extract, assign and insert as a batch.
+    rows = lead_rows_from_messages(channel, parsed_messages, default_name="Meta Lead")
+    created_ids = bulk_create_leads(db, rows)
 
     db.commit()
     audit_event(db, "meta_webhook_ingest", "lead", details=f"channel={channel.value};count={len(created_ids)}")
@@ -151,7 +138,6 @@ def send_meta_test_message(
     current_user: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
 ):
     result = dispatch_message(
-        db,
         payload.channel,
         {
             "to": payload.recipient_id,
@@ -204,9 +190,11 @@ async def ingest_webhook_lead(
         budget=extraction.budget,
         timeline=extraction.timeline,
     )
+    embed_lead(lead)
     db.add(lead)
     db.flush()
     lead.assigned_agent_id = assign_best_agent(db, lead)
+    record_leads_created(db, [lead])
     db.commit()
 
     audit_event(db, "webhook_ingest", "lead", details=f"channel={channel.value};lead_id={lead.id}")
@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+import secrets
+import shutil
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.deps import get_current_user, require_roles
-from app.models.lead import Lead, LeadStatus
-from app.models.property import Property
+from app.models.lead import Lead, LeadChannel, LeadStatus
+from app.models.lead_import import LeadImportJob, LeadImportStatus
 from app.models.user import User, UserRole
-from app.schemas.lead import LeadCreate, LeadResponse, LeadUpdate
-from app.services.assignment import assign_best_agent
+from app.schemas.lead import LeadCreate, LeadImportJobResponse, LeadResponse, LeadUpdate
+from app.services.ann_index import similar_properties_for_lead
+from app.services.assignment import assign_best_agent, track_lead_transition
 from app.services.audit import audit_event
+from app.services.embeddings import embed_lead
+from app.services.lead_import import detect_format, discard_upload, run_lead_import
+from app.services.lead_query import LeadFilters, count_leads, lead_filters, lead_page, scoped_filters
+from app.services.lead_stats import record_leads_created, track_lead_stats_change
 from app.services.nlp import extract_entities, score_lead
-from app.workers.tasks import send_followup_message
+from app.services.outbox import enqueue_lead_followup, kick_outbox_relay
+from app.services.property_match import recommend_properties
+from app.workers.tasks import import_leads_file
 
 router = APIRouter(prefix="/leads", tags=["leads"])
 
@@ -48,12 +60,15 @@ def create_lead(payload: LeadCreate, db: Session = Depends(get_db), current_user
         existing = db.query(Lead).filter(or_(*conditions)).order_by(Lead.created_at.desc()).first()
 
     if existing:
+        old_score = existing.score
         existing.raw_message = f"{existing.raw_message}\n---\n{raw}".strip()
+        embed_lead(existing)
         existing.score = max(existing.score, score)
         existing.property_type = payload.property_type or extraction.property_type or existing.property_type
         existing.location = payload.location or extraction.location or existing.location
         existing.budget = payload.budget or extraction.budget or existing.budget
         existing.timeline = payload.timeline or extraction.timeline or existing.timeline
+        track_lead_stats_change(db, existing, existing.assigned_agent_id, existing.status, old_score)
         db.commit()
         db.refresh(existing)
         audit_event(db, "lead_merge", "lead", user_id=current_user.id, details=f"lead_id={existing.id}")
@@ -71,41 +86,119 @@ def create_lead(payload: LeadCreate, db: Session = Depends(get_db), current_user
         budget=payload.budget or extraction.budget,
         timeline=payload.timeline or extraction.timeline,
     )
+    embed_lead(lead)
     db.add(lead)
     db.flush()
 
     lead.assigned_agent_id = assign_best_agent(db, lead)
+    record_leads_created(db, [lead])
+    # The follow-up commits with the lead, so a broker outage can delay it but never lose it.
+    followup_queued = lead.status == LeadStatus.new and enqueue_lead_followup(
+        db, lead, "Thanks for reaching out. We will contact you shortly."
+    )
 
     db.commit()
     db.refresh(lead)
 
-    if lead.status == LeadStatus.new:
-        # Don't fail lead creation if the async worker/broker isn't running in local dev.
-        try:
-            send_followup_message.delay(
-                lead.id,
-                lead.channel.value,
-                "Thanks for reaching out. We will contact you shortly.",
-            )
-        except Exception:
-            audit_event(
-                db,
-                "followup_enqueue_failed",
-                "lead",
-                user_id=current_user.id,
-                details=f"lead_id={lead.id}",
-            )
+    if followup_queued:
+        kick_outbox_relay()
 
     audit_event(db, "lead_create", "lead", user_id=current_user.id, details=f"lead_id={lead.id}")
     return lead
 
 
 @router.get("", response_model=list[LeadResponse])
-def list_leads(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    query = db.query(Lead)
-    if current_user.role == UserRole.agent:
-        query = query.filter(Lead.assigned_agent_id == current_user.id)
-    return query.order_by(Lead.created_at.desc()).all()
+def list_leads(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = None,
+    filters: LeadFilters = Depends(lead_filters),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Without limit or cursor the whole list is returned, as before paging existed; paging
+    # clients pass a limit and follow X-Next-Cursor.
+    if limit is None and cursor:
+        limit = 100
+    try:
+        rows, next_cursor = lead_page(db, scoped_filters(filters, current_user), limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.get("/count")
+def count_lead_rows(
+    filters: LeadFilters = Depends(lead_filters),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return {"count": count_leads(db, scoped_filters(filters, current_user))}
+
+
+@router.post("/import", response_model=LeadImportJobResponse)
+def import_leads(
+    file: UploadFile = File(...),
+    file_format: str | None = Query(default=None, alias="format", pattern="^(csv|ndjson)$"),
+    channel: LeadChannel = Query(default=LeadChannel.email),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
+):
+    file_format = file_format or detect_format(file.filename, file.content_type)
+    if not file_format:
+        raise HTTPException(status_code=400, detail="Unsupported file type (use .csv or .ndjson, or pass ?format=)")
+
+    # Spool the upload to disk in fixed-size blocks; rows are parsed from there chunk by chunk.
+    settings = get_settings()
+    os.makedirs(settings.LEAD_IMPORT_DIR, exist_ok=True)
+    path = os.path.join(settings.LEAD_IMPORT_DIR, f"{secrets.token_hex(16)}.{file_format}")
+    try:
+        with open(path, "wb") as out:
+            shutil.copyfileobj(file.file, out, 1024 * 1024)
+        size = os.path.getsize(path)
+
+        job = LeadImportJob(
+            user_id=current_user.id,
+            status=LeadImportStatus.queued,
+            file_format=file_format,
+            filename=(file.filename or None),
+            file_path=path,
+            default_channel=channel,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+    except Exception:
+        # No job will ever read a partial spool or one whose job row was not saved.
+        discard_upload(path)
+        raise
+    audit_event(db, "lead_import_start", "lead", user_id=current_user.id, details=f"job_id={job.id};bytes={size}")
+
+    if size >= settings.LEAD_IMPORT_ASYNC_MIN_BYTES:
+        try:
+            import_leads_file.delay(job.id)
+            return job
+        except Exception:
+            # Broker unavailable (e.g. local dev without a worker): import in-request instead.
+            pass
+
+    run_lead_import(db, job.id)
+    db.refresh(job)
+    return job
+
+
+@router.get("/import/{job_id}", response_model=LeadImportJobResponse)
+def lead_import_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
+):
+    job = db.query(LeadImportJob).filter(LeadImportJob.id == job_id).first()
+    if not job or (current_user.role != UserRole.admin and job.user_id != current_user.id):
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
 
 
 @router.patch("/{lead_id}", response_model=LeadResponse)
@@ -119,10 +212,13 @@ def update_lead(
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
 
+    old_agent_id, old_status, old_score = lead.assigned_agent_id, lead.status, lead.score
     if payload.status is not None:
         lead.status = payload.status
     if payload.assigned_agent_id is not None:
         lead.assigned_agent_id = payload.assigned_agent_id
+    track_lead_transition(db, old_agent_id, old_status, lead.assigned_agent_id, lead.status)
+    track_lead_stats_change(db, lead, old_agent_id, old_status, old_score)
 
     db.commit()
     db.refresh(lead)
@@ -143,34 +239,40 @@ def property_recommendations(
     if current_user.role == UserRole.agent and lead.assigned_agent_id != current_user.id:
         raise HTTPException(status_code=403, detail="Agents can view recommendations only for assigned leads")
 
-    properties = db.query(Property).filter(Property.is_available == True).all()
-    ranked = []
-    for prop in properties:
-        score = 0.0
-        if lead.property_type and prop.property_type.lower() == lead.property_type.lower():
-            score += 45
-        if lead.location and lead.location.lower() in prop.location.lower():
-            score += 30
-        if lead.budget and prop.price <= lead.budget:
-            score += 25
-        elif lead.budget:
-            over_ratio = (prop.price - lead.budget) / lead.budget if lead.budget else 1.0
-            score += max(0.0, 20 - over_ratio * 20)
-        else:
-            score += 10
-
-        ranked.append(
-            {
-                "id": prop.id,
-                "title": prop.title,
-                "description": prop.description,
-                "property_type": prop.property_type,
-                "location": prop.location,
-                "price": prop.price,
-                "image_url": prop.image_url,
-                "match_score": round(min(score, 100.0), 2),
-            }
-        )
+    if not (lead.property_type or lead.location or lead.budget):
+        # Nothing structured to match on: fall back to text similarity with listing descriptions.
+        return _similar_property_payload(similar_properties_for_lead(db, lead, limit=10))
+    return recommend_properties(db, lead.property_type, lead.location, lead.budget, limit=10)
+
+
+@router.get("/{lead_id}/similar-properties")
+def similar_properties(
+    lead_id: int,
+    limit: int = Query(default=10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+
+    if current_user.role == UserRole.agent and lead.assigned_agent_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Agents can view recommendations only for assigned leads")
+
+    return _similar_property_payload(similar_properties_for_lead(db, lead, limit=limit))
+
 
-    ranked.sort(key=lambda x: x["match_score"], reverse=True)
-    return ranked[:10]
+def _similar_property_payload(ranked: list) -> list[dict]:
+    return [
+        {
+            "id": prop.id,
+            "title": prop.title,
+            "description": prop.description,
+            "property_type": prop.property_type,
+            "location": prop.location,
+            "price": prop.price,
+            "image_url": prop.image_url,
+            "match_score": round(max(0.0, similarity) * 100.0, 2),
+        }
+        for similarity, prop in ranked
+    ]
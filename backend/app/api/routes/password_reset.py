@@ -4,6 +4,7 @@ from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import invalidate_user
 from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.security import api_key_hash, get_password_hash, validate_password_strength
@@ -55,13 +56,20 @@ def forgot_password(payload: ForgotPasswordRequest, request: Request, db: Sessio
         send_email(user.email, subject, body)
     except Exception:
         # Do not leak SMTP details to client.
-        audit_event(db, "password_reset_email_failed", "auth", user_id=user.id, details="smtp_error")
+        audit_event(db, "password_reset_email_failed", "auth", user_id=user.id, details="smtp_error", durable=True)
         if settings.ENVIRONMENT.lower() != "production":
             # Dev-only: allow testing without SMTP by returning the reset URL.
             return {"status": "ok", "debug_reset_url": reset_url}
         return {"status": "ok"}
 
-    audit_event(db, "password_reset_requested", "auth", user_id=user.id, ip_address=request.client.host if request.client else None)
+    audit_event(
+        db,
+        "password_reset_requested",
+        "auth",
+        user_id=user.id,
+        ip_address=request.client.host if request.client else None,
+        durable=True,
+    )
     if settings.ENVIRONMENT.lower() != "production":
         return {"status": "ok", "debug_reset_url": reset_url}
     return {"status": "ok"}
@@ -90,6 +98,14 @@ def reset_password(payload: ResetPasswordRequest, request: Request, db: Session
     user.session_version += 1  # revoke existing sessions
     row.used_at = now
     db.commit()
+    invalidate_user(user.id)
 
-    audit_event(db, "password_reset_completed", "auth", user_id=user.id, ip_address=request.client.host if request.client else None)
+    audit_event(
+        db,
+        "password_reset_completed",
+        "auth",
+        user_id=user.id,
+        ip_address=request.client.host if request.client else None,
+        durable=True,
+    )
     return {"status": "ok"}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
@@ -6,6 +6,10 @@ from app.core.deps import require_roles
 from app.models.property import Property
 from app.models.user import User, UserRole
 from app.schemas.property import PropertyCreate, PropertyResponse
+from app.services.ann_index import similar_leads_for_property
+from app.services.embeddings import embed_property
+from app.services.gazetteer import refresh_gazetteer
+from app.services.property_match import invalidate_property_index
 
 router = APIRouter(prefix="/properties", tags=["properties"])
 
@@ -18,11 +22,39 @@ def create_property(
 ):
     prop = Property(**payload.model_dump())
     db.add(prop)
+    db.flush()
+    embed_property(db, prop)
     db.commit()
     db.refresh(prop)
+    invalidate_property_index()
+    refresh_gazetteer(db)
     return prop
 
 
 @router.get("", response_model=list[PropertyResponse])
 def list_properties(db: Session = Depends(get_db)):
     return db.query(Property).filter(Property.is_available == True).order_by(Property.created_at.desc()).all()
+
+
+@router.get("/{property_id}/similar-leads")
+def similar_leads(
+    property_id: int,
+    limit: int = Query(default=10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    _: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
+):
+    prop = db.query(Property).filter(Property.id == property_id).first()
+    if not prop:
+        raise HTTPException(status_code=404, detail="Property not found")
+
+    return [
+        {
+            "lead_id": lead.id,
+            "full_name": lead.full_name,
+            "channel": lead.channel,
+            "status": lead.status,
+            "score": lead.score,
+            "similarity": round(similarity, 4),
+        }
+        for similarity, lead in similar_leads_for_property(db, prop, limit=limit)
+    ]
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
@@ -7,7 +7,16 @@ from app.core.deps import require_roles
 from app.models.report import ScheduledReport
 from app.models.user import User, UserRole
 from app.schemas.report import ScheduledReportCreate, ScheduledReportResponse
-from app.services.reports import analytics_pdf, leads_csv
+from app.services.columnar_export import (
+    EXPORT_FORMATS,
+    EXPORT_TABLES,
+    ColumnarExportUnavailable,
+    export_watermark,
+    iter_columnar_export,
+)
+from app.services.lead_query import LeadFilters, lead_filters
+from app.services.reports import analytics_report, analytics_snapshot, gzip_stream, iter_leads_csv
+from app.web.embed_bundle import etag_matches
 from app.workers.tasks import send_scheduled_report
 
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -15,27 +24,80 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 
 @router.get("/leads.csv")
 def export_leads_csv(
-    db: Session = Depends(get_db),
+    filters: LeadFilters = Depends(lead_filters),
+    accept_encoding: str | None = Header(default=None),
     _: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
 ):
-    csv_data = leads_csv(db)
-    return Response(
-        content=csv_data,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=leads.csv"},
+    body = iter_leads_csv(filters)
+    headers = {"Content-Disposition": "attachment; filename=leads.csv"}
+    if "gzip" in (accept_encoding or "").lower():
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type="text/csv", headers=headers)
+
+
+@router.get("/export/{table}")
+def export_table(
+    table: str,
+    format: str = Query(default="parquet"),
+    since: int = Query(default=0, ge=0),
+    _: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
+):
+    """
+    Typed Parquet / Arrow IPC export of rows with id > `since`.
+
+    The X-Export-Watermark response header is the highest id included; pass it back as
+    `since` on the next run to fetch only new rows.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown export table")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be parquet or arrow")
+
+    watermark = max(since, export_watermark(table))
+    try:
+        body = iter_columnar_export(table, format, since, watermark)
+        first = next(body)
+    except ColumnarExportUnavailable:
+        raise HTTPException(status_code=503, detail="Columnar export unavailable: pyarrow is not installed")
+
+    def stream():
+        yield first
+        yield from body
+
+    ext = "parquet" if format == "parquet" else "arrows"
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "Content-Disposition": f"attachment; filename={table}-{since}-{watermark}.{ext}",
+            "X-Export-Watermark": str(watermark),
+        },
     )
 
 
 @router.get("/analytics.pdf")
 def export_analytics_pdf(
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db),
     _: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
 ):
-    pdf = analytics_pdf(db)
+    # The ETag is the metrics digest: a client holding the current PDF gets a 304 before
+    # the cache file is even read.
+    snapshot = analytics_snapshot(db)
+    etag = f'"{snapshot.digest()[:32]}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    report = analytics_report(db, snapshot)
     return Response(
-        content=pdf,
+        content=report.pdf,
         media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=analytics.pdf"},
+        headers={
+            "Content-Disposition": "attachment; filename=analytics.pdf",
+            "ETag": etag,
+            "X-Report-Cache": "hit" if report.cached else "miss",
+        },
     )
 
 
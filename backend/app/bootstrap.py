@@ -2,6 +2,7 @@ import os
 
 from app.core.database import SessionLocal
 from app.core.security import get_password_hash
+from app.models.agent_workload import AgentWorkload
 from app.models.user import User, UserRole
 
 
@@ -21,6 +22,10 @@ def create_user(email: str, full_name: str, password: str, role: UserRole) -> No
             is_active=True,
         )
         db.add(user)
+        db.flush()
+        if role == UserRole.agent:
+            # Make the new agent immediately eligible for lead assignment.
+            db.add(AgentWorkload(agent_id=user.id, open_leads=0))
         db.commit()
         print(f"Created {role.value}: {email}")
     finally:
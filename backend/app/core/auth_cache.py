@@ -0,0 +1,170 @@
+import atexit
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, detached_copy
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.api_key import ApiKey
+from app.models.embed_key import EmbedKey
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedKey:
+    """Resolved API/embed key: the key row and its owner, as detached column snapshots."""
+
+    key: Any
+    user: User
+
+    @property
+    def user_id(self) -> int:
+        return int(self.user.id)
+
+
+_settings = get_settings()
+# Keyed by the HMAC of the presented key, never by the key itself.
+api_key_cache = TTLCache(_settings.AUTH_CACHE_TTL_SECONDS, _settings.AUTH_CACHE_MAX_ENTRIES)
+embed_key_cache = TTLCache(_settings.AUTH_CACHE_TTL_SECONDS, _settings.AUTH_CACHE_MAX_ENTRIES)
+# JWT principals keyed by (user_id, session_version): a session bump changes the key.
+principal_cache = TTLCache(_settings.PRINCIPAL_CACHE_TTL_SECONDS, _settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def resolve_api_key(db: Session, key_hash: str) -> CachedKey | None:
+    cached = api_key_cache.get(key_hash)
+    if cached is not None:
+        return cached
+    row = db.query(ApiKey).filter(ApiKey.key_hash == key_hash, ApiKey.revoked_at.is_(None)).first()
+    if not row:
+        return None
+    user = db.query(User).filter(User.id == int(row.user_id)).first()
+    if not user:
+        return None
+    cached = CachedKey(key=detached_copy(row), user=detached_copy(user))
+    api_key_cache.set(key_hash, cached)
+    return cached
+
+
+def resolve_embed_key(db: Session, token_hash: str) -> CachedKey | None:
+    cached = embed_key_cache.get(token_hash)
+    if cached is not None:
+        return cached
+    row = db.query(EmbedKey).filter(EmbedKey.token_hash == token_hash, EmbedKey.revoked_at.is_(None)).first()
+    if not row:
+        return None
+    user = db.query(User).filter(User.id == int(row.user_id)).first()
+    if not user:
+        return None
+    cached = CachedKey(key=detached_copy(row), user=detached_copy(user))
+    embed_key_cache.set(token_hash, cached)
+    return cached
+
+
+def invalidate_api_key(key_hash: str) -> None:
+    api_key_cache.pop(key_hash)
+
+
+def invalidate_embed_key(token_hash: str) -> None:
+    embed_key_cache.pop(token_hash)
+
+
+def get_cached_principal(user_id: int, session_version: int) -> User | None:
+    return principal_cache.get((int(user_id), int(session_version)))
+
+
+def cache_principal(user: User) -> None:
+    principal_cache.set((int(user.id), int(user.session_version)), detached_copy(user))
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Drop every cached principal and key owned by `user_id`.
+
+    Call after committing anything that changes is_active, session_version or lockout state.
+    """
+    user_id = int(user_id)
+    principal_cache.invalidate_where(lambda k, _v: k[0] == user_id)
+    for cache in (api_key_cache, embed_key_cache):
+        cache.invalidate_where(lambda _k, v: v.user_id == user_id)
+
+
+class KeyUsageRecorder:
+    """
+    Coalesces `last_used_at` writes for API and embed keys.
+
+    Each request only records (key id -> timestamp) in memory; a daemon thread writes the
+    latest timestamp per key every KEY_USAGE_FLUSH_SECONDS with one bulk UPDATE per table.
+    """
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pending: dict[type, dict[int, datetime]] = {ApiKey: {}, EmbedKey: {}}
+        self._thread: threading.Thread | None = None
+
+    def record(self, model: type, key_id: int) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            self._pending[model][int(key_id)] = datetime.utcnow()
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="key-usage-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        interval = max(1.0, float(get_settings().KEY_USAGE_FLUSH_SECONDS))
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {ApiKey: {}, EmbedKey: {}}
+        if not any(pending.values()):
+            return 0
+
+        db = SessionLocal()
+        written = 0
+        try:
+            for model, stamps in pending.items():
+                if stamps:
+                    db.execute(update(model), [{"id": k, "last_used_at": ts} for k, ts in stamps.items()])
+                    written += len(stamps)
+            db.commit()
+        except Exception:
+            # last_used_at is informational; a lost batch is refreshed by the next use.
+            logger.exception("key usage flush failed")
+            db.rollback()
+            written = 0
+        finally:
+            db.close()
+        return written
+
+    def close(self) -> int:
+        self._stop.set()
+        return self.flush()
+
+
+key_usage = KeyUsageRecorder()
+atexit.register(key_usage.close)
+
+
+def auth_cache_stats() -> dict[str, dict[str, int]]:
+    return {
+        "api_keys": api_key_cache.stats(),
+        "embed_keys": embed_key_cache.stats(),
+        "principals": principal_cache.stats(),
+    }
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from pathlib import Path
 
 from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -71,6 +72,107 @@ class Settings(BaseSettings):
     # Public key used for website embed. This is safe to place in a script URL.
     EMBED_KEY_PREFIX: str = "rea_pub_"
 
+    # Bulk lead import. Uploads are spooled to LEAD_IMPORT_DIR; in multi-container setups this
+    # must be a volume shared by the API and the Celery worker (see docker-compose.yml).
+    LEAD_IMPORT_DIR: str = "/tmp/realestate-ai-imports"
+    LEAD_IMPORT_CHUNK_SIZE: int = 1000
+    # Uploads at least this large are processed by the worker instead of inside the request.
+    LEAD_IMPORT_ASYNC_MIN_BYTES: int = 2_000_000
+
+    # Audit log writer: "buffered" (bulk insert off the request path), "celery" (hand
+    # batches to the worker) or "sync" (commit every event, legacy behaviour).
+    AUDIT_WRITE_MODE: str = "buffered"
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 2.0
+    AUDIT_BUFFER_MAX: int = 10000
+
+    # API/embed key auth cache. Revocation and user disable invalidate explicitly; the TTL
+    # bounds staleness across processes.
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    # JWT principal cache; steady-state authenticated requests skip the users lookup.
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 15
+    # Property recommendation index is rebuilt at least this often (and on local changes).
+    PROPERTY_INDEX_TTL_SECONDS: int = 300
+    # Text embeddings + IVF similarity indexes (memory-mapped .npy files under this directory).
+    # Only the Celery worker builds them, so in multi-container setups this must be a volume
+    # shared by the API, the worker and beat (see docker-compose.yml).
+    EMBEDDING_INDEX_DIR: str = "/tmp/realestate-ai-ann"
+    # Celery beat rebuilds the indexes this often (sooner once the unindexed tail outgrows the
+    # index); requests only ever read the last build.
+    EMBEDDING_INDEX_MAX_AGE_SECONDS: int = 86400
+    # Number of IVF lists scanned per query (recall vs latency).
+    EMBEDDING_INDEX_NPROBE: int = 16
+    # Optional JSON file extending the extraction vocabulary: {slot: {canonical: [synonym, ...]}}
+    # for slots property_type, location, timeline and intent ("serious" / "inquiring").
+    NLP_VOCABULARY_FILE: str = ""
+    # Location gazetteer: Property.location values plus this place list (one per line). The
+    # bundled default lets a fresh install extract locations before any property exists; set
+    # it empty to use property locations only.
+    LOCATION_PLACES_FILE: str = str(Path(__file__).resolve().parents[1] / "data" / "places.txt")
+    # A background thread per process picks up properties created elsewhere this often.
+    LOCATION_GAZETTEER_REFRESH_SECONDS: int = 300
+    # Extraction results for repeated short messages ("price?", "hi"), per process.
+    EXTRACTION_CACHE_TTL_SECONDS: int = 3600
+    EXTRACTION_CACHE_MAX_ENTRIES: int = 20000
+    # Write website chat transcripts after the response is sent instead of in the turn's
+    # transaction. Faster turns; a crash between the two can lose that turn's transcript.
+    EMBED_CHAT_DEFER_TRANSCRIPT: bool = False
+    # Per-conversation chat state (accumulated fields, last recommendations, turn count):
+    # "memory" (per-process LRU) or "redis" (REDIS_URL, shared by all API processes).
+    CHAT_STATE_STORE: str = "memory"
+    CHAT_STATE_TTL_SECONDS: int = 86400
+    CHAT_STATE_MAX_ENTRIES: int = 50000
+    # On a state miss, replay the extracted fields of at most this many assistant messages.
+    CHAT_STATE_REBUILD_MESSAGES: int = 50
+    # Channel integration configs are cached in memory; edits invalidate the local process
+    # and other processes (workers, other API replicas) pick them up within this TTL.
+    INTEGRATION_CONFIG_TTL_SECONDS: int = 60
+    # Outbound calls to Meta, Google Calendar and CRM webhooks share one pooled keep-alive
+    # client. Read timeout per attempt (callers may pass their own) and connect timeout:
+    OUTBOUND_HTTP_TIMEOUT_SECONDS: float = 15.0
+    OUTBOUND_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    # 429/5xx and failed connects are retried with jittered exponential backoff.
+    OUTBOUND_HTTP_MAX_RETRIES: int = 2
+    OUTBOUND_HTTP_BACKOFF_SECONDS: float = 0.5
+    OUTBOUND_HTTP_BACKOFF_MAX_SECONDS: float = 8.0
+    # Keep-alive connections kept per host.
+    OUTBOUND_HTTP_POOL_SIZE: int = 20
+    # Provider API roots; point them at a local stub server in development.
+    META_API_BASE: str = "https://graph.facebook.com"
+    GOOGLE_CALENDAR_API_BASE: str = "https://www.googleapis.com/calendar/v3"
+    # Outgoing messages (lead follow-ups) are written to message_outbox in the same transaction
+    # as the lead and sent in batches by relay workers; every send takes a token from its
+    # channel's bucket (messages per second, burst of one second).
+    FOLLOWUP_RATE_LIMITS: dict[str, float] = Field(
+        default_factory=lambda: {"whatsapp": 20.0, "facebook": 10.0, "instagram": 10.0}
+    )
+    FOLLOWUP_DEFAULT_RATE: float = 10.0
+    # "redis" (REDIS_URL): the rates above are global across all relays. "memory": per relay
+    # process, only right when a single relay runs.
+    FOLLOWUP_RATE_LIMIT_STORE: str = "redis"
+    FOLLOWUP_BATCH_SIZE: int = 200
+    FOLLOWUP_SEND_CONCURRENCY: int = 8
+    # A channel still answering 429 after the HTTP client's retries is paused this long.
+    FOLLOWUP_THROTTLE_PAUSE_SECONDS: float = 30.0
+    # Attempts (429, 5xx, no response) before an outbox row is marked dead.
+    FOLLOWUP_MAX_ATTEMPTS: int = 5
+    # Failed sends wait OUTBOX_RETRY_BACKOFF_SECONDS * 2^(attempt-1) (jittered, capped).
+    OUTBOX_RETRY_BACKOFF_SECONDS: float = 30.0
+    OUTBOX_RETRY_BACKOFF_MAX_SECONDS: float = 3600.0
+    # Workers relay due rows at least this often (Celery beat), sooner when a lead is created.
+    OUTBOX_RELAY_INTERVAL_SECONDS: int = 10
+    # One relay run stops claiming new batches after this long.
+    OUTBOX_RELAY_MAX_SECONDS: float = 50.0
+    # A claimed row not settled within this long (relay died) becomes due again.
+    OUTBOX_CLAIM_LEASE_SECONDS: int = 300
+    # Rendered analytics PDFs, keyed by a hash of the metrics they show; shared by the
+    # processes on one host. The newest REPORT_CACHE_MAX_FILES are kept.
+    REPORT_CACHE_DIR: str = "/tmp/realestate-ai-reports"
+    REPORT_CACHE_MAX_FILES: int = 64
+    # last_used_at on keys is coalesced in memory and written at most this often.
+    KEY_USAGE_FLUSH_SECONDS: int = 30
+
     LOGIN_MAX_ATTEMPTS: int = 5
     LOGIN_LOCK_MINUTES: int = 15
 
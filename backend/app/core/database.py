@@ -16,3 +16,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def ensure_indexes() -> None:
+    """
+    Create declared indexes that are missing on existing tables.
+
+    create_all() skips tables that already exist, so indexes added to a model later would
+    otherwise never reach a database created by an earlier release.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
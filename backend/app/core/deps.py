@@ -1,15 +1,18 @@
 from datetime import datetime, timezone
 
-from fastapi import Depends, Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import cache_principal, get_cached_principal, key_usage, resolve_api_key, resolve_embed_key
+from app.core.cache import attach
 from app.core.database import get_db
 from app.core.config import get_settings
 from app.core.security import decode_token
 from app.core.security import api_key_hash
 from app.models.api_key import ApiKey
+from app.models.embed_key import EmbedKey
 from app.models.user import User, UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -29,19 +32,17 @@ def get_current_user(
     if x_api_key:
         settings = get_settings()
         h = api_key_hash(x_api_key, settings.SECRET_KEY)
-        row = db.query(ApiKey).filter(ApiKey.key_hash == h, ApiKey.revoked_at.is_(None)).first()
-        if not row:
+        resolved = resolve_api_key(db, h)
+        if not resolved:
             raise HTTPException(status_code=401, detail="Invalid API key")
-        user = db.query(User).filter(User.id == int(row.user_id)).first()
-        if not user:
-            raise credentials_exception
+        user = resolved.user
         if not user.is_active:
             raise HTTPException(status_code=403, detail="User inactive")
         if user.locked_until and user.locked_until > datetime.now(timezone.utc).replace(tzinfo=None):
             raise HTTPException(status_code=423, detail="Account locked")
-        row.last_used_at = datetime.now(timezone.utc).replace(tzinfo=None)
-        db.commit()
-        return user
+        # last_used_at is coalesced and written in the background, not per request.
+        key_usage.record(ApiKey, resolved.key.id)
+        return attach(db, user)
 
     try:
         payload = decode_token(token)
@@ -59,7 +60,8 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    cached = get_cached_principal(user_id, token_session_version)
+    user = cached or db.query(User).filter(User.id == int(user_id)).first()
     if not user:
         raise credentials_exception
     if not user.is_active:
@@ -69,9 +71,41 @@ def get_current_user(
     if user.locked_until and user.locked_until > datetime.now(timezone.utc).replace(tzinfo=None):
         raise HTTPException(status_code=423, detail="Account locked")
 
+    if cached is not None:
+        return attach(db, cached)
+    cache_principal(user)
     return user
 
 
+def authenticate_embed_key(
+    db: Session,
+    request: Request,
+    key: str | None,
+    x_embed_key: str | None,
+) -> tuple[EmbedKey, User]:
+    """Resolve a publishable embed key (from cache when possible) and enforce its origin allowlist."""
+    settings = get_settings()
+    token = (x_embed_key or key or "").strip()
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing embed key")
+
+    resolved = resolve_embed_key(db, api_key_hash(token, settings.SECRET_KEY))
+    if not resolved:
+        raise HTTPException(status_code=401, detail="Invalid embed key")
+
+    origin = (request.headers.get("origin") or "").strip()
+    if resolved.key.allowed_origins:
+        allowed = [o.strip() for o in resolved.key.allowed_origins.split(",") if o.strip()]
+        if origin and origin not in allowed:
+            raise HTTPException(status_code=403, detail="Origin not allowed")
+
+    if not resolved.user.is_active:
+        raise HTTPException(status_code=401, detail="Invalid embed key")
+
+    key_usage.record(EmbedKey, resolved.key.id)
+    return attach(db, resolved.key), attach(db, resolved.user)
+
+
 def require_roles(*roles: UserRole):
     def role_dependency(current_user: User = Depends(get_current_user)) -> User:
         if current_user.role not in roles:
@@ -0,0 +1,211 @@
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from app.core.config import get_settings
+
+# Methods that are safe to replay after the request may have reached the provider.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Statuses worth another attempt for idempotent calls: throttling and gateway/server trouble.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Other methods (a POST sends a message) only retry answers that say nothing was processed:
+# after a 500/502/504 the provider may already have delivered.
+UNPROCESSED_STATUSES = frozenset({429, 503})
+# Upper bounds of the latency histogram buckets, in milliseconds (plus an overflow bucket).
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class IntegrationMetrics:
+    """Per-integration request counters: latency histogram, status codes, retries, errors."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.status_codes: dict[str, int] = {}
+        self.latency_ms = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_total_ms = 0.0
+
+    def record(self, elapsed_ms: float, status: int | None, retries: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.retries += retries
+            if status is None:
+                self.errors += 1
+            else:
+                self.status_codes[str(status)] = self.status_codes.get(str(status), 0) + 1
+            self.latency_ms[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            self.latency_total_ms += elapsed_ms
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            labels = [f"le_{b}" for b in LATENCY_BUCKETS_MS] + ["inf"]
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "status_codes": dict(self.status_codes),
+                "latency_ms": dict(zip(labels, self.latency_ms)),
+                "latency_avg_ms": round(self.latency_total_ms / self.requests, 2) if self.requests else 0.0,
+            }
+
+
+def _never_sent(exc: requests.exceptions.ConnectionError) -> bool:
+    """
+    True when the connection was never established, so no byte of the request went out.
+
+    A plain ConnectionError also covers "Connection aborted" (a stale keep-alive socket
+    closed after the body was written); the provider may have acted on that request.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _retry_after_seconds(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class OutboundClient:
+    """
+    Shared client for calls to third-party APIs (Meta Graph, Google Calendar, CRM webhooks).
+
+    One `requests.Session` per process keeps a keep-alive connection pool per host, so
+    repeated sends skip the TCP/TLS handshake. Retries use full-jitter exponential backoff,
+    honouring Retry-After up to the backoff cap. Idempotent calls retry 429, 5xx and any
+    connection error; a POST only retries 429, 503 and connections that never opened, so a
+    message is never sent twice.
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        connect_timeout: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        pool_maxsize: int,
+        pool_connections: int = 20,
+    ) -> None:
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._session: requests.Session | None = None
+        self._pid = 0
+        self._lock = threading.Lock()
+        self._metrics: dict[str, IntegrationMetrics] = {}
+
+    def _get_session(self) -> requests.Session:
+        # Pooled sockets must not be shared across a fork (Celery prefork workers).
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self._pool_connections, pool_maxsize=self._pool_maxsize)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def metrics(self, integration: str) -> IntegrationMetrics:
+        metrics = self._metrics.get(integration)
+        if metrics is None:
+            with self._lock:
+                metrics = self._metrics.setdefault(integration, IntegrationMetrics())
+        return metrics
+
+    def backoff(self, attempt: int, response: requests.Response | None = None) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+        retry_after = _retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        integration: str,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Send with retries; returns the last response or raises the last connection error."""
+        session = self._get_session()
+        timeout_pair = (self.connect_timeout, timeout or self.timeout)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES if idempotent else UNPROCESSED_STATUSES
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = session.request(method, url, timeout=timeout_pair, **kwargs)
+            except requests.exceptions.ConnectionError as exc:
+                if attempt >= self.max_retries or not (idempotent or _never_sent(exc)):
+                    self.metrics(integration).record((time.perf_counter() - started) * 1000, None, attempt)
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            except requests.RequestException:
+                self.metrics(integration).record((time.perf_counter() - started) * 1000, None, attempt)
+                raise
+            if response.status_code in retry_statuses and attempt < self.max_retries:
+                response.close()
+                time.sleep(self.backoff(attempt, response))
+                attempt += 1
+                continue
+            self.metrics(integration).record((time.perf_counter() - started) * 1000, response.status_code, attempt)
+            return response
+
+    def post(self, url: str, *, integration: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, integration=integration, **kwargs)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {name: metrics.stats() for name, metrics in sorted(self._metrics.items())}
+
+
+_client: OutboundClient | None = None
+
+
+def get_http_client() -> OutboundClient:
+    global _client
+    if _client is None:
+        settings = get_settings()
+        _client = OutboundClient(
+            timeout=settings.OUTBOUND_HTTP_TIMEOUT_SECONDS,
+            connect_timeout=settings.OUTBOUND_HTTP_CONNECT_TIMEOUT_SECONDS,
+            max_retries=settings.OUTBOUND_HTTP_MAX_RETRIES,
+            backoff_base=settings.OUTBOUND_HTTP_BACKOFF_SECONDS,
+            backoff_max=settings.OUTBOUND_HTTP_BACKOFF_MAX_SECONDS,
+            pool_maxsize=settings.OUTBOUND_HTTP_POOL_SIZE,
+        )
+    return _client
+
+
+def outbound_http_stats() -> dict[str, dict[str, Any]]:
+    return get_http_client().stats()
@@ -10,6 +10,11 @@ from app.models.api_key import ApiKey
 from app.models.password_reset import PasswordResetToken
 from app.models.embed_key import EmbedKey
 from app.models.embed_chat import EmbedConversation, EmbedMessage, EmbedMessageRole
+from app.models.agent_workload import AgentWorkload
+from app.models.lead_import import LeadImportJob, LeadImportStatus
+from app.models.lead_stats import LeadDailyStat
+from app.models.property_embedding import PropertyEmbedding
+from app.models.outbox import MessageOutbox, OutboxStatus
 
 __all__ = [
     "User",
@@ -35,4 +40,11 @@ __all__ = [
     "EmbedConversation",
     "EmbedMessage",
     "EmbedMessageRole",
+    "AgentWorkload",
+    "LeadImportJob",
+    "LeadImportStatus",
+    "LeadDailyStat",
+    "PropertyEmbedding",
+    "MessageOutbox",
+    "OutboxStatus",
 ]
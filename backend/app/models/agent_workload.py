@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class AgentWorkload(Base):
+    """Denormalized open-lead counter per agent (maintained by app.services.assignment)."""
+
+    __tablename__ = "agent_workloads"
+    __table_args__ = (
+        # Serves "least-loaded agent" as an ordered index scan instead of a per-agent COUNT(*).
+        Index("ix_agent_workloads_open_leads_agent_id", "open_leads", "agent_id"),
+    )
+
+    agent_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    open_leads: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
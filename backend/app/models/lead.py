@@ -1,7 +1,7 @@
 from datetime import datetime
 import enum
 
-from sqlalchemy import DateTime, Enum, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, Enum, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -27,6 +27,15 @@ class LeadStatus(str, enum.Enum):
 
 class Lead(Base):
     __tablename__ = "leads"
+    # Keyset pagination walks (created_at, id) newest-first; each list filter gets a
+    # (<filter>, created_at, id) index so a filtered page is an index range scan.
+    __table_args__ = (
+        Index("ix_leads_created_at_id", "created_at", "id"),
+        Index("ix_leads_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_leads_channel_created_at_id", "channel", "created_at", "id"),
+        Index("ix_leads_assigned_agent_id_created_at_id", "assigned_agent_id", "created_at", "id"),
+        Index("ix_leads_score_created_at", "score", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     full_name: Mapped[str] = mapped_column(String(120), nullable=False)
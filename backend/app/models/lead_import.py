@@ -0,0 +1,39 @@
+from datetime import datetime
+import enum
+
+from sqlalchemy import DateTime, Enum, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.lead import LeadChannel
+
+
+class LeadImportStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class LeadImportJob(Base):
+    __tablename__ = "lead_import_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    status: Mapped[LeadImportStatus] = mapped_column(Enum(LeadImportStatus), default=LeadImportStatus.queued, nullable=False)
+
+    # "csv" or "ndjson"; the upload is spooled to `file_path` until the job finishes.
+    file_format: Mapped[str] = mapped_column(String(10), nullable=False)
+    filename: Mapped[str | None] = mapped_column(String(255))
+    file_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    default_channel: Mapped[LeadChannel] = mapped_column(Enum(LeadChannel), nullable=False)
+
+    rows_processed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rows_created: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rows_duplicate: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rows_failed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -0,0 +1,27 @@
+from datetime import date
+
+from sqlalchemy import Date, Enum, Float, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.lead import LeadChannel, LeadStatus
+
+
+class LeadDailyStat(Base):
+    """
+    Rollup of `leads` by creation day, channel, assigned agent and current status.
+
+    Maintained incrementally by app.services.lead_stats; analytics read this instead of
+    scanning `leads`. agent_id 0 means unassigned (NULL would defeat the unique key).
+    """
+
+    __tablename__ = "lead_daily_stats"
+    __table_args__ = (UniqueConstraint("day", "channel", "agent_id", "status", name="uq_lead_daily_stats_bucket"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    channel: Mapped[LeadChannel] = mapped_column(Enum(LeadChannel), nullable=False)
+    agent_id: Mapped[int] = mapped_column(Integer, default=0, nullable=False, index=True)
+    status: Mapped[LeadStatus] = mapped_column(Enum(LeadStatus), nullable=False)
+    lead_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_sum: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
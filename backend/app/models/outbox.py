@@ -0,0 +1,48 @@
+from datetime import datetime
+import enum
+
+from sqlalchemy import DateTime, Enum, Float, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.lead import LeadChannel
+
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    sending = "sending"
+    sent = "sent"
+    failed = "failed"
+    dead = "dead"
+
+
+class MessageOutbox(Base):
+    """
+    Outgoing message written in the same transaction as the change that caused it.
+
+    The relay (app.services.outbox) claims due rows, sends them through dispatch_message and
+    records the outcome here. `dedupe_key` is unique, so enqueueing the same message twice is
+    a no-op.
+    """
+
+    __tablename__ = "message_outbox"
+    __table_args__ = (Index("ix_message_outbox_status_next_attempt_at_id", "status", "next_attempt_at", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    channel: Mapped[LeadChannel] = mapped_column(Enum(LeadChannel), nullable=False)
+    lead_id: Mapped[int | None] = mapped_column(Integer, index=True)
+    payload_json: Mapped[str] = mapped_column(Text, nullable=False)
+    dedupe_key: Mapped[str | None] = mapped_column(String(120), unique=True)
+
+    status: Mapped[OutboxStatus] = mapped_column(Enum(OutboxStatus), default=OutboxStatus.pending, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Relay that holds the row while status is "sending"; the claim expires after the lease.
+    claimed_by: Mapped[str | None] = mapped_column(String(80))
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+    last_status_code: Mapped[int | None] = mapped_column(Integer)
+    last_error: Mapped[str | None] = mapped_column(Text)
+    latency_ms: Mapped[float | None] = mapped_column(Float)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class PropertyEmbedding(Base):
+    """Text embedding of Property.description (float16 bytes, see app.services.embeddings)."""
+
+    __tablename__ = "property_embeddings"
+
+    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id"), primary_key=True)
+    vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -22,3 +22,13 @@ class TimeSeriesPoint(BaseModel):
     leads_created: int
     leads_converted: int
     leads_lost: int
+
+
+class AgentPerformance(BaseModel):
+    agent_id: int | None
+    agent_name: str
+    leads: int
+    converted: int
+    lost: int
+    conversion_rate: float
+    avg_lead_score: float
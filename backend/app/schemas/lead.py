@@ -2,6 +2,7 @@ from datetime import datetime
 from pydantic import BaseModel, EmailStr
 
 from app.models.lead import LeadChannel, LeadStatus
+from app.models.lead_import import LeadImportStatus
 
 
 class LeadCreate(BaseModel):
@@ -41,3 +42,21 @@ class LeadResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class LeadImportJobResponse(BaseModel):
+    id: int
+    status: LeadImportStatus
+    file_format: str
+    filename: str | None
+    rows_processed: int
+    rows_created: int
+    rows_duplicate: int
+    rows_failed: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
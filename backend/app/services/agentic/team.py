@@ -1,15 +1,18 @@
 import json
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from sqlalchemy.orm import Session
 
-from app.models.property import Property
+from app.services.chat_state import ConversationState
 from app.services.nlp import extract_entities
+from app.services.property_match import CHAT_WEIGHTS, MatchQuery, rank_listings
 
 
-EMAIL_RE = re.compile(r"([A-Z0-9._%+-]+@[A-Z0-9.-]+\\.[A-Z]{2,})", re.IGNORECASE)
-PHONE_RE = re.compile(r"(\\+?\\d[\\d\\s().-]{7,}\\d)")
+EMAIL_RE = re.compile(r"([A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})", re.IGNORECASE)
+PHONE_RE = re.compile(r"(\+?\d[\d\s().-]{7,}\d)")
+# Fewer digits than this is a price ("1.200.000"), not a phone number.
+PHONE_MIN_DIGITS = 9
 
 
 @dataclass
@@ -17,50 +20,46 @@ class AgentResult:
     reply: str
     extracted: dict
     recommendations: list[dict]
+    # Fields accumulated over the conversation (equal to `extracted` without state).
+    profile: dict = field(default_factory=dict)
 
 
-def _find_recommendations(db: Session, extracted: dict) -> list[dict]:
-    props = db.query(Property).filter(Property.is_available == True).limit(50).all()
-    ranked: list[tuple[float, Property]] = []
-    ptype = (extracted.get("property_type") or "").strip().lower()
-    loc = (extracted.get("location") or "").strip().lower()
+def find_recommendations(db: Session, extracted: dict) -> list[dict]:
     budget = extracted.get("budget")
     try:
         budget_v = float(budget) if budget is not None else None
     except Exception:
         budget_v = None
 
-    for p in props:
-        score = 0.0
-        if ptype and p.property_type and p.property_type.lower() == ptype:
-            score += 40
-        if loc and p.location and loc in p.location.lower():
-            score += 35
-        if budget_v is not None:
-            if p.price <= budget_v:
-                score += 25
-            else:
-                score += max(0.0, 15 - ((p.price - budget_v) / max(budget_v, 1.0)) * 15)
-        else:
-            score += 8
-        ranked.append((score, p))
-
-    ranked.sort(key=lambda x: x[0], reverse=True)
-    out: list[dict] = []
-    for s, p in ranked[:5]:
-        if s < 10:
-            continue
-        out.append({"id": p.id, "title": p.title, "location": p.location, "price": p.price, "image_url": p.image_url})
-    return out
-
-
-def agent_team_reply(db: Session, message: str) -> AgentResult:
+    query = MatchQuery(property_type=extracted.get("property_type"), location=extracted.get("location"), budget=budget_v)
+    (ranked,) = rank_listings(db, [query], CHAT_WEIGHTS, limit=5, min_score=10, decimals=None)
+    return [
+        {"id": p.id, "title": p.title, "location": p.location, "price": p.price, "image_url": p.image_url}
+        for _, p in ranked
+    ]
+
+
+def agent_team_reply(db: Session, message: str, state: ConversationState | None = None) -> AgentResult:
     """
     Lightweight multi-agent behavior without external LLMs:
     - Intake: acknowledge and ask for missing criteria
     - Qualifier: extract entities, compute next questions
     - Recommender: return top matching properties
     """
+    result = qualify_message(message, state)
+    result.recommendations = find_recommendations(db, result.profile)
+    if state is not None:
+        state.recommendations = [r["id"] for r in result.recommendations]
+    return result
+
+
+def qualify_message(message: str, state: ConversationState | None = None) -> AgentResult:
+    """
+    Intake + Qualifier: the reply text and extracted fields, without recommendations.
+
+    With a conversation `state`, this turn's fields are folded into it first and the reply
+    asks only for what the whole conversation is still missing.
+    """
     msg = (message or "").strip()
     extraction = extract_entities(msg)
     extracted = {
@@ -77,35 +76,42 @@ def agent_team_reply(db: Session, message: str) -> AgentResult:
     if m:
         email = m.group(1)
     p = PHONE_RE.search(msg)
-    if p:
+    if p and sum(ch.isdigit() for ch in p.group(1)) >= PHONE_MIN_DIGITS:
         phone = p.group(1)
     if email:
         extracted["email"] = email
     if phone:
         extracted["phone"] = phone
 
+    profile = extracted
+    if state is not None:
+        state.absorb(extracted)
+        state.turns += 1
+        profile = state.profile()
+
     missing = []
-    if not extracted.get("location"):
+    if not profile.get("location"):
         missing.append("location")
-    if not extracted.get("property_type"):
+    if not profile.get("property_type"):
         missing.append("property type")
-    if extracted.get("budget") is None:
+    if profile.get("budget") is None:
         missing.append("budget")
 
-    recs = _find_recommendations(db, extracted)
-
     if missing:
         ask = ", ".join(missing)
         reply = (
             "I can help right now. "
             f"To match listings, tell me your {ask}."
         )
-        if extracted.get("timeline"):
-            reply += f" Timeline noted: {extracted.get('timeline')}."
-        return AgentResult(reply=reply, extracted=extracted, recommendations=recs)
-
-    reply = "Thanks. I found a few matching options. If you share your name and phone/email, an agent can confirm a viewing time."
-    return AgentResult(reply=reply, extracted=extracted, recommendations=recs)
+        if profile.get("timeline"):
+            reply += f" Timeline noted: {profile.get('timeline')}."
+        return AgentResult(reply=reply, extracted=extracted, recommendations=[], profile=profile)
+
+    if profile.get("email") or profile.get("phone"):
+        reply = "Thanks. I found a few matching options. An agent will contact you to confirm a viewing time."
+    else:
+        reply = "Thanks. I found a few matching options. If you share your name and phone/email, an agent can confirm a viewing time."
+    return AgentResult(reply=reply, extracted=extracted, recommendations=[], profile=profile)
 
 
 def meta_json(**kwargs) -> str:
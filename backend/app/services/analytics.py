@@ -1,36 +1,59 @@
 from datetime import datetime, timedelta
 
-from sqlalchemy import case
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.models.billing import BillingSubscription, SubscriptionPlan, SubscriptionStatus
-from app.models.lead import Lead, LeadStatus
+from app.models.lead import LeadStatus
+from app.models.lead_stats import LeadDailyStat
 from app.models.user import User, UserRole
-from app.schemas.analytics import DashboardMetrics, TimeSeriesPoint
+from app.schemas.analytics import AgentPerformance, DashboardMetrics, TimeSeriesPoint
 
 
-def _lead_scope(db: Session, current_user: User | None):
-    q = db.query(Lead)
+def _stats_scope(db: Session, current_user: User | None, *columns):
+    # Analytics read the lead_daily_stats rollup, so cost tracks days x buckets, not leads.
+    q = db.query(*columns)
     if current_user and current_user.role == UserRole.agent:
-        q = q.filter(Lead.assigned_agent_id == current_user.id)
+        q = q.filter(LeadDailyStat.agent_id == current_user.id)
     return q
 
 
 def get_dashboard_metrics(db: Session, current_user: User | None = None) -> DashboardMetrics:
-    scoped = _lead_scope(db, current_user)
-    total = scoped.with_entities(func.count(Lead.id)).scalar() or 0
-    converted = scoped.with_entities(func.count(Lead.id)).filter(Lead.status == LeadStatus.converted).scalar() or 0
-    avg_score = scoped.with_entities(func.avg(Lead.score)).scalar() or 0.0
+    rows = (
+        _stats_scope(
+            db,
+            current_user,
+            LeadDailyStat.channel,
+            LeadDailyStat.agent_id,
+            LeadDailyStat.status,
+            func.sum(LeadDailyStat.lead_count),
+            func.sum(LeadDailyStat.score_sum),
+        )
+        .group_by(LeadDailyStat.channel, LeadDailyStat.agent_id, LeadDailyStat.status)
+        .all()
+    )
 
-    by_channel_rows = scoped.with_entities(Lead.channel, func.count(Lead.id)).group_by(Lead.channel).all()
-    by_channel = {str(row[0]): row[1] for row in by_channel_rows}
+    total = converted = lost = 0
+    score_total = 0.0
+    by_channel: dict[str, int] = {}
+    by_agent: dict[str, int] = {}
+    for channel, agent_id, status, count, score in rows:
+        count = int(count or 0)
+        if not count:
+            continue
+        total += count
+        score_total += float(score or 0.0)
+        if status == LeadStatus.converted:
+            converted += count
+        elif status == LeadStatus.lost:
+            lost += count
+        by_channel[str(channel)] = by_channel.get(str(channel), 0) + count
+        agent_key = str(agent_id or "unassigned")
+        by_agent[agent_key] = by_agent.get(agent_key, 0) + count
+    avg_score = (score_total / total) if total else 0.0
 
     if current_user and current_user.role == UserRole.agent:
         by_agent = {str(current_user.id): int(total)}
-    else:
-        by_agent_rows = scoped.with_entities(Lead.assigned_agent_id, func.count(Lead.id)).group_by(Lead.assigned_agent_id).all()
-        by_agent = {str(row[0] or "unassigned"): row[1] for row in by_agent_rows}
 
     rate = (converted / total * 100.0) if total else 0.0
 
@@ -51,7 +74,6 @@ def get_dashboard_metrics(db: Session, current_user: User | None = None) -> Dash
         mrr += plan_price.get(plan, 0) * int(cnt or 0)
 
     # Losses estimate: "lost" leads are counted as opportunity loss with a small constant.
-    lost = scoped.with_entities(func.count(Lead.id)).filter(Lead.status == LeadStatus.lost).scalar() or 0
     losses = int(lost * 10)  # placeholder estimate; replace with your own model
     profit = max(0, int(mrr - losses))
 
@@ -87,25 +109,24 @@ def get_timeseries(db: Session, current_user: User | None = None, days: int = 30
     for plan, cnt in active_subs:
         mrr += plan_price.get(plan, 0) * int(cnt or 0)
 
-    # Fast path: aggregate in a single query instead of 3 queries per day.
-    day_col = func.date(Lead.created_at)
-    scoped = _lead_scope(db, current_user)
     rows = (
-        scoped.with_entities(
-            day_col.label("day"),
-            func.count(Lead.id).label("created"),
-            func.sum(case((Lead.status == LeadStatus.converted, 1), else_=0)).label("converted"),
-            func.sum(case((Lead.status == LeadStatus.lost, 1), else_=0)).label("lost"),
-        )
-        .filter(Lead.created_at >= start)
-        .group_by(day_col)
+        _stats_scope(db, current_user, LeadDailyStat.day, LeadDailyStat.status, func.sum(LeadDailyStat.lead_count))
+        .filter(LeadDailyStat.day >= start.date())
+        .group_by(LeadDailyStat.day, LeadDailyStat.status)
         .all()
     )
 
     by_day: dict[str, tuple[int, int, int]] = {}
-    for d, created, converted, lost in rows:
-        key = str(d)
-        by_day[key] = (int(created or 0), int(converted or 0), int(lost or 0))
+    for d, status, count in rows:
+        key = d.isoformat()
+        created, converted, lost = by_day.get(key, (0, 0, 0))
+        count = int(count or 0)
+        created += count
+        if status == LeadStatus.converted:
+            converted += count
+        elif status == LeadStatus.lost:
+            lost += count
+        by_day[key] = (created, converted, lost)
 
     points: list[TimeSeriesPoint] = []
     for i in range(days):
@@ -127,3 +148,45 @@ def get_timeseries(db: Session, current_user: User | None = None, days: int = 30
         )
 
     return points
+
+
+def get_agent_performance(db: Session, current_user: User | None = None) -> list[AgentPerformance]:
+    """Per-agent lead counts, conversions and average score from the rollup, busiest first."""
+    rows = (
+        _stats_scope(
+            db,
+            current_user,
+            LeadDailyStat.agent_id,
+            LeadDailyStat.status,
+            func.sum(LeadDailyStat.lead_count),
+            func.sum(LeadDailyStat.score_sum),
+        )
+        .group_by(LeadDailyStat.agent_id, LeadDailyStat.status)
+        .all()
+    )
+    totals: dict[int, list[float]] = {}
+    for agent_id, status, count, score in rows:
+        bucket = totals.setdefault(int(agent_id or 0), [0, 0, 0, 0.0])
+        count = int(count or 0)
+        bucket[0] += count
+        if status == LeadStatus.converted:
+            bucket[1] += count
+        elif status == LeadStatus.lost:
+            bucket[2] += count
+        bucket[3] += float(score or 0.0)
+
+    names = dict(db.query(User.id, User.full_name).filter(User.id.in_([a for a in totals if a])).all()) if totals else {}
+    result = [
+        AgentPerformance(
+            agent_id=agent_id or None,
+            agent_name=names.get(agent_id, f"Agent #{agent_id}") if agent_id else "Unassigned",
+            leads=int(leads),
+            converted=int(converted),
+            lost=int(lost),
+            conversion_rate=round(converted / leads * 100.0, 2) if leads else 0.0,
+            avg_lead_score=round(score_sum / leads, 2) if leads else 0.0,
+        )
+        for agent_id, (leads, converted, lost, score_sum) in totals.items()
+        if leads
+    ]
+    return sorted(result, key=lambda a: (-a.leads, a.agent_name))
@@ -0,0 +1,345 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.lead import Lead
+from app.models.property import Property
+from app.models.property_embedding import PropertyEmbedding
+from app.services.embeddings import (
+    EMBEDDING_DIM,
+    EMBEDDING_VERSION,
+    decode_lead_embedding,
+    embed_text,
+    fill_missing_embeddings,
+    lead_vector,
+    property_vector,
+    vector_from_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_KINDS = ("leads", "properties")
+REBUILD_SCHEDULED_KEY = "ann_index:rebuild_scheduled"
+# A process asks for an early rebuild at most this often.
+REBUILD_KICK_INTERVAL_SECONDS = 300
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE = 20000
+_ASSIGN_CHUNK = 8192
+# Rows newer than the build are scored exactly from their stored embeddings, newest first up
+# to this many; past that an early rebuild is requested.
+MAX_UNINDEXED_ROWS = 2000
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def _spherical_kmeans(x: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    sample = x[rng.choice(len(x), size=min(len(x), KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty lists from random points so every list stays usable.
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(x), dtype=np.int32)
+    for start in range(0, len(x), _ASSIGN_CHUNK):
+        out[start : start + _ASSIGN_CHUNK] = np.argmax(x[start : start + _ASSIGN_CHUNK] @ centroids.T, axis=1)
+    return out
+
+
+@dataclass
+class IvfIndex:
+    """
+    Inverted-file (IVF) cosine index over IDF-weighted text embeddings.
+
+    Vectors are stored grouped by list, so a query scores its `nprobe` closest lists as
+    contiguous slices. Arrays are .npy files opened with mmap_mode="r": the OS page cache
+    is shared across workers and nothing is copied onto the Python heap.
+    """
+
+    path: str
+    ids: np.ndarray  # int64, list order
+    vectors: np.ndarray  # float16 (n, EMBEDDING_DIM), list order, unit length
+    offsets: np.ndarray  # int64 (nlist + 1,), list boundaries into ids/vectors
+    centroids: np.ndarray  # float32 (nlist, EMBEDDING_DIM)
+    idf: np.ndarray  # float32 (EMBEDDING_DIM,)
+    max_id: int
+    built_at: float
+
+    @classmethod
+    def build(cls, path: str, ids: np.ndarray, raw: np.ndarray) -> "IvfIndex":
+        os.makedirs(path, exist_ok=True)
+        n = len(ids)
+        df = np.count_nonzero(raw, axis=0).astype(np.float32)
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        weighted = _normalize_rows(raw * idf).astype(np.float32)
+
+        nlist = int(min(1024, max(1, round(np.sqrt(n))))) if n else 1
+        if n:
+            centroids = _spherical_kmeans(weighted, nlist).astype(np.float32)
+            assign = _assign(weighted, centroids)
+        else:
+            centroids = np.zeros((1, EMBEDDING_DIM), dtype=np.float32)
+            assign = np.zeros(0, dtype=np.int32)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=len(centroids)))
+
+        np.save(os.path.join(path, "ids.npy"), ids[order].astype(np.int64))
+        np.save(os.path.join(path, "vectors.npy"), weighted[order].astype(np.float16))
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        np.save(os.path.join(path, "centroids.npy"), centroids)
+        np.save(os.path.join(path, "idf.npy"), idf)
+        meta = {"version": EMBEDDING_VERSION, "count": n, "max_id": int(ids.max()) if n else 0, "built_at": time.time()}
+        with open(os.path.join(path, "meta.json"), "w") as fh:
+            json.dump(meta, fh)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> "IvfIndex":
+        with open(os.path.join(path, "meta.json")) as fh:
+            meta = json.load(fh)
+
+        def arr(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        return cls(
+            path=path,
+            ids=arr("ids"),
+            vectors=arr("vectors"),
+            offsets=np.asarray(arr("offsets")),
+            centroids=np.asarray(arr("centroids")),
+            idf=np.asarray(arr("idf")),
+            max_id=int(meta["max_id"]),
+            built_at=float(meta["built_at"]),
+        )
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def weigh(self, raw: np.ndarray) -> np.ndarray:
+        """Apply this corpus' IDF to raw embeddings (1-D or 2-D) and re-normalize."""
+        weighted = np.atleast_2d(raw) * self.idf
+        return _normalize_rows(weighted)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int) -> list[tuple[float, int]]:
+        """Top-k (cosine, id) for an already weighted, unit-length query vector."""
+        if not len(self) or k <= 0:
+            return []
+        probe = np.argsort(-(self.centroids @ query))[: max(1, nprobe)]
+        ids_parts, score_parts = [], []
+        for lst in probe:
+            lo, hi = int(self.offsets[lst]), int(self.offsets[lst + 1])
+            if hi > lo:
+                score_parts.append(np.asarray(self.vectors[lo:hi], dtype=np.float32) @ query)
+                ids_parts.append(np.asarray(self.ids[lo:hi]))
+        if not score_parts:
+            return []
+        return _top_k(np.concatenate(score_parts), np.concatenate(ids_parts), k)
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> list[tuple[float, int]]:
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[keep], ids[keep]
+    order = np.lexsort((ids, -scores))
+    return [(float(scores[i]), int(ids[i])) for i in order]
+
+
+def _load_corpus(db: Session, kind: str) -> tuple[np.ndarray, np.ndarray]:
+    """(ids, raw embeddings) of every row of `kind`, embedding any that have none stored."""
+    if kind == "leads":
+        rows = db.query(Lead.id, Lead.raw_message, Lead.embedding).order_by(Lead.id).all()
+        vectors = []
+        for _, raw, stored in rows:
+            vec = decode_lead_embedding(stored)
+            vectors.append(vec if vec is not None else embed_text(raw))
+        ids = [r[0] for r in rows]
+    else:
+        rows = (
+            db.query(Property.id, Property.title, Property.description, PropertyEmbedding.vector)
+            .outerjoin(PropertyEmbedding, PropertyEmbedding.property_id == Property.id)
+            .filter(Property.is_available == True)
+            .order_by(Property.id)
+            .all()
+        )
+        vectors = [vector_from_bytes(v) if v else property_vector(t, d) for _, t, d, v in rows]
+        ids = [r[0] for r in rows]
+    return _stack(ids, vectors)
+
+
+def _load_tail(db: Session, kind: str, after_id: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The newest MAX_UNINDEXED_ROWS rows with id > after_id, from stored embeddings only.
+
+    Rows are embedded when created, so a row without a stored embedding is skipped here rather
+    than embedded on every search; the next build embeds it.
+    """
+    if kind == "leads":
+        rows = [
+            (lead_id, vec)
+            for lead_id, stored in db.query(Lead.id, Lead.embedding)
+            .filter(Lead.id > after_id, Lead.embedding.startswith(f"{EMBEDDING_VERSION}:"))
+            .order_by(Lead.id.desc())
+            .limit(MAX_UNINDEXED_ROWS)
+            .all()
+            if (vec := decode_lead_embedding(stored)) is not None
+        ]
+    else:
+        rows = [
+            (prop_id, vector_from_bytes(stored))
+            for prop_id, stored in db.query(Property.id, PropertyEmbedding.vector)
+            .join(PropertyEmbedding, PropertyEmbedding.property_id == Property.id)
+            .filter(Property.id > after_id, Property.is_available == True)
+            .order_by(Property.id.desc())
+            .limit(MAX_UNINDEXED_ROWS)
+            .all()
+        ]
+    return _stack([r[0] for r in rows], [r[1] for r in rows])
+
+
+def _stack(ids: list[int], vectors: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    if not ids:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.asarray(ids, dtype=np.int64), np.vstack(vectors).astype(np.float32)
+
+
+def _kind_dir(kind: str) -> str:
+    return os.path.join(get_settings().EMBEDDING_INDEX_DIR, kind)
+
+
+def _current_build(kind: str) -> str | None:
+    try:
+        with open(os.path.join(_kind_dir(kind), "CURRENT")) as fh:
+            name = fh.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(_kind_dir(kind), name)
+    return path if os.path.exists(os.path.join(path, "meta.json")) else None
+
+
+def build_ann_index(kind: str) -> IvfIndex:
+    """Embed anything missing, build a fresh index on disk and atomically make it current."""
+    db = SessionLocal()
+    try:
+        fill_missing_embeddings(db)
+        ids, raw = _load_corpus(db, kind)
+    finally:
+        db.close()
+
+    base = _kind_dir(kind)
+    name = f"build-{int(time.time() * 1000)}-{os.getpid()}"
+    index = IvfIndex.build(os.path.join(base, name), ids, raw)
+    tmp = os.path.join(base, f"CURRENT.{os.getpid()}")
+    with open(tmp, "w") as fh:
+        fh.write(name)
+    os.replace(tmp, os.path.join(base, "CURRENT"))
+
+    # Keep the previous build around for readers that still have it mapped.
+    builds = sorted(d for d in os.listdir(base) if d.startswith("build-"))
+    for old in builds[:-2]:
+        shutil.rmtree(os.path.join(base, old), ignore_errors=True)
+    return index
+
+
+_loaded: dict[str, IvfIndex] = {}
+_index_lock = threading.Lock()
+_last_kick = 0.0
+
+
+def get_ann_index(kind: str) -> IvfIndex | None:
+    """
+    Last built index for `kind`, memory-mapped from disk; None before the first build.
+
+    Never builds: rebuild_embedding_indexes does that on the Celery beat schedule.
+    """
+    current = _current_build(kind)
+    index = _loaded.get(kind)
+    if current is None or (index is not None and index.path == current):
+        return index
+    with _index_lock:
+        index = _loaded.get(kind)
+        if index is None or index.path != current:
+            index = _loaded[kind] = IvfIndex.load(current)
+        return index
+
+
+def kick_index_rebuild() -> None:
+    """
+    Ask a worker to rebuild the indexes ahead of the periodic run; at most once per
+    REBUILD_KICK_INTERVAL_SECONDS. Best effort: searches keep using the last build meanwhile.
+    """
+    global _last_kick
+    now = time.monotonic()
+    if now - _last_kick < REBUILD_KICK_INTERVAL_SECONDS:
+        return
+    _last_kick = now
+    try:
+        import redis
+
+        client = redis.Redis.from_url(get_settings().REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2)
+        if not client.set(REBUILD_SCHEDULED_KEY, 1, nx=True, ex=REBUILD_KICK_INTERVAL_SECONDS):
+            return
+        # Local import avoids circular imports (tasks import services).
+        from app.workers.tasks import rebuild_embedding_indexes
+
+        rebuild_embedding_indexes.delay()
+    except Exception as exc:
+        logger.warning("embedding index rebuild kick failed (%s); the periodic rebuild will catch up", exc)
+
+
+def _search_with_tail(db: Session, kind: str, query_raw: np.ndarray, k: int) -> list[tuple[float, int]]:
+    index = get_ann_index(kind)
+    # Rows created since the build are not in the IVF lists yet: score them exactly.
+    tail_ids, tail_raw = _load_tail(db, kind, after_id=index.max_id if index else 0)
+    if index is None or len(tail_ids) >= MAX_UNINDEXED_ROWS:
+        kick_index_rebuild()
+    if index is None:
+        # No build yet: only the newest rows, and without corpus IDF weighting.
+        if not len(tail_ids):
+            return []
+        return _top_k(_normalize_rows(tail_raw) @ _normalize_rows(np.atleast_2d(query_raw))[0], tail_ids, k)
+
+    query = index.weigh(query_raw)[0]
+    hits = index.search(query, k, get_settings().EMBEDDING_INDEX_NPROBE)
+    if len(tail_ids):
+        hits += _top_k(index.weigh(tail_raw) @ query, tail_ids, k)
+    return sorted(hits, key=lambda h: (-h[0], h[1]))[:k]
+
+
+def similar_properties_for_lead(db: Session, lead: Lead, limit: int = 10) -> list[tuple[float, Property]]:
+    # Over-fetch a little: listings can become unavailable after the index was built.
+    hits = _search_with_tail(db, "properties", lead_vector(lead), limit * 2)
+    by_id = {
+        p.id: p
+        for p in db.query(Property).filter(Property.id.in_([pid for _, pid in hits]), Property.is_available == True).all()
+    }
+    return [(score, by_id[pid]) for score, pid in hits if pid in by_id][:limit]
+
+
+def similar_leads_for_property(db: Session, prop: Property, limit: int = 10) -> list[tuple[float, Lead]]:
+    stored = db.query(PropertyEmbedding.vector).filter(PropertyEmbedding.property_id == prop.id).scalar()
+    query_raw = vector_from_bytes(stored) if stored else property_vector(prop.title, prop.description)
+    hits = _search_with_tail(db, "leads", query_raw, limit)
+    by_id = {lead.id: lead for lead in db.query(Lead).filter(Lead.id.in_([lid for _, lid in hits])).all()}
+    return [(score, by_id[lid]) for score, lid in hits if lid in by_id]
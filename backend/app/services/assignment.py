@@ -1,28 +1,170 @@
+from collections import Counter
+from datetime import datetime
+import heapq
+
+from sqlalchemy import case, func, update
 from sqlalchemy.orm import Session
 
+from app.models.agent_workload import AgentWorkload
 from app.models.user import User, UserRole
 from app.models.lead import Lead, LeadStatus
 
+# Leads in these statuses count towards an agent's workload.
+OPEN_LEAD_STATUSES = (LeadStatus.new, LeadStatus.contacted, LeadStatus.qualified)
+
+
+def is_open_status(status: LeadStatus | None) -> bool:
+    # New Lead objects have no status until INSERT applies the column default (new).
+    return status is None or status in OPEN_LEAD_STATUSES
+
+
+def adjust_agent_load(db: Session, agent_id: int | None, delta: int) -> None:
+    """Atomically move an agent's open-lead counter by `delta` in the caller's transaction."""
+    if not agent_id or not delta:
+        return
+
+    now = datetime.utcnow()
+    updated = (
+        db.query(AgentWorkload)
+        .filter(AgentWorkload.agent_id == agent_id)
+        .update(
+            {AgentWorkload.open_leads: AgentWorkload.open_leads + delta, AgentWorkload.updated_at: now},
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        db.add(AgentWorkload(agent_id=agent_id, open_leads=max(0, delta), updated_at=now))
+        # Flush so a second adjustment in the same session hits the UPDATE path.
+        db.flush()
+
+
+def adjust_agent_loads(db: Session, deltas: dict[int, int]) -> None:
+    """Apply several counter deltas with one UPDATE (rows must already exist in the index)."""
+    deltas = {agent_id: delta for agent_id, delta in deltas.items() if agent_id and delta}
+    if not deltas:
+        return
+    db.execute(
+        update(AgentWorkload)
+        .where(AgentWorkload.agent_id.in_(list(deltas)))
+        .values(
+            open_leads=AgentWorkload.open_leads + case(deltas, value=AgentWorkload.agent_id, else_=0),
+            updated_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def track_lead_transition(
+    db: Session,
+    old_agent_id: int | None,
+    old_status: LeadStatus | None,
+    new_agent_id: int | None,
+    new_status: LeadStatus | None,
+) -> None:
+    """Keep workload counters in sync when a lead is reassigned or changes status."""
+    was_open = bool(old_agent_id) and is_open_status(old_status)
+    now_open = bool(new_agent_id) and is_open_status(new_status)
+    if was_open and now_open and old_agent_id == new_agent_id:
+        return
+    if was_open:
+        adjust_agent_load(db, old_agent_id, -1)
+    if now_open:
+        adjust_agent_load(db, new_agent_id, 1)
+
+
+def _sync_agent_workloads(db: Session) -> int:
+    counts = dict(
+        db.query(Lead.assigned_agent_id, func.count(Lead.id))
+        .filter(Lead.assigned_agent_id.isnot(None), Lead.status.in_(OPEN_LEAD_STATUSES))
+        .group_by(Lead.assigned_agent_id)
+        .all()
+    )
+    agent_ids = {row[0] for row in db.query(User.id).filter(User.role == UserRole.agent).all()}
+    existing = {w.agent_id: w for w in db.query(AgentWorkload).all()}
+
+    now = datetime.utcnow()
+    for agent_id in agent_ids | set(counts) | set(existing):
+        open_leads = int(counts.get(agent_id, 0))
+        row = existing.get(agent_id)
+        if row is None:
+            db.add(AgentWorkload(agent_id=agent_id, open_leads=open_leads, updated_at=now))
+        elif row.open_leads != open_leads:
+            row.open_leads = open_leads
+            row.updated_at = now
+
+    db.flush()
+    return len(agent_ids | set(counts))
+
+
+def rebuild_agent_workloads(db: Session) -> int:
+    """Recompute every counter from `leads`. Returns the number of agents indexed."""
+    indexed = _sync_agent_workloads(db)
+    db.commit()
+    return indexed
+
+
+def _least_loaded_query(db: Session, limit: int) -> list[tuple[int, int]]:
+    rows = (
+        db.query(AgentWorkload.agent_id, AgentWorkload.open_leads)
+        .join(User, User.id == AgentWorkload.agent_id)
+        .filter(User.role == UserRole.agent, User.is_active == True)
+        .order_by(AgentWorkload.open_leads.asc(), AgentWorkload.agent_id.asc())
+        .limit(limit)
+        .all()
+    )
+    return [(int(agent_id), int(open_leads)) for agent_id, open_leads in rows]
+
+
+def _least_loaded_agents(db: Session, limit: int) -> list[tuple[int, int]]:
+    rows = _least_loaded_query(db, limit)
+    if rows:
+        return rows
+
+    # Fresh install or agents created out-of-band: seed the index once and retry.
+    if not db.query(User.id).filter(User.role == UserRole.agent, User.is_active == True).first():
+        return []
+    _sync_agent_workloads(db)
+    return _least_loaded_query(db, limit)
+
 
 def assign_best_agent(db: Session, lead: Lead) -> int | None:
-    agents = db.query(User).filter(User.role == UserRole.agent, User.is_active == True).all()
-    if not agents:
+    """
+    Pick the active agent with the fewest open leads and reserve the slot.
+
+    Reads the workload index (one ordered index lookup) and bumps the chosen agent's
+    counter in the caller's transaction, so callers only need to commit as before.
+    """
+    rows = _least_loaded_agents(db, limit=1)
+    if not rows:
         return None
 
-    # Basic heuristic: assign to the agent with the fewest active leads.
-    best_agent = None
-    min_count = None
-    for agent in agents:
-        active_count = (
-            db.query(Lead)
-            .filter(
-                Lead.assigned_agent_id == agent.id,
-                Lead.status.in_([LeadStatus.new, LeadStatus.contacted, LeadStatus.qualified]),
-            )
-            .count()
-        )
-        if min_count is None or active_count < min_count:
-            min_count = active_count
-            best_agent = agent
+    agent_id = rows[0][0]
+    if is_open_status(lead.status):
+        adjust_agent_load(db, agent_id, 1)
+    return agent_id
+
+
+def assign_agents_bulk(db: Session, count: int) -> list[int | None]:
+    """
+    Assign `count` new leads in one pass, keeping load balanced inside the batch.
+
+    Only the `count` least-loaded agents can receive a lead from a batch of that size, so
+    the candidate read is bounded by the batch rather than the team. Counters for every
+    chosen agent are bumped with a single UPDATE.
+    """
+    if count <= 0:
+        return []
+    rows = _least_loaded_agents(db, limit=count)
+    if not rows:
+        return [None] * count
+
+    heap = [(open_leads, agent_id) for agent_id, open_leads in rows]
+    heapq.heapify(heap)
+    chosen: list[int | None] = []
+    for _ in range(count):
+        open_leads, agent_id = heapq.heappop(heap)
+        chosen.append(agent_id)
+        heapq.heappush(heap, (open_leads + 1, agent_id))
 
-    return best_agent.id if best_agent else None
+    adjust_agent_loads(db, Counter(a for a in chosen if a is not None))
+    return chosen
@@ -1,15 +1,173 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
+from app.core.database import SessionLocal
 from app.models.audit import AuditLog
 
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """
+    In-process buffer that writes AuditLog rows in bulk off the request path.
+
+    Rows are flushed by a daemon thread when AUDIT_BATCH_SIZE rows are pending or every
+    AUDIT_FLUSH_INTERVAL_SECONDS, and on shutdown. In "celery" mode a flushed batch is
+    handed to the worker instead of being inserted here.
+    """
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._rows: deque[dict[str, Any]] = deque()
+        self._thread: threading.Thread | None = None
+        self.buffered = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_failures = 0
+
+    def _ensure_worker(self) -> None:
+        # Forked workers (uvicorn/celery prefork) inherit a copy without the flush thread.
+        if self._pid != os.getpid():
+            self._reset()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+            self._thread.start()
+
+    def add(self, row: dict[str, Any]) -> None:
+        settings = get_settings()
+        with self._lock:
+            self._ensure_worker()
+            if len(self._rows) >= settings.AUDIT_BUFFER_MAX:
+                # Bounded memory: shed the oldest event rather than block the request.
+                self._rows.popleft()
+                self.dropped += 1
+            self._rows.append(row)
+            self.buffered += 1
+            if len(self._rows) >= settings.AUDIT_BATCH_SIZE:
+                self._wake.set()
+
+    def _run(self) -> None:
+        interval = max(0.05, float(get_settings().AUDIT_FLUSH_INTERVAL_SECONDS))
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        settings = get_settings()
+        flushed = 0
+        while True:
+            with self._lock:
+                batch = [self._rows.popleft() for _ in range(min(len(self._rows), settings.AUDIT_BATCH_SIZE))]
+            if not batch:
+                return flushed
+            try:
+                _write_batch(batch, settings.AUDIT_WRITE_MODE)
+            except Exception:
+                logger.exception("audit flush failed (%d rows)", len(batch))
+                with self._lock:
+                    self.flush_failures += 1
+                    # Put the batch back for the next tick, within the buffer bound.
+                    room = max(0, settings.AUDIT_BUFFER_MAX - len(self._rows))
+                    self._rows.extendleft(reversed(batch[:room]))
+                    self.dropped += len(batch) - min(room, len(batch))
+                return flushed
+            with self._lock:
+                self.flushed += len(batch)
+            flushed += len(batch)
+
+    def close(self) -> int:
+        self._stop.set()
+        self._wake.set()
+        return self.flush()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "buffered": self.buffered,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "pending": len(self._rows),
+                "flush_failures": self.flush_failures,
+            }
+
+
+def _write_batch(rows: list[dict[str, Any]], mode: str) -> None:
+    if mode == "celery":
+        try:
+            # Local import avoids circular imports (tasks import services).
+            from app.workers.tasks import write_audit_batch
+
+            write_audit_batch.delay([{**r, "created_at": r["created_at"].isoformat()} for r in rows])
+            return
+        except Exception:
+            logger.warning("audit handoff to worker failed; writing batch in-process")
+    write_audit_rows(rows)
+
+
+def write_audit_rows(rows: list[dict[str, Any]]) -> None:
+    """Insert a batch of audit rows with one statement on a dedicated session."""
+    db = SessionLocal()
+    try:
+        db.execute(insert(AuditLog), rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+_buffer = AuditBuffer()
+atexit.register(_buffer.close)
+
+
+def flush_audit_buffer() -> int:
+    return _buffer.close()
+
+
+def audit_stats() -> dict[str, int]:
+    return _buffer.stats()
+
+
+def audit_event(
+    db: Session,
+    action: str,
+    resource: str,
+    user_id: int | None = None,
+    ip_address: str | None = None,
+    details: str | None = None,
+    durable: bool = False,
+) -> None:
+    """
+    Record an audit event.
 
-def audit_event(db: Session, action: str, resource: str, user_id: int | None = None, ip_address: str | None = None, details: str | None = None) -> None:
-    entry = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource=resource,
-        ip_address=ip_address,
-        details=details,
-    )
-    db.add(entry)
-    db.commit()
+    By default the row is buffered and written in bulk shortly after. Pass durable=True for
+    security-critical events that must be committed before the response is sent.
+    """
+    row = {
+        "user_id": user_id,
+        "action": action,
+        "resource": resource,
+        "ip_address": ip_address,
+        "details": details,
+        "created_at": datetime.utcnow(),
+    }
+    if durable or get_settings().AUDIT_WRITE_MODE == "sync":
+        db.add(AuditLog(**row))
+        db.commit()
+        return
+    _buffer.add(row)
@@ -1,8 +1,9 @@
 from typing import Any
 
-import requests
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
+from app.core.http_client import get_http_client
 from app.models.integration import CalendarIntegration
 
 
@@ -22,7 +23,7 @@ def push_calendar_event(
     if not integration.refresh_token_ref:
         return {"status": "missing_token"}
 
-    url = "https://www.googleapis.com/calendar/v3/calendars/primary/events"
+    url = f"{get_settings().GOOGLE_CALENDAR_API_BASE}/calendars/primary/events"
     payload = {
         "summary": summary,
         "description": description,
@@ -35,7 +36,7 @@ def push_calendar_event(
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=15)
+        response = get_http_client().post(url, integration="google_calendar", json=payload, headers=headers, timeout=15)
         if not response.ok:
             return {"status": "failed", "code": response.status_code, "detail": response.text}
         data = response.json()
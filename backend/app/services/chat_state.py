@@ -0,0 +1,155 @@
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models.embed_chat import EmbedMessage, EmbedMessageRole
+
+logger = logging.getLogger(__name__)
+
+# Fields a conversation accumulates across turns; a later non-empty value wins.
+PROFILE_FIELDS = ("property_type", "location", "budget", "timeline", "email", "phone")
+_INTENT_RANK = {"browsing": 0, "inquiring": 1, "serious": 2}
+
+
+@dataclass
+class ConversationState:
+    """Compact running summary of one website chat, updated once per turn."""
+
+    fields: dict[str, Any] = field(default_factory=dict)
+    intent: str = "browsing"
+    recommendations: list[int] = field(default_factory=list)
+    turns: int = 0
+    lead_id: int | None = None
+
+    def absorb(self, extracted: dict) -> None:
+        """Fold one turn's extracted fields in; intent only ever escalates."""
+        for name in PROFILE_FIELDS:
+            if extracted.get(name) is not None:
+                self.fields[name] = extracted[name]
+        intent = extracted.get("intent") or "browsing"
+        if _INTENT_RANK.get(intent, 0) > _INTENT_RANK.get(self.intent, 0):
+            self.intent = intent
+
+    def profile(self) -> dict[str, Any]:
+        return {"intent": self.intent, **self.fields}
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "ConversationState":
+        return cls(**json.loads(raw))
+
+
+class MemoryStateStore:
+    """Per-process bounded LRU; right for one API process or sticky sessions."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self._cache = TTLCache(ttl_seconds, max_entries)
+
+    def get(self, conversation_id: int) -> ConversationState | None:
+        raw = self._cache.get(conversation_id)
+        return ConversationState.from_json(raw) if raw else None
+
+    def set(self, conversation_id: int, state: ConversationState) -> None:
+        # Stored serialized so callers never share a mutable instance.
+        self._cache.set(conversation_id, state.to_json())
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+class RedisStateStore:
+    """Shared across API processes; entries expire after the TTL like the in-process store."""
+
+    def __init__(self, url: str, ttl_seconds: int) -> None:
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._ttl = int(ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(conversation_id: int) -> str:
+        return f"chat_state:{int(conversation_id)}"
+
+    def get(self, conversation_id: int) -> ConversationState | None:
+        try:
+            raw = self._client.get(self._key(conversation_id))
+        except Exception:
+            # State is a cache over the transcript; an outage only costs a rebuild.
+            logger.warning("chat state read failed", exc_info=True)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ConversationState.from_json(raw)
+
+    def set(self, conversation_id: int, state: ConversationState) -> None:
+        try:
+            self._client.set(self._key(conversation_id), state.to_json(), ex=self._ttl)
+        except Exception:
+            logger.warning("chat state write failed", exc_info=True)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_store: MemoryStateStore | RedisStateStore | None = None
+
+
+def get_state_store() -> MemoryStateStore | RedisStateStore:
+    global _store
+    if _store is None:
+        settings = get_settings()
+        if settings.CHAT_STATE_STORE == "redis":
+            _store = RedisStateStore(settings.REDIS_URL, settings.CHAT_STATE_TTL_SECONDS)
+        else:
+            _store = MemoryStateStore(settings.CHAT_STATE_TTL_SECONDS, settings.CHAT_STATE_MAX_ENTRIES)
+    return _store
+
+
+def rebuild_conversation_state(db: Session, conversation_id: int) -> ConversationState:
+    """
+    Cold path (evicted, expired or another process): replay the extracted fields and lead id
+    stored on the newest assistant messages. No message is re-extracted.
+    """
+    rows = (
+        db.query(EmbedMessage.meta_json)
+        .filter(EmbedMessage.conversation_id == conversation_id, EmbedMessage.role == EmbedMessageRole.assistant)
+        .order_by(EmbedMessage.id.desc())
+        .limit(get_settings().CHAT_STATE_REBUILD_MESSAGES)
+        .all()
+    )
+    state = ConversationState()
+    for (meta,) in reversed(rows):
+        try:
+            data = json.loads(meta or "{}")
+        except ValueError:
+            continue
+        state.absorb(data.get("extracted") or {})
+        state.lead_id = data.get("lead_id") or state.lead_id
+        state.turns += 1
+    return state
+
+
+def load_conversation_state(db: Session, conversation_id: int | None) -> ConversationState:
+    if not conversation_id:
+        return ConversationState()
+    state = get_state_store().get(conversation_id)
+    return state if state is not None else rebuild_conversation_state(db, conversation_id)
+
+
+def save_conversation_state(conversation_id: int, state: ConversationState) -> None:
+    get_state_store().set(conversation_id, state)
+
+
+def chat_state_stats() -> dict[str, int]:
+    return get_state_store().stats()
@@ -0,0 +1,143 @@
+import enum
+from typing import Any, Iterator
+
+from sqlalchemy import Boolean, DateTime, Enum, Float, Integer, func, select
+
+from app.core.database import SessionLocal
+from app.models.appointment import Appointment
+from app.models.audit import AuditLog
+from app.models.embed_chat import EmbedMessage
+from app.models.lead import Lead
+
+# Tables analysts can pull, and the columns left out of each export.
+EXPORT_TABLES: dict[str, tuple[type, tuple[str, ...]]] = {
+    "leads": (Lead, ("embedding",)),
+    "appointments": (Appointment, ()),
+    "embed_messages": (EmbedMessage, ()),
+    "audit_logs": (AuditLog, ()),
+}
+EXPORT_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EXPORT_BATCH_SIZE = 10000
+
+
+class ColumnarExportUnavailable(RuntimeError):
+    pass
+
+
+def _pyarrow() -> Any:
+    # pyarrow is heavy and only needed here; keep it off the API import path.
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise ColumnarExportUnavailable("pyarrow is not installed") from exc
+    return pyarrow
+
+
+def _arrow_type(pa: Any, column: Any) -> Any:
+    sa_type = column.type
+    if isinstance(sa_type, Enum) and sa_type.enum_class is not None:
+        return pa.dictionary(pa.int16(), pa.string())
+    if isinstance(sa_type, Boolean):
+        return pa.bool_()
+    if isinstance(sa_type, Integer):
+        return pa.int64()
+    if isinstance(sa_type, Float):
+        return pa.float64()
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+class _ChunkSink:
+    """Write-only file object that hands everything written so far back to the caller."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def export_watermark(table: str) -> int:
+    """Highest id currently in `table`; an export covers (since, watermark]."""
+    model, _ = EXPORT_TABLES[table]
+    db = SessionLocal()
+    try:
+        return int(db.scalar(select(func.max(model.id))) or 0)
+    finally:
+        db.close()
+
+
+def iter_columnar_export(table: str, fmt: str, since: int, watermark: int) -> Iterator[bytes]:
+    """
+    Stream rows of `table` with since < id <= watermark as Parquet or an Arrow IPC stream.
+
+    Each fetched batch becomes one row group / record batch, so memory is bounded by
+    EXPORT_BATCH_SIZE. Nulls stay nulls and enum columns are dictionary-encoded against
+    the full enum, so every batch shares one dictionary.
+    """
+    pa = _pyarrow()
+    model, excluded = EXPORT_TABLES[table]
+    columns = [c for c in model.__table__.columns if c.key not in excluded]
+    schema = pa.schema([pa.field(c.key, _arrow_type(pa, c), nullable=bool(c.nullable)) for c in columns])
+    enum_codes = {
+        c.key: {member: i for i, member in enumerate(c.type.enum_class)}
+        for c in columns
+        if isinstance(c.type, Enum) and c.type.enum_class is not None
+    }
+    dictionaries = {
+        key: pa.array([m.value if isinstance(m, enum.Enum) else str(m) for m in codes]) for key, codes in enum_codes.items()
+    }
+
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    stmt = (
+        select(*columns)
+        .where(model.id > since, model.id <= watermark)
+        .order_by(model.id)
+    )
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            arrays = []
+            for i, (column, field) in enumerate(zip(columns, schema)):
+                values = [row[i] for row in batch]
+                codes = enum_codes.get(column.key)
+                if codes is not None:
+                    indices = pa.array([None if v is None else codes[v] for v in values], type=pa.int16())
+                    arrays.append(pa.DictionaryArray.from_arrays(indices, dictionaries[column.key]))
+                else:
+                    arrays.append(pa.array(values, type=field.type))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    finally:
+        db.close()
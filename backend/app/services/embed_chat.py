@@ -0,0 +1,209 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import Request
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.deps import authenticate_embed_key
+from app.models.embed_chat import EmbedConversation, EmbedMessage, EmbedMessageRole
+from app.models.embed_key import EmbedKey
+from app.models.lead import Lead, LeadChannel
+from app.models.user import User
+from app.schemas.embed_chat import EmbedChatMessageRequest
+from app.services.agentic.team import AgentResult, agent_team_reply, meta_json
+from app.services.assignment import assign_best_agent
+from app.services.audit import audit_event
+from app.services.chat_state import ConversationState, load_conversation_state, save_conversation_state
+from app.services.embeddings import embed_lead
+from app.services.lead_stats import record_leads_created
+
+
+@dataclass
+class ChatTurn:
+    conversation_id: int
+    lead_id: int | None
+    result: AgentResult
+    # Transcript rows still to be written when EMBED_CHAT_DEFER_TRANSCRIPT is on.
+    deferred_transcript: list[dict[str, Any]] | None = None
+
+
+def _find_conversation(db: Session, user: User, conversation_id: int | None) -> EmbedConversation | None:
+    if not conversation_id:
+        return None
+    return (
+        db.query(EmbedConversation)
+        .filter(EmbedConversation.id == conversation_id, EmbedConversation.user_id == user.id)
+        .first()
+    )
+
+
+def _touch_conversation(
+    db: Session, user: User, embed_key: EmbedKey, conv: EmbedConversation | None, now: datetime
+) -> EmbedConversation:
+    if conv is not None:
+        conv.last_seen_at = now
+        return conv
+    conv = EmbedConversation(user_id=user.id, embed_key_id=embed_key.id, last_seen_at=now)
+    db.add(conv)
+    db.flush()
+    return conv
+
+
+def _transcript_rows(
+    conversation_id: int, payload: EmbedChatMessageRequest, result: AgentResult, lead_id: int | None, now: datetime
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "conversation_id": conversation_id,
+            "role": EmbedMessageRole.user,
+            "content": payload.message,
+            "meta_json": meta_json(page_url=payload.page_url, referrer=payload.referrer),
+            "created_at": now,
+        },
+        {
+            "conversation_id": conversation_id,
+            "role": EmbedMessageRole.assistant,
+            "content": result.reply,
+            # lead_id lets a rebuilt conversation state keep appending to the same lead.
+            "meta_json": meta_json(extracted=result.extracted, lead_id=lead_id),
+            "created_at": now,
+        },
+    ]
+
+
+def write_transcript(rows: list[dict[str, Any]]) -> None:
+    """Insert deferred transcript rows after the response has been sent."""
+    db = SessionLocal()
+    try:
+        db.execute(insert(EmbedMessage), rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _upsert_chat_lead(db: Session, message: str, profile: dict, lead_id: int | None) -> tuple[Lead, bool]:
+    email = profile.get("email")
+    phone = profile.get("phone")
+    # The conversation's own lead first, so one visitor is one lead rather than one per turn.
+    lead = db.get(Lead, lead_id) if lead_id else None
+    if lead is None and (email or phone):
+        q = db.query(Lead)
+        if email:
+            q = q.filter(Lead.email == email)
+        if phone:
+            q = q.filter(Lead.phone == phone)
+        lead = q.order_by(Lead.created_at.desc()).first()
+
+    if lead:
+        lead.raw_message = (lead.raw_message + "\n---\n" + f"[Chat] {message}").strip()
+        embed_lead(lead)
+        for name in ("email", "phone", "property_type", "location", "budget", "timeline"):
+            if getattr(lead, name) is None and profile.get(name) is not None:
+                setattr(lead, name, profile[name])
+        return lead, False
+
+    lead = Lead(
+        full_name="Website Visitor",
+        email=email,
+        phone=phone,
+        channel=LeadChannel.website_chat,
+        raw_message=f"[Chat] {message}",
+        property_type=profile.get("property_type"),
+        location=profile.get("location"),
+        budget=profile.get("budget"),
+        timeline=profile.get("timeline"),
+        score=0.0,
+    )
+    embed_lead(lead)
+    db.add(lead)
+    db.flush()
+    lead.assigned_agent_id = assign_best_agent(db, lead)
+    record_leads_created(db, [lead])
+    return lead, True
+
+
+@dataclass
+class ChatContext:
+    embed_key: EmbedKey
+    user: User
+    conversation: EmbedConversation | None
+    state: ConversationState
+
+
+def open_chat_turn(
+    db: Session,
+    request: Request,
+    payload: EmbedChatMessageRequest,
+    key: str | None,
+    x_embed_key: str | None,
+) -> ChatContext:
+    """Reads only: cached key auth, the visitor's conversation and its running state."""
+    embed_key, user = authenticate_embed_key(db, request, key=key, x_embed_key=x_embed_key)
+    conv = _find_conversation(db, user, payload.conversation_id)
+    state = load_conversation_state(db, conv.id if conv else None)
+    return ChatContext(embed_key=embed_key, user=user, conversation=conv, state=state)
+
+
+def persist_chat_turn(db: Session, ctx: ChatContext, payload: EmbedChatMessageRequest, result: AgentResult) -> ChatTurn:
+    """
+    Write one chat turn with a single commit, then save the conversation state.
+
+    The conversation touch, transcript and lead upsert share the transaction; the lead upsert
+    runs in a savepoint so a failure there never loses the chat. Audit rows go through the
+    buffered writer; with EMBED_CHAT_DEFER_TRANSCRIPT the transcript is returned for the
+    caller to write after responding.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    conv = _touch_conversation(db, ctx.user, ctx.embed_key, ctx.conversation, now)
+
+    lead, created = None, False
+    try:
+        with db.begin_nested():
+            lead, created = _upsert_chat_lead(db, payload.message, result.profile, ctx.state.lead_id)
+    except Exception:
+        # Don't break chat if lead creation fails.
+        lead, created = None, False
+    # Read ids before the commit expires them.
+    user_id, conversation_id, lead_id = ctx.user.id, conv.id, lead.id if lead else None
+    ctx.state.lead_id = lead_id or ctx.state.lead_id
+
+    transcript = _transcript_rows(conversation_id, payload, result, ctx.state.lead_id, now)
+    deferred = get_settings().EMBED_CHAT_DEFER_TRANSCRIPT
+    if not deferred:
+        db.execute(insert(EmbedMessage), transcript)
+    db.commit()
+
+    save_conversation_state(conversation_id, ctx.state)
+    if created:
+        audit_event(db, "embed_chat_lead_create", "lead", user_id=user_id, details=f"lead_id={lead_id}")
+    return ChatTurn(
+        conversation_id=conversation_id,
+        lead_id=lead_id,
+        result=result,
+        deferred_transcript=transcript if deferred else None,
+    )
+
+
+def run_chat_turn(
+    request: Request,
+    payload: EmbedChatMessageRequest,
+    key: str | None,
+    x_embed_key: str | None,
+) -> ChatTurn:
+    """One website chat turn: cached key auth, reply computed before any write, one commit."""
+    db = SessionLocal()
+    try:
+        ctx = open_chat_turn(db, request, payload, key, x_embed_key)
+        result = agent_team_reply(db, payload.message, ctx.state)
+        return persist_chat_turn(db, ctx, payload, result)
+    finally:
+        db.close()
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
@@ -0,0 +1,128 @@
+import base64
+import math
+import re
+import zlib
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.models.lead import Lead
+from app.models.property import Property
+from app.models.property_embedding import PropertyEmbedding
+
+# Hashed bag of unigrams + bigrams, signed feature hashing into EMBEDDING_DIM buckets.
+# Stored as little-endian float16: 512 bytes per vector.
+EMBEDDING_DIM = 256
+EMBEDDING_VERSION = "h256"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from i im in is it looking me my of on or please the to we with you".split()
+)
+
+
+def _features(text: str) -> list[str]:
+    tokens = [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def embed_text(text: str) -> np.ndarray:
+    """
+    L2-normalized term-frequency vector (log-scaled, hashed) of `text`.
+
+    IDF is not baked in: it depends on the corpus and is applied by the similarity index,
+    so stored embeddings never go stale when the corpus changes.
+    """
+    vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature, count in Counter(_features(text)).items():
+        h = zlib.crc32(feature.encode())
+        vec[h % EMBEDDING_DIM] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+def vector_to_bytes(vec: np.ndarray) -> bytes:
+    return vec.astype("<f2").tobytes()
+
+
+def vector_from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype="<f2").astype(np.float32)
+
+
+def encode_lead_embedding(vec: np.ndarray) -> str:
+    # Lead.embedding is a Text column: version prefix + base64 of the float16 bytes.
+    return f"{EMBEDDING_VERSION}:{base64.b64encode(vector_to_bytes(vec)).decode()}"
+
+
+def decode_lead_embedding(value: str | None) -> np.ndarray | None:
+    if not value or not value.startswith(f"{EMBEDDING_VERSION}:"):
+        return None
+    return vector_from_bytes(base64.b64decode(value.split(":", 1)[1]))
+
+
+def embed_lead(lead: Lead) -> None:
+    """Store the embedding of the lead's current raw_message; call whenever raw_message changes."""
+    lead.embedding = encode_lead_embedding(embed_text(lead.raw_message))
+
+
+def lead_vector(lead: Lead) -> np.ndarray:
+    vec = decode_lead_embedding(lead.embedding)
+    return vec if vec is not None else embed_text(lead.raw_message)
+
+
+def property_vector(title: str | None, description: str | None) -> np.ndarray:
+    return embed_text(f"{title or ''} {description or ''}")
+
+
+def embed_property(db: Session, prop: Property) -> None:
+    """Store (or replace) the embedding of a flushed property; call whenever its text changes."""
+    vector = vector_to_bytes(property_vector(prop.title, prop.description))
+    db.merge(PropertyEmbedding(property_id=prop.id, vector=vector, updated_at=datetime.utcnow()))
+
+
+def fill_missing_embeddings(db: Session, batch_size: int = 1000) -> tuple[int, int]:
+    """Embed leads and properties that have no (current-version) embedding yet; commits per batch."""
+    leads_done = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Lead.id, Lead.raw_message)
+            .filter(
+                Lead.id > last_id,
+                or_(Lead.embedding.is_(None), ~Lead.embedding.startswith(f"{EMBEDDING_VERSION}:")),
+            )
+            .order_by(Lead.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        db.execute(update(Lead), [{"id": lead_id, "embedding": encode_lead_embedding(embed_text(raw))} for lead_id, raw in rows])
+        db.commit()
+        leads_done += len(rows)
+
+    props_done = 0
+    while True:
+        rows = (
+            db.query(Property.id, Property.title, Property.description)
+            .outerjoin(PropertyEmbedding, PropertyEmbedding.property_id == Property.id)
+            .filter(PropertyEmbedding.property_id.is_(None))
+            .order_by(Property.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        now = datetime.utcnow()
+        db.add_all(
+            PropertyEmbedding(property_id=prop_id, vector=vector_to_bytes(property_vector(title, description)), updated_at=now)
+            for prop_id, title, description in rows
+        )
+        db.commit()
+        props_done += len(rows)
+
+    return leads_done, props_done
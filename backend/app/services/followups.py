@@ -0,0 +1,235 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import get_settings
+from app.models.lead import LeadChannel
+from app.services.messaging import dispatch_message
+
+logger = logging.getLogger(__name__)
+
+# Refill by elapsed time on the Redis clock, then take one token. Returns 0 when a token was
+# taken, the milliseconds to wait for one, or minus the milliseconds left on a pause.
+_ACQUIRE_LUA = """
+local paused = redis.call('PTTL', KEYS[2])
+if paused > 0 then return -paused end
+local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = math.ceil((1 - tokens) / rate * 1000) end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return wait
+"""
+# Extend the pause (never shorten it) and empty the bucket.
+_PAUSE_LUA = """
+if redis.call('PTTL', KEYS[2]) < tonumber(ARGV[1]) then
+  redis.call('SET', KEYS[2], 1, 'PX', ARGV[1])
+end
+redis.call('HSET', KEYS[1], 'tokens', '0')
+return 1
+"""
+
+
+@dataclass
+class Followup:
+    """One outgoing message as the sender sees it; the outcome fields are filled in by the send."""
+
+    id: int
+    channel: str
+    payload: dict[str, Any]
+    attempts: int = 0
+    status_code: int | None = None
+    error: str | None = None
+    latency_ms: float | None = None
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` sends per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Provider said slow down: stop handing out tokens and start empty afterwards."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def paused_for(self) -> float:
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def acquire(self) -> bool:
+        """Wait for a token; False if the bucket is paused (the caller should defer the send)."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    return False
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RedisTokenBucket:
+    """
+    TokenBucket whose tokens and pause live in Redis, so every relay process on every host
+    draws from one quota per channel and a 429 seen by one relay pauses them all.
+
+    If Redis cannot be reached the relay falls back to a process-local bucket at the same
+    rate rather than stopping, and tries Redis again after REDIS_RETRY_SECONDS; the quota is
+    per process in between.
+    """
+
+    REDIS_RETRY_SECONDS = 30.0
+
+    def __init__(self, client: Any, channel: str, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._client = client
+        self._keys = [f"followups:bucket:{channel}", f"followups:paused:{channel}"]
+        self._acquire = client.register_script(_ACQUIRE_LUA)
+        self._pause = client.register_script(_PAUSE_LUA)
+        self._local = TokenBucket(rate, capacity)
+        self._redis_down_until = 0.0
+
+    def _redis_down(self) -> bool:
+        return time.monotonic() < self._redis_down_until
+
+    def _fallback(self, exc: Exception) -> TokenBucket:
+        if not self._redis_down():
+            logger.warning("shared rate limit unavailable (%s); using a per-process bucket", exc)
+            self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+        return self._local
+
+    def pause(self, seconds: float) -> None:
+        self._local.pause(seconds)
+        if self._redis_down():
+            return
+        try:
+            self._pause(keys=self._keys, args=[max(1, math.ceil(seconds * 1000))])
+        except Exception as exc:
+            self._fallback(exc)
+
+    def paused_for(self) -> float:
+        if self._redis_down():
+            return self._local.paused_for()
+        try:
+            remaining = self._client.pttl(self._keys[1])
+        except Exception as exc:
+            return self._fallback(exc).paused_for()
+        return max(0.0, remaining / 1000, self._local.paused_for())
+
+    def acquire(self) -> bool:
+        while True:
+            if self._redis_down():
+                return self._local.acquire()
+            try:
+                wait_ms = int(self._acquire(keys=self._keys, args=[self.rate, self.capacity]))
+            except Exception as exc:
+                return self._fallback(exc).acquire()
+            if wait_ms < 0:
+                return False
+            if wait_ms == 0:
+                return True
+            time.sleep(wait_ms / 1000)
+
+
+_buckets: dict[str, TokenBucket | RedisTokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def channel_bucket(channel: str) -> TokenBucket | RedisTokenBucket:
+    """
+    Per-channel limiter sized by FOLLOWUP_RATE_LIMITS: shared by all relays in Redis, or one
+    per relay process with FOLLOWUP_RATE_LIMIT_STORE="memory".
+    """
+    bucket = _buckets.get(channel)
+    if bucket is None:
+        settings = get_settings()
+        rate = settings.FOLLOWUP_RATE_LIMITS.get(channel, settings.FOLLOWUP_DEFAULT_RATE)
+        with _buckets_lock:
+            bucket = _buckets.get(channel)
+            if bucket is None:
+                if settings.FOLLOWUP_RATE_LIMIT_STORE == "redis":
+                    import redis
+
+                    client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+                    bucket = RedisTokenBucket(client, channel, rate)
+                else:
+                    bucket = TokenBucket(rate)
+                _buckets[channel] = bucket
+    return bucket
+
+
+def send_followups(items: list[Followup], concurrency: int) -> dict[str, list[Followup]]:
+    """
+    Send one batch, grouped by channel, each send taking a token from its channel's bucket.
+
+    A provider still answering 429 after the HTTP client's own retries pauses that channel for
+    FOLLOWUP_THROTTLE_PAUSE_SECONDS; its remaining items are deferred unsent. Returns the
+    items by outcome: "sent", "retry" (requeue; 429, 5xx or no response), "deferred" (requeue,
+    not attempted) and "dropped" (final, e.g. 4xx or channel not configured); "throttled"
+    repeats the retries that were 429s.
+    """
+    settings = get_settings()
+    outcomes: dict[str, list[Followup]] = defaultdict(list)
+    lock = threading.Lock()
+
+    def send(item: Followup) -> None:
+        bucket = channel_bucket(item.channel)
+        if not bucket.acquire():
+            outcome = "deferred"
+        else:
+            item.attempts += 1
+            started = time.perf_counter()
+            try:
+                result = dispatch_message(LeadChannel(item.channel), item.payload)
+            except Exception as exc:
+                result = {"status": "error", "detail": str(exc)}
+            item.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            status, code = result.get("status"), result.get("code")
+            item.status_code = code
+            item.error = None if status == "sent" else str(result.get("detail") or result.get("response") or status)[:1000]
+            if status == "sent":
+                outcome = "sent"
+            elif status == "error" or (status == "failed" and (code == 429 or (code or 0) >= 500)):
+                outcome = "retry"
+                if code == 429:
+                    bucket.pause(settings.FOLLOWUP_THROTTLE_PAUSE_SECONDS)
+                    with lock:
+                        outcomes["throttled"].append(item)
+            else:
+                # Rejected (4xx), not configured or invalid: another attempt would fail the same way.
+                outcome = "dropped"
+        with lock:
+            outcomes[outcome].append(item)
+
+    by_channel: dict[str, list[Followup]] = defaultdict(list)
+    for item in items:
+        by_channel[item.channel].append(item)
+    # Channels interleave so a slow or throttled provider does not hold up the others.
+    groups = list(by_channel.values())
+    ordered = [g[i] for i in range(max(map(len, groups), default=0)) for g in groups if i < len(g)]
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        list(pool.map(send, ordered))
+    return outcomes
@@ -0,0 +1,188 @@
+import logging
+import os
+import re
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.property import Property
+
+logger = logging.getLogger(__name__)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_END = ""  # trie key holding the canonical name; never a token
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class LocationGazetteer:
+    """
+    Token trie of known place names.
+
+    `find` returns the leftmost-longest known name in a message: each start token walks the
+    trie at most as deep as the longest name, so a lookup is linear in the message length.
+    Aliases map to a canonical spelling; the first spelling seen for a name is kept.
+    """
+
+    def __init__(self) -> None:
+        self._root: dict = {}
+        self._lock = threading.Lock()
+        # Serializes refreshes, so concurrent ones never read the same rows twice.
+        self._refresh_lock = threading.Lock()
+        self.names = 0
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        # Highest Property.id folded in so far; refreshes only read newer rows.
+        self.last_property_id = 0
+
+    def add(self, name: str, canonical: str | None = None) -> bool:
+        """Add `name` (mapping to `canonical`, default the name itself); False if already known."""
+        tokens = _tokens(name)
+        if not tokens:
+            return False
+        with self._lock:
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            if _END in node:
+                return False
+            node[_END] = (canonical or name).strip()
+            self.names += 1
+            self.version += 1
+            return True
+
+    def find(self, text: str) -> str | None:
+        tokens = _tokens(text)
+        root = self._root
+        for start in range(len(tokens)):
+            node = root.get(tokens[start])
+            best = None
+            pos = start + 1
+            while node is not None:
+                best = node.get(_END, best)
+                node = node.get(tokens[pos]) if pos < len(tokens) else None
+                pos += 1
+            if best is not None:
+                self.hits += 1
+                return best
+        self.misses += 1
+        return None
+
+    def stats(self) -> dict[str, int]:
+        return {"names": self.names, "version": self.version, "hits": self.hits, "misses": self.misses}
+
+
+def _bundled_places() -> list[str]:
+    path = get_settings().LOCATION_PLACES_FILE
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+
+
+def refresh_gazetteer(db: Session, gazetteer: "LocationGazetteer | None" = None) -> int:
+    """Fold locations of properties created since the last refresh in; returns names added."""
+    gazetteer = gazetteer or get_gazetteer()
+    with gazetteer._refresh_lock:
+        rows = (
+            db.query(Property.id, Property.location)
+            .filter(Property.id > gazetteer.last_property_id)
+            .order_by(Property.id)
+            .all()
+        )
+        added = sum(gazetteer.add(location) for _, location in rows)
+        if rows:
+            gazetteer.last_property_id = rows[-1][0]
+    return added
+
+
+def seed_gazetteer(aliases: dict[str, tuple[str, ...]] | None = None) -> LocationGazetteer:
+    """Gazetteer of the bundled place list and vocabulary aliases only (no database)."""
+    gazetteer = LocationGazetteer()
+    for place in _bundled_places():
+        gazetteer.add(place)
+    for canonical, synonyms in (aliases or {}).items():
+        for name in (canonical, *synonyms):
+            gazetteer.add(name, canonical)
+    return gazetteer
+
+
+def build_gazetteer(db: Session, aliases: dict[str, tuple[str, ...]] | None = None) -> LocationGazetteer:
+    """Fresh gazetteer from the bundled place list, vocabulary aliases and every Property.location."""
+    gazetteer = seed_gazetteer(aliases)
+    refresh_gazetteer(db, gazetteer)
+    return gazetteer
+
+
+_gazetteer: LocationGazetteer | None = None
+_gazetteer_lock = threading.Lock()
+# Process whose refresher thread is running (threads do not survive a fork).
+_refresher_pid = 0
+
+
+def _refresh_loop() -> None:
+    interval = max(1.0, float(get_settings().LOCATION_GAZETTEER_REFRESH_SECONDS))
+    while True:
+        db = SessionLocal()
+        try:
+            refresh_gazetteer(db)
+        except Exception:
+            # Extraction keeps using the names it has; the next round catches up.
+            logger.exception("gazetteer refresh failed")
+        finally:
+            db.close()
+        time.sleep(interval)
+
+
+def _start_refresher() -> None:
+    global _refresher_pid
+    with _gazetteer_lock:
+        if _refresher_pid == os.getpid():
+            return
+        _refresher_pid = os.getpid()
+    threading.Thread(target=_refresh_loop, name="gazetteer-refresher", daemon=True).start()
+
+
+def load_gazetteer(db: Session) -> LocationGazetteer:
+    """(Re)build the process-wide gazetteer; run at startup."""
+    global _gazetteer
+    from app.services.nlp import get_extractor
+
+    gazetteer = build_gazetteer(db, get_extractor().vocabulary.location)
+    with _gazetteer_lock:
+        _gazetteer = gazetteer
+    _start_refresher()
+    return gazetteer
+
+
+def get_gazetteer() -> LocationGazetteer:
+    """
+    Process-wide gazetteer. Never reads the database, so entity extraction stays free of DB I/O.
+
+    A daemon thread folds in properties created by other processes every
+    LOCATION_GAZETTEER_REFRESH_SECONDS. Processes that skip API startup (workers) begin with
+    the bundled places and aliases, and the thread loads the property locations at once.
+    """
+    global _gazetteer
+    gazetteer = _gazetteer
+    if gazetteer is not None and _refresher_pid == os.getpid():
+        return gazetteer
+    if gazetteer is None:
+        from app.services.nlp import get_extractor
+
+        seed = seed_gazetteer(get_extractor().vocabulary.location)
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = seed
+            gazetteer = _gazetteer
+    _start_refresher()
+    return gazetteer
+
+
+def gazetteer_stats() -> dict[str, int]:
+    return _gazetteer.stats() if _gazetteer is not None else {"names": 0, "version": 0, "hits": 0, "misses": 0}
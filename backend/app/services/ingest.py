@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.lead import Lead, LeadChannel
+from app.services.assignment import assign_agents_bulk
+from app.services.embeddings import embed_text, encode_lead_embedding
+from app.services.lead_stats import record_lead_rows_created
+from app.services.nlp import extract_entities_batch, score_lead
+
+
+def lead_rows_from_messages(
+    channel: LeadChannel,
+    messages: list[dict[str, Any]],
+    default_name: str = "Lead",
+) -> list[dict[str, Any]]:
+    """Turn parsed inbound messages into `leads` rows (entity extraction + scoring, no DB access)."""
+    rows: list[dict[str, Any]] = []
+    extractions = extract_entities_batch([(msg.get("message") or "").strip() for msg in messages])
+    for msg, extraction in zip(messages, extractions):
+        rows.append(
+            {
+                "full_name": (msg.get("full_name") or default_name)[:120],
+                "email": msg.get("email"),
+                "phone": msg.get("phone"),
+                "channel": channel,
+                "raw_message": (msg.get("message") or "")[:4000],
+                "score": score_lead(extraction.intent, extraction.budget, extraction.timeline),
+                "property_type": extraction.property_type,
+                "location": extraction.location,
+                "budget": extraction.budget,
+                "timeline": extraction.timeline,
+            }
+        )
+    return rows
+
+
+def bulk_create_leads(db: Session, rows: list[dict[str, Any]]) -> list[int]:
+    """
+    Assign agents for the whole batch and insert every lead with one INSERT ... RETURNING.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    if not rows:
+        return []
+
+    now = datetime.utcnow()
+    for row, agent_id in zip(rows, assign_agents_bulk(db, len(rows))):
+        row["assigned_agent_id"] = agent_id
+        # Set explicitly so the daily rollup buckets match what is stored.
+        row.setdefault("created_at", now)
+        row.setdefault("embedding", encode_lead_embedding(embed_text(row["raw_message"])))
+    record_lead_rows_created(db, rows)
+
+    stmt = insert(Lead).returning(Lead.id, sort_by_parameter_order=True)
+    return [int(lead_id) for lead_id in db.scalars(stmt, rows).all()]
@@ -0,0 +1,107 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.integration import ChannelIntegration
+from app.models.lead import LeadChannel
+from app.services.meta import parse_integration_metadata
+
+
+@dataclass(frozen=True)
+class IntegrationConfig:
+    """Parsed, detached copy of one ChannelIntegration row."""
+
+    channel: LeadChannel
+    provider_name: str
+    webhook_url: str | None
+    api_key_ref: str | None
+    status: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_meta(self) -> bool:
+        return self.provider_name.lower() == "meta"
+
+    @classmethod
+    def from_row(cls, row: ChannelIntegration) -> "IntegrationConfig":
+        return cls(
+            channel=row.channel,
+            provider_name=row.provider_name,
+            webhook_url=row.webhook_url,
+            api_key_ref=row.api_key_ref,
+            status=row.status.value if row.status else "active",
+            metadata=parse_integration_metadata(row.metadata_json),
+        )
+
+
+class IntegrationRegistry:
+    """
+    Channel integration configs held in memory, one entry per channel.
+
+    The table holds a handful of rows that change rarely, so it is loaded whole. `invalidate`
+    bumps the version; a load that started before the bump is discarded rather than
+    installed, so a concurrent reader can never put the old config back.
+    """
+
+    def __init__(self) -> None:
+        self._configs: dict[LeadChannel, IntegrationConfig] | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.version = 0
+        self.loads = 0
+
+    def load(self, db: Session) -> dict[LeadChannel, IntegrationConfig]:
+        version = self.version
+        configs = {row.channel: IntegrationConfig.from_row(row) for row in db.query(ChannelIntegration).all()}
+        with self._lock:
+            self.loads += 1
+            if version == self.version:
+                self._configs, self._loaded_at = configs, time.monotonic()
+        return configs
+
+    def _current(self) -> dict[LeadChannel, IntegrationConfig]:
+        configs = self._configs
+        if configs is not None and time.monotonic() - self._loaded_at < get_settings().INTEGRATION_CONFIG_TTL_SECONDS:
+            return configs
+        db = SessionLocal()
+        try:
+            return self.load(db)
+        finally:
+            db.close()
+
+    def get(self, channel: LeadChannel) -> IntegrationConfig | None:
+        return self._current().get(channel)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._configs = None
+
+    def stats(self) -> dict[str, int]:
+        configs = self._configs
+        return {"channels": len(configs) if configs is not None else 0, "version": self.version, "loads": self.loads}
+
+
+_registry = IntegrationRegistry()
+
+
+def get_channel_config(channel: LeadChannel) -> IntegrationConfig | None:
+    """Config for `channel`; reads the database only on a cold start, invalidation or TTL expiry."""
+    return _registry.get(channel)
+
+
+def load_integration_configs(db: Session) -> None:
+    _registry.load(db)
+
+
+def invalidate_integration_configs() -> None:
+    _registry.invalidate()
+
+
+def integration_config_stats() -> dict[str, int]:
+    return _registry.stats()
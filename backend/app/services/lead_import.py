@@ -0,0 +1,206 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.lead import Lead, LeadChannel
+from app.models.lead_import import LeadImportJob, LeadImportStatus
+from app.schemas.lead import LeadCreate
+from app.services.audit import audit_event
+from app.services.ingest import bulk_create_leads
+from app.services.nlp import extract_entities, score_lead
+
+IMPORT_FIELDS = ("full_name", "email", "phone", "channel", "raw_message", "property_type", "location", "budget", "timeline")
+# Common CRM export headers mapped onto LeadCreate fields.
+FIELD_ALIASES = {"name": "full_name", "message": "raw_message", "notes": "raw_message"}
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str | None:
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in ctype:
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "ndjson"
+    return None
+
+
+def _iter_records(fh: io.BufferedIOBase, file_format: str) -> Iterator[dict[str, Any] | None]:
+    """Yield one record per input row without reading the file into memory (None = unparseable row)."""
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="" if file_format == "csv" else None)
+    if file_format == "csv":
+        for row in csv.DictReader(text):
+            yield row
+        return
+
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield item if isinstance(item, dict) else None
+
+
+def _normalize(record: dict[str, Any], default_channel: LeadChannel) -> LeadCreate:
+    data: dict[str, Any] = {}
+    for key, value in record.items():
+        field = FIELD_ALIASES.get((key or "").strip().lower(), (key or "").strip().lower())
+        if field not in IMPORT_FIELDS or field in data:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ("", None):
+            continue
+        data[field] = value
+    data.setdefault("channel", default_channel)
+    payload = LeadCreate.model_validate(data)
+    if payload.channel == LeadChannel.website:
+        payload.channel = LeadChannel.website_chat
+    return payload
+
+
+def _lead_row(payload: LeadCreate) -> dict[str, Any]:
+    # Mirrors create_lead: synthesize a message from structured fields when none is given.
+    raw = (payload.raw_message or "").strip()
+    if not raw:
+        parts = []
+        if payload.property_type:
+            parts.append(f"Property type: {payload.property_type}")
+        if payload.location:
+            parts.append(f"Location: {payload.location}")
+        if payload.budget is not None:
+            parts.append(f"Budget: {payload.budget}")
+        if payload.timeline:
+            parts.append(f"Timeline: {payload.timeline}")
+        raw = " | ".join(parts) if parts else "New lead"
+
+    extraction = extract_entities(raw)
+    return {
+        "full_name": payload.full_name[:120],
+        "email": payload.email,
+        "phone": payload.phone,
+        "channel": payload.channel,
+        "raw_message": raw,
+        "score": score_lead(extraction.intent, extraction.budget, extraction.timeline),
+        "property_type": payload.property_type or extraction.property_type,
+        "location": payload.location or extraction.location,
+        "budget": payload.budget or extraction.budget,
+        "timeline": payload.timeline or extraction.timeline,
+    }
+
+
+def _drop_duplicates(db: Session, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Drop rows whose email/phone already exists, using one query per chunk."""
+    emails = {r["email"] for r in rows if r["email"]}
+    phones = {r["phone"] for r in rows if r["phone"]}
+    conditions = []
+    if emails:
+        conditions.append(Lead.email.in_(emails))
+    if phones:
+        conditions.append(Lead.phone.in_(phones))
+
+    seen_emails: set[str] = set()
+    seen_phones: set[str] = set()
+    if conditions:
+        for email, phone in db.query(Lead.email, Lead.phone).filter(or_(*conditions)).all():
+            if email:
+                seen_emails.add(email)
+            if phone:
+                seen_phones.add(phone)
+
+    fresh: list[dict[str, Any]] = []
+    for row in rows:
+        if (row["email"] and row["email"] in seen_emails) or (row["phone"] and row["phone"] in seen_phones):
+            continue
+        # Also dedupe within the chunk; earlier chunks are already committed.
+        if row["email"]:
+            seen_emails.add(row["email"])
+        if row["phone"]:
+            seen_phones.add(row["phone"])
+        fresh.append(row)
+    return fresh
+
+
+def _flush_chunk(db: Session, job: LeadImportJob, rows: list[dict[str, Any]], processed: int, failed: int) -> None:
+    fresh = _drop_duplicates(db, rows)
+    created = bulk_create_leads(db, fresh)
+    job.rows_processed += processed
+    job.rows_created += len(created)
+    job.rows_duplicate += len(rows) - len(fresh)
+    job.rows_failed += failed
+    # Leads, workload counters and progress counters commit together, chunk by chunk.
+    db.commit()
+
+
+def discard_upload(path: str | None) -> None:
+    """Delete a spooled upload; a file that is already gone is fine."""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def run_lead_import(db: Session, job_id: int) -> LeadImportJob | None:
+    job = db.query(LeadImportJob).filter(LeadImportJob.id == job_id).first()
+    if not job or job.status in {LeadImportStatus.completed, LeadImportStatus.failed}:
+        return job
+
+    chunk_size = max(1, get_settings().LEAD_IMPORT_CHUNK_SIZE)
+    job.status = LeadImportStatus.running
+    job.started_at = datetime.utcnow()
+    db.commit()
+
+    try:
+        rows: list[dict[str, Any]] = []
+        processed = failed = 0
+        with open(job.file_path, "rb") as fh:
+            for record in _iter_records(fh, job.file_format):
+                processed += 1
+                try:
+                    if record is None:
+                        raise ValueError("unparseable row")
+                    rows.append(_lead_row(_normalize(record, job.default_channel)))
+                except (ValidationError, ValueError):
+                    failed += 1
+
+                if processed >= chunk_size:
+                    _flush_chunk(db, job, rows, processed, failed)
+                    rows, processed, failed = [], 0, 0
+
+        if processed:
+            _flush_chunk(db, job, rows, processed, failed)
+
+        job.status = LeadImportStatus.completed
+    except Exception as exc:
+        db.rollback()
+        job.status = LeadImportStatus.failed
+        job.error = f"{type(exc).__name__}: {exc}"[:2000]
+    finally:
+        job.finished_at = datetime.utcnow()
+        try:
+            db.commit()
+        finally:
+            # Removed whatever the outcome, so failed imports do not pile up in LEAD_IMPORT_DIR.
+            discard_upload(job.file_path)
+
+    audit_event(
+        db,
+        "lead_import_finish",
+        "lead",
+        user_id=job.user_id,
+        details=f"job_id={job.id};status={job.status.value};created={job.rows_created};duplicate={job.rows_duplicate};failed={job.rows_failed}",
+    )
+    return job
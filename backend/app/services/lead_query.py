@@ -0,0 +1,119 @@
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TypeVar
+
+from fastapi import Query as QueryParam
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.orm import Query, Session
+
+from app.models.lead import Lead, LeadChannel, LeadStatus
+from app.models.user import User, UserRole
+
+_Q = TypeVar("_Q", Query, Select)
+
+
+@dataclass
+class LeadFilters:
+    status: LeadStatus | None = None
+    channel: LeadChannel | None = None
+    min_score: float | None = None
+    max_score: float | None = None
+    assigned_agent_id: int | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
+def lead_filters(
+    status: LeadStatus | None = None,
+    channel: LeadChannel | None = None,
+    min_score: float | None = QueryParam(default=None, ge=0),
+    max_score: float | None = QueryParam(default=None, ge=0),
+    assigned_agent_id: int | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> LeadFilters:
+    # FastAPI dependency shared by the lead list, count and export endpoints.
+    return LeadFilters(
+        status=status,
+        channel=channel,
+        min_score=min_score,
+        max_score=max_score,
+        assigned_agent_id=assigned_agent_id,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
+
+def scoped_filters(filters: LeadFilters, current_user: User) -> LeadFilters:
+    # Agents only ever see their own leads, whatever they ask for.
+    if current_user.role == UserRole.agent:
+        filters.assigned_agent_id = current_user.id
+    return filters
+
+
+def apply_lead_filters(query: _Q, filters: LeadFilters) -> _Q:
+    # Each filter narrows to a prefix of one of the (<col>, created_at, id) indexes on `leads`.
+    if filters.status is not None:
+        query = query.filter(Lead.status == filters.status)
+    if filters.channel is not None:
+        query = query.filter(Lead.channel == filters.channel)
+    if filters.assigned_agent_id is not None:
+        query = query.filter(Lead.assigned_agent_id == filters.assigned_agent_id)
+    if filters.min_score is not None:
+        query = query.filter(Lead.score >= filters.min_score)
+    if filters.max_score is not None:
+        query = query.filter(Lead.score <= filters.max_score)
+    if filters.created_from is not None:
+        query = query.filter(Lead.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        query = query.filter(Lead.created_at < filters.created_to)
+    return query
+
+
+def encode_cursor(created_at: datetime, lead_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{lead_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, lead_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(lead_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def lead_page(
+    db: Session, filters: LeadFilters, limit: int | None, cursor: str | None = None
+) -> tuple[list[Lead], str | None]:
+    """
+    One page of leads, newest first, using keyset pagination on (created_at, id).
+
+    Returns the rows and the cursor for the next page (None on the last page). With no
+    `limit` every remaining row is returned.
+    """
+    query = apply_lead_filters(db.query(Lead), filters)
+    if cursor:
+        created_at, lead_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(Lead.created_at < created_at, and_(Lead.created_at == created_at, Lead.id < lead_id))
+        )
+
+    query = query.order_by(Lead.created_at.desc(), Lead.id.desc())
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def count_leads(db: Session, filters: LeadFilters) -> int:
+    # COUNT over the filtered id column only; no lead rows are loaded.
+    query = apply_lead_filters(db.query(Lead.id), filters)
+    return int(db.scalar(select(func.count()).select_from(query.subquery())) or 0)
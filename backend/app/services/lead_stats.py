@@ -0,0 +1,140 @@
+from datetime import date, datetime
+from typing import Any, Iterable
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.lead import Lead, LeadChannel, LeadStatus
+from app.models.lead_stats import LeadDailyStat
+
+# (day, channel, agent_id or 0, status) -> one lead_daily_stats row.
+StatKey = tuple[date, LeadChannel, int, LeadStatus]
+
+
+def _as_date(value: Any) -> date:
+    # func.date() yields a date on Postgres but an ISO string on SQLite.
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def stat_key(created_at: datetime, channel: LeadChannel, agent_id: int | None, status: LeadStatus | None) -> StatKey:
+    return (_as_date(created_at), LeadChannel(channel), int(agent_id or 0), LeadStatus(status or LeadStatus.new))
+
+
+def apply_stat_deltas(db: Session, deltas: dict[StatKey, tuple[int, float]]) -> None:
+    """Add (count, score) deltas to their buckets in the caller's transaction."""
+    for key, (count, score) in deltas.items():
+        if not count and not score:
+            continue
+        if _bump_bucket(db, key, count, score):
+            continue
+        try:
+            with db.begin_nested():
+                day, channel, agent_id, status = key
+                db.add(
+                    LeadDailyStat(
+                        day=day, channel=channel, agent_id=agent_id, status=status, lead_count=count, score_sum=score
+                    )
+                )
+        except IntegrityError:
+            # A concurrent writer created the bucket first; add to theirs.
+            _bump_bucket(db, key, count, score)
+
+
+def _bump_bucket(db: Session, key: StatKey, count: int, score: float) -> int:
+    day, channel, agent_id, status = key
+    return (
+        db.query(LeadDailyStat)
+        .filter(
+            LeadDailyStat.day == day,
+            LeadDailyStat.channel == channel,
+            LeadDailyStat.agent_id == agent_id,
+            LeadDailyStat.status == status,
+        )
+        .update(
+            {
+                LeadDailyStat.lead_count: LeadDailyStat.lead_count + count,
+                LeadDailyStat.score_sum: LeadDailyStat.score_sum + score,
+            },
+            synchronize_session=False,
+        )
+    )
+
+
+def _add(deltas: dict[StatKey, tuple[int, float]], key: StatKey, count: int, score: float) -> None:
+    old_count, old_score = deltas.get(key, (0, 0.0))
+    deltas[key] = (old_count + count, old_score + score)
+
+
+def record_leads_created(db: Session, leads: Iterable[Lead]) -> None:
+    """Count freshly flushed Lead objects (created_at/status defaults must be populated)."""
+    deltas: dict[StatKey, tuple[int, float]] = {}
+    for lead in leads:
+        _add(deltas, stat_key(lead.created_at, lead.channel, lead.assigned_agent_id, lead.status), 1, float(lead.score or 0.0))
+    apply_stat_deltas(db, deltas)
+
+
+def record_lead_rows_created(db: Session, rows: Iterable[dict[str, Any]]) -> None:
+    """Same as record_leads_created, for row dicts passed to a bulk INSERT."""
+    deltas: dict[StatKey, tuple[int, float]] = {}
+    for row in rows:
+        key = stat_key(row["created_at"], row["channel"], row.get("assigned_agent_id"), row.get("status"))
+        _add(deltas, key, 1, float(row.get("score") or 0.0))
+    apply_stat_deltas(db, deltas)
+
+
+def track_lead_stats_change(
+    db: Session,
+    lead: Lead,
+    old_agent_id: int | None,
+    old_status: LeadStatus | None,
+    old_score: float,
+) -> None:
+    """Move a lead between buckets after a status, agent or score change."""
+    old_key = stat_key(lead.created_at, lead.channel, old_agent_id, old_status)
+    new_key = stat_key(lead.created_at, lead.channel, lead.assigned_agent_id, lead.status)
+    new_score = float(lead.score or 0.0)
+    if old_key == new_key and new_score == float(old_score or 0.0):
+        return
+    deltas: dict[StatKey, tuple[int, float]] = {}
+    _add(deltas, old_key, -1, -float(old_score or 0.0))
+    _add(deltas, new_key, 1, new_score)
+    apply_stat_deltas(db, deltas)
+
+
+def rebuild_lead_daily_stats(db: Session) -> int:
+    """Backfill: recompute every bucket from `leads` in one pass. Returns the bucket count."""
+    day_col = func.date(Lead.created_at)
+    agent_col = func.coalesce(Lead.assigned_agent_id, 0)
+    rows = (
+        db.query(day_col, Lead.channel, agent_col, Lead.status, func.count(Lead.id), func.sum(Lead.score))
+        .group_by(day_col, Lead.channel, agent_col, Lead.status)
+        .all()
+    )
+
+    db.query(LeadDailyStat).delete(synchronize_session=False)
+    buckets = [
+        {
+            "day": _as_date(day),
+            "channel": channel,
+            "agent_id": int(agent_id or 0),
+            "status": status,
+            "lead_count": int(count),
+            "score_sum": float(score or 0.0),
+        }
+        for day, channel, agent_id, status, count, score in rows
+    ]
+    if buckets:
+        db.execute(insert(LeadDailyStat), buckets)
+    db.commit()
+    return len(buckets)
+
+
+def ensure_lead_daily_stats(db: Session) -> None:
+    # First start after the rollup was introduced: backfill from existing leads.
+    if db.query(LeadDailyStat.id).first() is None and db.query(Lead.id).first() is not None:
+        rebuild_lead_daily_stats(db)
@@ -1,29 +1,22 @@
 import json
 from typing import Any
 
-import requests
-from sqlalchemy.orm import Session
-
-from app.models.integration import ChannelIntegration
+from app.core.http_client import get_http_client
 from app.models.lead import LeadChannel
-from app.services.meta import parse_integration_metadata, send_meta_message
-
+from app.services.integration_registry import get_channel_config
+from app.services.meta import send_meta_message
 
-def get_integration(db: Session, channel: LeadChannel) -> ChannelIntegration | None:
-    return db.query(ChannelIntegration).filter(ChannelIntegration.channel == channel).first()
 
-
-def dispatch_message(db: Session, channel: LeadChannel, payload: dict[str, Any]) -> dict[str, Any]:
-    integration = get_integration(db, channel)
+def dispatch_message(channel: LeadChannel, payload: dict[str, Any]) -> dict[str, Any]:
+    # Config comes from the in-memory registry: sending needs no database access.
+    integration = get_channel_config(channel)
     if not integration:
         return {"status": "not_configured", "channel": channel.value}
 
-    metadata = parse_integration_metadata(integration.metadata_json)
-
-    if integration.provider_name.lower() == "meta":
+    if integration.is_meta:
         if not integration.api_key_ref:
             return {"status": "not_configured", "detail": "Meta access token missing in api_key_ref"}
-        return send_meta_message(channel.value, integration.api_key_ref, metadata, payload)
+        return send_meta_message(channel.value, integration.api_key_ref, integration.metadata, payload)
 
     if not integration.webhook_url:
         return {"status": "not_configured", "channel": channel.value}
@@ -33,7 +26,9 @@ def dispatch_message(db: Session, channel: LeadChannel, payload: dict[str, Any])
         headers["Authorization"] = f"Bearer {integration.api_key_ref}"
 
     try:
-        response = requests.post(integration.webhook_url, data=json.dumps(payload), headers=headers, timeout=15)
+        response = get_http_client().post(
+            integration.webhook_url, integration="webhook", data=json.dumps(payload), headers=headers, timeout=15
+        )
         return {
             "status": "sent" if response.ok else "failed",
             "code": response.status_code,
@@ -3,10 +3,8 @@ import hmac
 import json
 from typing import Any
 
-import requests
-
-
-META_API_BASE = "https://graph.facebook.com"
+from app.core.config import get_settings
+from app.core.http_client import get_http_client
 
 
 def verify_meta_signature(app_secret: str, raw_body: bytes, signature_header: str | None) -> bool:
@@ -80,6 +78,7 @@ def send_meta_message(channel: str, access_token: str, metadata: dict[str, Any],
     if not recipient or not content:
         return {"status": "invalid_payload", "detail": "payload.to and payload.content are required"}
 
+    base = get_settings().META_API_BASE
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
@@ -90,14 +89,14 @@ def send_meta_message(channel: str, access_token: str, metadata: dict[str, Any],
         if not phone_number_id:
             return {"status": "not_configured", "detail": "metadata.whatsapp_phone_number_id missing"}
 
-        url = f"{META_API_BASE}/{version}/{phone_number_id}/messages"
+        url = f"{base}/{version}/{phone_number_id}/messages"
         body = {
             "messaging_product": "whatsapp",
             "to": recipient,
             "type": "text",
             "text": {"body": content},
         }
-        response = requests.post(url, headers=headers, json=body, timeout=20)
+        response = get_http_client().post(url, integration="meta", headers=headers, json=body, timeout=20)
         return {
             "status": "sent" if response.ok else "failed",
             "code": response.status_code,
@@ -107,12 +106,12 @@ def send_meta_message(channel: str, access_token: str, metadata: dict[str, Any],
     if channel in {"facebook", "instagram"}:
         # Messenger endpoint for Page and IG messaging via Graph.
         # Depending on Meta app mode and channel setup, page/IG IDs and permissions must match.
-        endpoint = f"{META_API_BASE}/{version}/me/messages"
+        endpoint = f"{base}/{version}/me/messages"
         body = {
             "recipient": {"id": recipient},
             "message": {"text": content},
         }
-        response = requests.post(endpoint, headers=headers, json=body, timeout=20)
+        response = get_http_client().post(endpoint, integration="meta", headers=headers, json=body, timeout=20)
         return {
             "status": "sent" if response.ok else "failed",
             "code": response.status_code,
@@ -1,8 +1,14 @@
+import json
 import re
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.services.gazetteer import get_gazetteer
 
-@dataclass
+
+@dataclass(frozen=True)
 class ExtractionResult:
     property_type: str | None
     location: str | None
@@ -11,41 +17,242 @@ class ExtractionResult:
     intent: str
 
 
-BUDGET_RE = re.compile(r"\$?([0-9]{2,3}(?:[,.][0-9]{3})+|[0-9]{5,8})")
+# Slots a vocabulary term can fill. Intent terms map to "serious" / "inquiring".
+SLOTS = ("property_type", "location", "timeline", "intent")
+# Locations are resolved by the gazetteer; vocabulary locations only seed it with aliases.
+_REGEX_SLOTS = ("property_type", "timeline", "intent")
+
+
+@dataclass(frozen=True)
+class Vocabulary:
+    """
+    Extraction vocabulary: per slot, canonical value -> extra surface forms (synonyms).
+
+    The canonical value always matches itself. Terms may span several words; a trailing
+    plural "s"/"es" is accepted for every term. Location entries are place-name aliases
+    for the gazetteer.
+    """
+
+    property_type: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    location: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    timeline: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    intent: dict[str, tuple[str, ...]] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Vocabulary":
+        return cls(
+            **{
+                slot: {str(k).lower(): tuple(str(s).lower() for s in v or ()) for k, v in (data.get(slot) or {}).items()}
+                for slot in SLOTS
+            }
+        )
+
+    def merged(self, other: "Vocabulary") -> "Vocabulary":
+        """This vocabulary with `other`'s entries added (synonym lists are concatenated)."""
+        out = {}
+        for slot in SLOTS:
+            entries = dict(getattr(self, slot))
+            for canonical, synonyms in getattr(other, slot).items():
+                entries[canonical] = entries.get(canonical, ()) + synonyms
+            out[slot] = entries
+        return Vocabulary(**out)
+
+    def terms(self) -> dict[str, list[tuple[str, str]]]:
+        """Normalized surface form -> [(slot, canonical value)] for the regex-matched slots."""
+        out: dict[str, list[tuple[str, str]]] = {}
+        for slot in _REGEX_SLOTS:
+            for canonical, synonyms in getattr(self, slot).items():
+                for term in (canonical, *synonyms):
+                    key = _normalize(term)
+                    if key and (slot, canonical) not in out.setdefault(key, []):
+                        out[key].append((slot, canonical))
+        return out
+
+
+DEFAULT_VOCABULARY = Vocabulary(
+    property_type={
+        "apartment": ("flat", "apt", "studio", "penthouse", "duplex"),
+        "villa": ("twin house", "twinhouse"),
+        "house": ("townhouse", "town house", "bungalow", "cottage"),
+        "condo": ("condominium",),
+        "office": ("office space", "workspace", "commercial space"),
+    },
+    timeline={
+        "immediately": ("asap", "right away", "right now", "urgent", "urgently"),
+        "this month": ("within a month", "within this month"),
+        "next month": (),
+        "3 months": ("three months", "3 month"),
+        "6 months": ("six months", "6 month", "half a year"),
+    },
+    intent={
+        "serious": (
+            "book", "booked", "booking", "visit", "visiting", "viewing", "schedule", "ready", "buy", "buying",
+            "purchase", "rent now", "move in",
+        ),
+        "inquiring": ("price", "pricing", "cost", "details", "info", "information", "inquire", "enquire"),
+    },
+)
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _trie_pattern(terms: list[str]) -> str:
+    """
+    Regex alternation factored as a prefix trie.
+
+    At every node the engine tests one character class instead of every remaining term, so
+    matching cost depends on term length rather than vocabulary size. A term that is also
+    a prefix of longer terms makes its continuation optional and greedy, so the longest
+    term wins ("office space" over "office").
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return render(trie)
+
+
+class EntityExtractor:
+    """
+    Single-pass extractor compiled from a Vocabulary.
+
+    Every term and the budget pattern are combined into one regex; one `finditer` over the
+    normalized message fills property type, timeline, intent and budget. The first mention
+    wins for each slot, except intent, where any "serious" term outranks "inquiring".
+    Locations come from the gazetteer.
+    """
+
+    def __init__(self, vocabulary: Vocabulary, version: int = 0) -> None:
+        self.vocabulary = vocabulary
+        self.version = version
+        self._terms = vocabulary.terms()
+        trie = _trie_pattern(list(self._terms))
+        budget = r"\$?(?P<budget>[0-9]{2,3}(?:[,.][0-9]{3})+|[0-9]{5,8})"
+        term = rf"(?P<term>{trie})(?:e?s)?(?![a-z0-9])|" if self._terms else ""
+        # Anchoring both alternatives behind one word-start test lets most positions fail fast.
+        self._pattern = re.compile(rf"(?<![a-z0-9])(?:{term}{budget})")
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def _result(self, text: str, matches: list[re.Match]) -> ExtractionResult:
+        found: dict[str, str] = {}
+        budget = None
+        serious = inquiring = False
+        for match in matches:
+            if match.lastgroup == "budget":
+                if budget is None:
+                    budget = float(match.group("budget").replace(",", "").replace(".", ""))
+                continue
+            for slot, canonical in self._terms[match.group("term")]:
+                if slot == "intent":
+                    serious = serious or canonical == "serious"
+                    inquiring = inquiring or canonical == "inquiring"
+                else:
+                    found.setdefault(slot, canonical)
+
+        location = get_gazetteer().find(text)
+        intent = "serious" if serious else "inquiring" if inquiring else "browsing"
+        return ExtractionResult(found.get("property_type"), location, budget, found.get("timeline"), intent)
+
+    def extract(self, message: str) -> ExtractionResult:
+        return self.extract_normalized(_normalize(message))
+
+    def extract_normalized(self, text: str) -> ExtractionResult:
+        return self._result(text, list(self._pattern.finditer(text)))
+
+    def extract_batch(self, messages: list[str]) -> list[ExtractionResult]:
+        return list(map(self.extract_normalized, map(_normalize, messages)))
+
+
+def load_vocabulary(path: str) -> Vocabulary:
+    """Read a JSON vocabulary file ({slot: {canonical: [synonym, ...]}})."""
+    with open(path, encoding="utf-8") as fh:
+        return Vocabulary.from_dict(json.load(fh))
+
+
+_extractor: EntityExtractor | None = None
+_extractor_lock = threading.Lock()
+_vocabulary_version = 0
+
+# Results are shared between callers (ExtractionResult is frozen). Keys carry the vocabulary
+# and gazetteer versions, so a vocabulary or place-name change never serves a stale result.
+_settings = get_settings()
+extraction_cache = TTLCache(_settings.EXTRACTION_CACHE_TTL_SECONDS, _settings.EXTRACTION_CACHE_MAX_ENTRIES)
+# Longer messages are effectively unique; caching them would only churn the LRU.
+MAX_CACHED_MESSAGE_CHARS = 500
+
+
+def get_extractor() -> EntityExtractor:
+    """Process-wide extractor: DEFAULT_VOCABULARY plus NLP_VOCABULARY_FILE, compiled once."""
+    global _extractor
+    extractor = _extractor
+    if extractor is not None:
+        return extractor
+    with _extractor_lock:
+        if _extractor is None:
+            vocabulary = DEFAULT_VOCABULARY
+            path = get_settings().NLP_VOCABULARY_FILE
+            if path:
+                vocabulary = vocabulary.merged(load_vocabulary(path))
+            _extractor = EntityExtractor(vocabulary, _vocabulary_version)
+        return _extractor
+
+
+def set_vocabulary(vocabulary: Vocabulary) -> EntityExtractor:
+    """Recompile with a new vocabulary; the version bump lets dependent caches detect it."""
+    global _extractor, _vocabulary_version
+    with _extractor_lock:
+        _vocabulary_version += 1
+        _extractor = EntityExtractor(vocabulary, _vocabulary_version)
+    extraction_cache.clear()
+    gazetteer = get_gazetteer()
+    for canonical, synonyms in vocabulary.location.items():
+        for name in (canonical, *synonyms):
+            gazetteer.add(name, canonical)
+    return _extractor
 
 
 def extract_entities(message: str) -> ExtractionResult:
-    text = message.lower()
-
-    property_type = None
-    for candidate in ["apartment", "villa", "house", "condo", "office"]:
-        if candidate in text:
-            property_type = candidate
-            break
-
-    location = None
-    if " in " in text:
-        after_in = text.split(" in ", 1)[1].strip()
-        location = after_in.split(" ")[0].strip(",.") if after_in else None
-
-    budget = None
-    match = BUDGET_RE.search(message)
-    if match:
-        budget = float(match.group(1).replace(",", "").replace(".", ""))
-
-    timeline = None
-    for t in ["immediately", "this month", "next month", "3 months", "6 months"]:
-        if t in text:
-            timeline = t
-            break
-
-    intent = "browsing"
-    if any(k in text for k in ["book", "visit", "schedule", "ready", "buy", "rent now"]):
-        intent = "serious"
-    elif any(k in text for k in ["price", "details", "info", "inquire"]):
-        intent = "inquiring"
-
-    return ExtractionResult(property_type, location, budget, timeline, intent)
+    (result,) = extract_entities_batch([message])
+    return result
+
+
+def extract_entities_batch(messages: list[str]) -> list[ExtractionResult]:
+    extractor = get_extractor()
+    version = (extractor.version, get_gazetteer().version)
+    results = []
+    for text in map(_normalize, messages):
+        if len(text) > MAX_CACHED_MESSAGE_CHARS:
+            results.append(extractor.extract_normalized(text))
+            continue
+        key = (version, text)
+        result = extraction_cache.get(key)
+        if result is None:
+            result = extractor.extract_normalized(text)
+            extraction_cache.set(key, result)
+        results.append(result)
+    return results
+
+
+def extraction_cache_stats() -> dict[str, float]:
+    stats = extraction_cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    return {**stats, "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0}
 
 
 def score_lead(intent: str, budget: float | None, timeline: str | None) -> float:
@@ -0,0 +1,288 @@
+import json
+import logging
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.lead import Lead, LeadChannel
+from app.models.outbox import MessageOutbox, OutboxStatus
+from app.services.followups import Followup, channel_bucket, send_followups
+
+logger = logging.getLogger(__name__)
+
+RELAY_SCHEDULED_KEY = "outbox:relay_scheduled"
+# Redis lists of the follow-up queue that the outbox replaced; only read to adopt leftovers.
+LEGACY_FOLLOWUP_KEYS = ("followups:inflight", "followups:pending")
+
+
+def enqueue_message(
+    db: Session,
+    channel: LeadChannel,
+    payload: dict[str, Any],
+    lead_id: int | None = None,
+    dedupe_key: str | None = None,
+) -> bool:
+    """
+    Add an outgoing message to the caller's transaction (no commit). With a `dedupe_key` that
+    is already queued or sent this is a no-op; returns whether a row was added.
+    """
+    row = MessageOutbox(channel=channel, lead_id=lead_id, payload_json=json.dumps(payload), dedupe_key=dedupe_key)
+    try:
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        return False
+    return True
+
+
+def enqueue_lead_followup(db: Session, lead: Lead, content: str) -> bool:
+    payload = {
+        "lead_id": lead.id,
+        "to": lead.phone or lead.email,
+        "content": content,
+        "name": lead.full_name,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    return enqueue_message(db, lead.channel, payload, lead_id=lead.id, dedupe_key=f"lead_followup:{lead.id}")
+
+
+def adopt_legacy_followups(db: Session, batch_size: int = 200) -> int:
+    """
+    Move follow-ups still on the pre-outbox Redis queue into the outbox. Each batch is
+    committed before it leaves Redis, and the dedupe key keeps a lead to one follow-up.
+    """
+    import redis
+
+    client = redis.Redis.from_url(get_settings().REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+    adopted = 0
+    for key in LEGACY_FOLLOWUP_KEYS:
+        while raw_items := client.lrange(key, 0, batch_size - 1):
+            for raw in raw_items:
+                item = json.loads(raw)
+                payload = {name: item.get(name) for name in ("lead_id", "to", "content", "name", "timestamp")}
+                adopted += enqueue_message(
+                    db,
+                    LeadChannel(item["channel"]),
+                    payload,
+                    lead_id=item.get("lead_id"),
+                    dedupe_key=f"lead_followup:{item['lead_id']}",
+                )
+            db.commit()
+            client.ltrim(key, len(raw_items), -1)
+    return adopted
+
+
+def kick_outbox_relay() -> None:
+    """
+    Ask a worker to relay now rather than at the next periodic run; at most once per
+    OUTBOX_RELAY_INTERVAL_SECONDS. Best effort: the rows are already committed.
+    """
+    settings = get_settings()
+    try:
+        import redis
+
+        client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2)
+        if not client.set(RELAY_SCHEDULED_KEY, 1, nx=True, ex=settings.OUTBOX_RELAY_INTERVAL_SECONDS):
+            return
+        # Local import avoids circular imports (tasks import services).
+        from app.workers.tasks import relay_outbox_messages
+
+        relay_outbox_messages.delay()
+    except Exception as exc:
+        logger.warning("outbox relay kick failed (%s); the periodic relay will pick the rows up", exc)
+
+
+def release_expired_claims(db: Session) -> int:
+    """Rows held by a relay that died mid-send become due again once the lease runs out."""
+    cutoff = datetime.utcnow() - timedelta(seconds=get_settings().OUTBOX_CLAIM_LEASE_SECONDS)
+    result = db.execute(
+        update(MessageOutbox)
+        .where(MessageOutbox.status == OutboxStatus.sending, MessageOutbox.claimed_at < cutoff)
+        .values(status=OutboxStatus.pending, claimed_by=None, claimed_at=None)
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+def claim_outbox_batch(db: Session, claim_token: str, size: int) -> list[Followup]:
+    """
+    Claim up to `size` due rows for this relay and commit, so the sends happen outside any
+    transaction.
+
+    On Postgres, FOR UPDATE SKIP LOCKED lets concurrent relays take disjoint batches without
+    waiting on each other. The UPDATE re-checks the status, so even where SKIP LOCKED is
+    unavailable (SQLite) a row is only ever claimed once.
+    """
+    now = datetime.utcnow()
+    ids = [
+        row_id
+        for (row_id,) in db.query(MessageOutbox.id)
+        .filter(MessageOutbox.status == OutboxStatus.pending, MessageOutbox.next_attempt_at <= now)
+        .order_by(MessageOutbox.next_attempt_at, MessageOutbox.id)
+        .limit(size)
+        .with_for_update(skip_locked=True)
+        .all()
+    ]
+    if not ids:
+        db.commit()
+        return []
+    db.execute(
+        update(MessageOutbox)
+        .where(MessageOutbox.id.in_(ids), MessageOutbox.status == OutboxStatus.pending)
+        .values(status=OutboxStatus.sending, claimed_by=claim_token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    rows = (
+        db.query(MessageOutbox.id, MessageOutbox.channel, MessageOutbox.payload_json, MessageOutbox.attempts)
+        .filter(MessageOutbox.claimed_by == claim_token, MessageOutbox.status == OutboxStatus.sending)
+        .all()
+    )
+    db.commit()
+    return [
+        Followup(id=row_id, channel=channel.value, payload=json.loads(payload_json), attempts=attempts)
+        for row_id, channel, payload_json, attempts in rows
+    ]
+
+
+def _retry_delay(attempts: int) -> float:
+    settings = get_settings()
+    ceiling = min(settings.OUTBOX_RETRY_BACKOFF_MAX_SECONDS, settings.OUTBOX_RETRY_BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def settle_outbox_batch(db: Session, claim_token: str, outcomes: dict[str, list[Followup]]) -> dict[str, int]:
+    """
+    Record every claimed row's outcome with bulk UPDATEs and release the claims.
+
+    Rows are matched by id and `claim_token`: a row whose lease expired and that another relay
+    has claimed since is left to that relay.
+    """
+    settings = get_settings()
+    now = datetime.utcnow()
+    updates: list[dict[str, Any]] = []
+    counts = {"sent": 0, "retried": 0, "deferred": 0, "dropped": 0, "dead": 0}
+    pauses: dict[str, float] = {}
+
+    def paused_for(channel: str) -> float:
+        if channel not in pauses:
+            pauses[channel] = channel_bucket(channel).paused_for()
+        return pauses[channel]
+
+    def result(item: Followup, status: OutboxStatus, **extra: Any) -> dict[str, Any]:
+        return {
+            "id": item.id,
+            "status": status,
+            "attempts": item.attempts,
+            "last_status_code": item.status_code,
+            "last_error": item.error,
+            "latency_ms": item.latency_ms,
+            "claimed_by": None,
+            "claimed_at": None,
+            **extra,
+        }
+
+    for item in outcomes.get("sent", []):
+        updates.append(result(item, OutboxStatus.sent, sent_at=now))
+        counts["sent"] += 1
+    for item in outcomes.get("dropped", []):
+        updates.append(result(item, OutboxStatus.failed))
+        counts["dropped"] += 1
+    for item in outcomes.get("retry", []):
+        if item.attempts >= settings.FOLLOWUP_MAX_ATTEMPTS:
+            updates.append(result(item, OutboxStatus.dead))
+            counts["dead"] += 1
+            continue
+        delay = max(_retry_delay(item.attempts), paused_for(item.channel))
+        updates.append(result(item, OutboxStatus.pending, next_attempt_at=now + timedelta(seconds=delay)))
+        counts["retried"] += 1
+    for item in outcomes.get("deferred", []):
+        # Never attempted: the channel is paused after a 429, so wait out the pause.
+        resume = now + timedelta(seconds=paused_for(item.channel))
+        updates.append(
+            {"id": item.id, "status": OutboxStatus.pending, "next_attempt_at": resume, "claimed_by": None, "claimed_at": None}
+        )
+        counts["deferred"] += 1
+
+    # Rows of different shapes go in separate executemany batches. Bound names are prefixed
+    # because SQLAlchemy reserves the column names for the SET clause.
+    table = MessageOutbox.__table__
+    for keys in {tuple(sorted(u)) for u in updates}:
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.claimed_by == bindparam("b_claim"))
+            .values({key: bindparam(f"b_{key}") for key in keys if key != "id"})
+        )
+        params = [
+            {"b_claim": claim_token, **{f"b_{key}": value for key, value in u.items()}}
+            for u in updates
+            if tuple(sorted(u)) == keys
+        ]
+        db.execute(stmt, params)
+    db.commit()
+    return counts
+
+
+def relay_outbox(max_seconds: float | None = None) -> dict[str, Any]:
+    """
+    Send due outbox rows in batches until none are due or `max_seconds` have passed.
+
+    Any number of relays may run at once: claims are disjoint, so overlapping runs never
+    double send, and all of them share the per-channel token buckets in Redis, so
+    FOLLOWUP_RATE_LIMITS stays a global rate however many overlap. A relay that dies mid-batch leaves its rows in
+    "sending" until OUTBOX_CLAIM_LEASE_SECONDS pass; they are then sent again (at-least-once).
+    """
+    settings = get_settings()
+    max_seconds = settings.OUTBOX_RELAY_MAX_SECONDS if max_seconds is None else max_seconds
+    relay_id = f"{socket.gethostname()}:{os.getpid()}"
+    totals = {"sent": 0, "retried": 0, "deferred": 0, "dropped": 0, "dead": 0, "batches": 0}
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        totals["released"] = release_expired_claims(db)
+        while time.monotonic() - started < max_seconds:
+            claim_token = f"{relay_id}:{time.time_ns()}"
+            batch = claim_outbox_batch(db, claim_token, settings.FOLLOWUP_BATCH_SIZE)
+            if not batch:
+                break
+            counts = settle_outbox_batch(db, claim_token, send_followups(batch, settings.FOLLOWUP_SEND_CONCURRENCY))
+            totals["batches"] += 1
+            for name, value in counts.items():
+                totals[name] += value
+    finally:
+        db.close()
+    elapsed = time.monotonic() - started
+    return {
+        **totals,
+        "seconds": round(elapsed, 3),
+        "sent_per_second": round(totals["sent"] / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def outbox_stats(db: Session) -> dict[str, Any]:
+    """Queue depth by status, oldest due row and mean send latency over the last hour."""
+    by_status = dict(db.query(MessageOutbox.status, func.count(MessageOutbox.id)).group_by(MessageOutbox.status).all())
+    oldest_due = (
+        db.query(func.min(MessageOutbox.next_attempt_at))
+        .filter(MessageOutbox.status == OutboxStatus.pending, MessageOutbox.next_attempt_at <= datetime.utcnow())
+        .scalar()
+    )
+    latency = (
+        db.query(func.avg(MessageOutbox.latency_ms), func.count(MessageOutbox.id))
+        .filter(MessageOutbox.status == OutboxStatus.sent, MessageOutbox.sent_at >= datetime.utcnow() - timedelta(hours=1))
+        .one()
+    )
+    return {
+        "by_status": {status.value: by_status.get(status, 0) for status in OutboxStatus},
+        "oldest_due_seconds": round((datetime.utcnow() - oldest_due).total_seconds(), 1) if oldest_due else 0.0,
+        "sent_last_hour": latency[1],
+        "avg_latency_ms_last_hour": round(float(latency[0]), 2) if latency[0] is not None else None,
+    }
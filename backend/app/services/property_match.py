@@ -0,0 +1,303 @@
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.property import Property
+
+# Smaller snapshots are scored in one full pass; cell pruning only pays off past this size.
+PRUNE_MIN_LISTINGS = 5000
+# Past this share of all listings, scoring everything beats gathering the surviving cells.
+DENSE_SCAN_FRACTION = 0.5
+# Cap on (queries x listings) scored in one vectorized pass when ranking a batch.
+MAX_BATCH_CELLS = 4_000_000
+
+@dataclass(frozen=True)
+class MatchWeights:
+    """Score credits for one recommendation surface (all listings are scored the same way)."""
+
+    property_type: float
+    location: float
+    within_budget: float
+    # Credit for over-budget listings; decays linearly to 0 at twice the budget.
+    over_budget: float
+    no_budget: float
+
+
+# Lead detail page (GET /leads/{id}/recommendations).
+LEAD_WEIGHTS = MatchWeights(property_type=45, location=30, within_budget=25, over_budget=20, no_budget=10)
+# Website chat assistant.
+CHAT_WEIGHTS = MatchWeights(property_type=40, location=35, within_budget=25, over_budget=15, no_budget=8)
+
+
+def _ranked(scores: np.ndarray, decimals: int | None) -> np.ndarray:
+    # The value results are ranked on: capped at 100, optionally rounded. Monotonic, so it
+    # preserves the cell bounds.
+    ranked = np.minimum(scores, 100.0)
+    return np.round(ranked, decimals) if decimals is not None else ranked
+
+
+@dataclass(frozen=True)
+class MatchQuery:
+    property_type: str | None = None
+    location: str | None = None
+    budget: float | None = None
+
+
+class ListingSnapshot:
+    """
+    Column arrays of every available listing, sorted by id.
+
+    Property types and locations are stored as integer codes into per-snapshot vocabularies,
+    so a query compares integers instead of strings: the type test is one array compare and
+    the location (substring) test runs once per distinct location, then is broadcast by code.
+
+    Listings are also grouped into cells of one (type, location) pair. Within a cell the score
+    only depends on price and never rises with it, so the cell's cheapest listing bounds the
+    whole cell. A query scores the best cells until it has `limit` candidates, then only the
+    cells whose bound can still reach the k-th score; the rest are never touched.
+    """
+
+    def __init__(self, rows: list[tuple[int, str, str, float]]) -> None:
+        rows = sorted(rows, key=lambda r: r[0])
+        types: dict[str, int] = {}
+        locations: dict[str, int] = {}
+        self.ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        self.prices = np.fromiter((r[3] for r in rows), dtype=np.float64, count=len(rows))
+        self.type_codes = np.fromiter(
+            (types.setdefault((r[1] or "").strip().lower(), len(types)) for r in rows), dtype=np.int32, count=len(rows)
+        )
+        self.location_codes = np.fromiter(
+            (locations.setdefault((r[2] or "").strip().lower(), len(locations)) for r in rows),
+            dtype=np.int32,
+            count=len(rows),
+        )
+        self._types = types
+        self._locations = list(locations)
+
+        cell_keys = self.type_codes.astype(np.int64) * max(1, len(locations)) + self.location_codes
+        # Stable, so each cell's listings stay in id order.
+        self._cell_members = np.argsort(cell_keys, kind="stable")
+        keys, starts = np.unique(cell_keys[self._cell_members], return_index=True)
+        self._cell_offsets = np.append(starts, len(rows)).astype(np.int64)
+        self._cell_types = (keys // max(1, len(locations))).astype(np.int32)
+        self._cell_locations = (keys % max(1, len(locations))).astype(np.int32)
+        self._cell_min_prices = (
+            np.minimum.reduceat(self.prices[self._cell_members], starts) if len(rows) else np.zeros(0)
+        )
+        self._location_masks: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int(self.ids.size)
+
+    def _location_mask(self, location: str) -> np.ndarray:
+        # Boolean per location code: does the listing location contain the query text?
+        with self._lock:
+            mask = self._location_masks.get(location)
+        if mask is None:
+            mask = np.fromiter((location in loc for loc in self._locations), dtype=bool, count=len(self._locations))
+            with self._lock:
+                if len(self._location_masks) > 1024:
+                    self._location_masks.clear()
+                self._location_masks[location] = mask
+        return mask
+
+    def score(self, queries: list[MatchQuery], weights: MatchWeights, index: np.ndarray | None = None) -> np.ndarray:
+        """Scores of every listing (or of the listings at `index`) per query, shape (len(queries), n)."""
+        types = self.type_codes if index is None else self.type_codes[index]
+        location_codes = self.location_codes if index is None else self.location_codes[index]
+        prices = self.prices if index is None else self.prices[index]
+        out = np.zeros((len(queries), len(prices)), dtype=np.float64)
+        for row, query in zip(out, queries):
+            ptype = (query.property_type or "").strip().lower()
+            if ptype and ptype in self._types:
+                row += weights.property_type * (types == self._types[ptype])
+            location = (query.location or "").strip().lower()
+            if location:
+                row += weights.location * self._location_mask(location)[location_codes]
+            budget = float(query.budget) if query.budget else 0.0
+            if budget > 0:
+                over_ratio = (prices - budget) / budget
+                over = np.maximum(0.0, weights.over_budget - over_ratio * weights.over_budget)
+                row += np.where(prices <= budget, weights.within_budget, over)
+            else:
+                row += weights.no_budget
+        return out
+
+    def _cell_bounds(self, query: MatchQuery, weights: MatchWeights) -> np.ndarray:
+        """Highest score any listing of each cell can get: the score of its cheapest listing."""
+        bounds = np.zeros(len(self._cell_types), dtype=np.float64)
+        ptype = (query.property_type or "").strip().lower()
+        if ptype and ptype in self._types:
+            bounds += weights.property_type * (self._cell_types == self._types[ptype])
+        location = (query.location or "").strip().lower()
+        if location:
+            bounds += weights.location * self._location_mask(location)[self._cell_locations]
+        budget = float(query.budget) if query.budget else 0.0
+        if budget > 0:
+            over_ratio = (self._cell_min_prices - budget) / budget
+            over = np.maximum(0.0, weights.over_budget - over_ratio * weights.over_budget)
+            # max() keeps the bound valid even for weights where over-budget credit is larger.
+            within = max(weights.within_budget, weights.over_budget)
+            bounds += np.where(self._cell_min_prices <= budget, within, over)
+        else:
+            bounds += weights.no_budget
+        return bounds
+
+    def _cells_index(self, cells: np.ndarray) -> np.ndarray:
+        # Listing positions of `cells`, ascending, so position order is id order.
+        if not cells.size:
+            return np.zeros(0, dtype=np.int64)
+        parts = [self._cell_members[self._cell_offsets[c] : self._cell_offsets[c + 1]] for c in cells]
+        return np.sort(np.concatenate(parts))
+
+    def _pruned_top_k(
+        self, query: MatchQuery, weights: MatchWeights, limit: int, min_score: float, decimals: int | None
+    ) -> list[tuple[float, int]] | None:
+        # None when pruning would touch most listings anyway; the caller scores those in a full pass.
+        bounds = _ranked(self._cell_bounds(query, weights), decimals)
+        cells = np.flatnonzero(bounds >= min_score)
+        cells = cells[np.argsort(-bounds[cells], kind="stable")]
+        # Best cells first until they hold `limit` listings; their k-th score is a floor for the answer.
+        sizes = np.cumsum(self._cell_offsets[cells + 1] - self._cell_offsets[cells])
+        first = int(np.searchsorted(sizes, limit)) + 1
+        if sizes.size and sizes[min(first, sizes.size) - 1] > len(self) * DENSE_SCAN_FRACTION:
+            # Nothing to prune (e.g. a query with no type or location).
+            return None
+        index = self._cells_index(cells[:first])
+        scores = self.score([query], weights, index)[0]
+        if index.size >= limit and first < cells.size:
+            kth = np.partition(_ranked(scores, decimals), index.size - limit)[index.size - limit]
+            # Cells are sorted by bound, so the ones that can still reach the k-th score are a prefix.
+            last = first + int(np.count_nonzero(bounds[cells[first:]] >= kth))
+            if sizes[last - 1] > len(self) * DENSE_SCAN_FRACTION:
+                return None
+            rest = cells[first:last]
+            if rest.size:
+                extra = self._cells_index(rest)
+                index = np.concatenate([index, extra])
+                scores = np.concatenate([scores, self.score([query], weights, extra)[0]])
+                order = np.argsort(index, kind="stable")
+                index, scores = index[order], scores[order]
+        return self._top_k(scores, index, limit, min_score, decimals)
+
+    def _top_k(
+        self, scores: np.ndarray, index: np.ndarray, limit: int, min_score: float, decimals: int | None
+    ) -> list[tuple[float, int]]:
+        # Rank on the (optionally rounded) capped score; ties go to the lowest id (`index` is ascending).
+        ranked = _ranked(scores, decimals)
+        candidates = np.flatnonzero(ranked >= min_score)
+        if candidates.size > limit:
+            kth = np.partition(ranked[candidates], candidates.size - limit)[candidates.size - limit]
+            above = candidates[ranked[candidates] > kth]
+            ties = candidates[ranked[candidates] == kth][: limit - above.size]
+            candidates = np.concatenate([above, ties])
+        order = candidates[np.lexsort((candidates, -ranked[candidates]))]
+        if decimals is None:
+            return [(float(ranked[i]), int(self.ids[index[i]])) for i in order]
+        return [(round(min(float(scores[i]), 100.0), decimals), int(self.ids[index[i]])) for i in order]
+
+    def top_matches(
+        self,
+        queries: list[MatchQuery],
+        weights: MatchWeights,
+        limit: int = 10,
+        min_score: float = 0.0,
+        decimals: int | None = 2,
+    ) -> list[list[tuple[float, int]]]:
+        """
+        Best `limit` (score, property_id) pairs per query, best first.
+
+        On large snapshots each query first tries the cell-pruned path. Queries it cannot
+        prune, and every query on small snapshots, are scored together in vectorized full
+        passes of at most MAX_BATCH_CELLS (query, listing) scores each.
+        """
+        if not len(self) or limit <= 0:
+            return [[] for _ in queries]
+        results: list[list[tuple[float, int]] | None] = [None] * len(queries)
+        if len(self) >= PRUNE_MIN_LISTINGS:
+            for i, query in enumerate(queries):
+                results[i] = self._pruned_top_k(query, weights, limit, min_score, decimals)
+        dense = [i for i, ranked in enumerate(results) if ranked is None]
+        chunk = max(1, MAX_BATCH_CELLS // len(self))
+        everything = np.arange(len(self))
+        for start in range(0, len(dense), chunk):
+            batch = dense[start : start + chunk]
+            for i, scores in zip(batch, self.score([queries[i] for i in batch], weights)):
+                results[i] = self._top_k(scores, everything, limit, min_score, decimals)
+        return results
+
+
+_snapshot: ListingSnapshot | None = None
+_snapshot_built_at = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def get_listing_snapshot(db: Session) -> ListingSnapshot:
+    """Current snapshot, rebuilt after invalidation or PROPERTY_INDEX_TTL_SECONDS."""
+    global _snapshot, _snapshot_built_at
+    ttl = get_settings().PROPERTY_INDEX_TTL_SECONDS
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _snapshot_built_at < ttl:
+        return snapshot
+    with _snapshot_lock:
+        if _snapshot is None or time.monotonic() - _snapshot_built_at >= ttl:
+            rows = (
+                db.query(Property.id, Property.property_type, Property.location, Property.price)
+                .filter(Property.is_available == True)
+                .all()
+            )
+            _snapshot = ListingSnapshot([tuple(r) for r in rows])
+            _snapshot_built_at = time.monotonic()
+        return _snapshot
+
+
+def invalidate_property_index() -> None:
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def rank_listings(
+    db: Session,
+    queries: list[MatchQuery],
+    weights: MatchWeights,
+    limit: int = 10,
+    min_score: float = 0.0,
+    decimals: int | None = 2,
+) -> list[list[tuple[float, Property]]]:
+    """Score a batch of queries in one pass and load only the winning Property rows."""
+    matches = get_listing_snapshot(db).top_matches(queries, weights, limit, min_score, decimals)
+    wanted = {prop_id for ranked in matches for _, prop_id in ranked}
+    if not wanted:
+        return [[] for _ in queries]
+    by_id = {p.id: p for p in db.query(Property).filter(Property.id.in_(wanted)).all()}
+    return [[(score, by_id[prop_id]) for score, prop_id in ranked if prop_id in by_id] for ranked in matches]
+
+
+def recommend_properties(
+    db: Session,
+    property_type: str | None,
+    location: str | None,
+    budget: float | None,
+    limit: int = 10,
+) -> list[dict]:
+    query = MatchQuery(property_type=property_type, location=location, budget=budget)
+    (ranked,) = rank_listings(db, [query], LEAD_WEIGHTS, limit)
+    return [
+        {
+            "id": prop.id,
+            "title": prop.title,
+            "description": prop.description,
+            "property_type": prop.property_type,
+            "location": prop.location,
+            "price": prop.price,
+            "image_url": prop.image_url,
+            "match_score": score,
+        }
+        for score, prop in ranked
+    ]
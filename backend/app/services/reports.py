@@ -1,79 +1,361 @@
+from dataclasses import dataclass
+from datetime import datetime
 from io import StringIO, BytesIO
+from typing import Iterable, Iterator
 import csv
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
 
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
+from app.core.database import SessionLocal
 from app.models.lead import Lead
-from app.services.analytics import get_dashboard_metrics
+from app.schemas.analytics import AgentPerformance, DashboardMetrics, TimeSeriesPoint
+from app.services.analytics import get_agent_performance, get_dashboard_metrics, get_timeseries
+from app.services.lead_query import LeadFilters, apply_lead_filters
 
 
-def leads_csv(db: Session) -> str:
-    rows = db.query(Lead).order_by(Lead.created_at.desc()).all()
+LEAD_EXPORT_COLUMNS = (
+    Lead.id,
+    Lead.full_name,
+    Lead.email,
+    Lead.phone,
+    Lead.channel,
+    Lead.status,
+    Lead.score,
+    Lead.property_type,
+    Lead.location,
+    Lead.budget,
+    Lead.timeline,
+    Lead.assigned_agent_id,
+    Lead.created_at,
+)
+LEAD_EXPORT_BATCH_SIZE = 2000
+
+
+def iter_leads_csv(filters: LeadFilters) -> Iterator[bytes]:
+    """
+    Stream the lead export as CSV, one encoded chunk per fetched batch.
+
+    Only the exported columns are selected and rows are pulled through a server-side
+    cursor, so memory stays flat regardless of table size. The generator owns its
+    session because it keeps running after the request's dependencies have exited.
+    """
     out = StringIO()
     writer = csv.writer(out)
-    writer.writerow([
-        "id",
-        "full_name",
-        "email",
-        "phone",
-        "channel",
-        "status",
-        "score",
-        "property_type",
-        "location",
-        "budget",
-        "timeline",
-        "assigned_agent_id",
-        "created_at",
-    ])
-
-    for l in rows:
-        writer.writerow([
-            l.id,
-            l.full_name,
-            l.email or "",
-            l.phone or "",
-            l.channel.value,
-            l.status.value,
-            l.score,
-            l.property_type or "",
-            l.location or "",
-            l.budget or "",
-            l.timeline or "",
-            l.assigned_agent_id or "",
-            l.created_at.isoformat(),
-        ])
-
-    return out.getvalue()
+    writer.writerow([col.key for col in LEAD_EXPORT_COLUMNS])
+    yield out.getvalue().encode()
 
+    stmt = apply_lead_filters(select(*LEAD_EXPORT_COLUMNS), filters).order_by(Lead.created_at.desc(), Lead.id.desc())
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=LEAD_EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            out.seek(0)
+            out.truncate()
+            for r in batch:
+                writer.writerow([
+                    r.id,
+                    r.full_name,
+                    r.email or "",
+                    r.phone or "",
+                    r.channel.value,
+                    r.status.value,
+                    r.score,
+                    r.property_type or "",
+                    r.location or "",
+                    r.budget or "",
+                    r.timeline or "",
+                    r.assigned_agent_id or "",
+                    r.created_at.isoformat(),
+                ])
+            yield out.getvalue().encode()
+    finally:
+        db.close()
 
-def analytics_pdf(db: Session) -> bytes:
-    metrics = get_dashboard_metrics(db)
 
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    y = 760
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, y, "Real Estate AI - Analytics Report")
-    y -= 40
-    p.setFont("Helvetica", 11)
-
-    lines = [
-        f"Total Leads: {metrics.total_leads}",
-        f"Converted Leads: {metrics.converted_leads}",
-        f"Conversion Rate: {metrics.conversion_rate}%",
-        f"Average Lead Score: {metrics.avg_lead_score}",
-        f"By Channel: {metrics.by_channel}",
-        f"By Agent: {metrics.by_agent}",
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Bump when the PDF layout changes so cached renders of the old layout are not reused.
+REPORT_TEMPLATE_VERSION = 2
+REPORT_TIMESERIES_DAYS = 30
+
+
+@dataclass(frozen=True)
+class AnalyticsSnapshot:
+    """Everything an analytics PDF shows; equal snapshots render to identical PDFs."""
+
+    as_of: str
+    metrics: DashboardMetrics
+    timeseries: list[TimeSeriesPoint]
+    agents: list[AgentPerformance]
+
+    def digest(self) -> str:
+        payload = {
+            "template": REPORT_TEMPLATE_VERSION,
+            "as_of": self.as_of,
+            "metrics": self.metrics.model_dump(),
+            "timeseries": [p.model_dump() for p in self.timeseries],
+            "agents": [a.model_dump() for a in self.agents],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class RenderedReport:
+    pdf: bytes
+    digest: str
+    cached: bool
+    render_ms: float
+
+
+def analytics_snapshot(db: Session) -> AnalyticsSnapshot:
+    # All three read the lead_daily_stats rollup, so this costs a few grouped queries.
+    return AnalyticsSnapshot(
+        as_of=datetime.utcnow().date().isoformat(),
+        metrics=get_dashboard_metrics(db),
+        timeseries=get_timeseries(db, days=REPORT_TIMESERIES_DAYS),
+        agents=get_agent_performance(db),
+    )
+
+
+def _timeseries_chart(points: list[TimeSeriesPoint]) -> Drawing:
+    drawing = Drawing(500, 190)
+    chart = LinePlot()
+    chart.x, chart.y, chart.width, chart.height = 40, 35, 440, 140
+    series = [
+        ("Created", colors.HexColor("#2563eb"), [p.leads_created for p in points]),
+        ("Converted", colors.HexColor("#16a34a"), [p.leads_converted for p in points]),
+        ("Lost", colors.HexColor("#dc2626"), [p.leads_lost for p in points]),
+    ]
+    chart.data = [list(enumerate(values)) for _, _, values in series]
+    for i, (_, color, _) in enumerate(series):
+        chart.lines[i].strokeColor = color
+        chart.lines[i].strokeWidth = 1.5
+    chart.xValueAxis.valueMin, chart.xValueAxis.valueMax = 0, max(1, len(points) - 1)
+    chart.xValueAxis.valueSteps = list(range(0, len(points), 7))
+    chart.xValueAxis.labelTextFormat = lambda i: points[int(i)].day[5:] if 0 <= int(i) < len(points) else ""
+    chart.xValueAxis.labels.fontSize = 7
+    chart.yValueAxis.valueMin = 0
+    chart.yValueAxis.labels.fontSize = 7
+    drawing.add(chart)
+
+    legend = Legend()
+    legend.x, legend.y = 40, 12
+    legend.alignment = "right"
+    legend.columnMaximum = 1
+    legend.fontSize = 8
+    legend.colorNamePairs = [(color, name) for name, color, _ in series]
+    drawing.add(legend)
+    return drawing
+
+
+def _channel_chart(by_channel: dict[str, int]) -> Drawing:
+    drawing = Drawing(500, 150)
+    chart = VerticalBarChart()
+    chart.x, chart.y, chart.width, chart.height = 40, 25, 440, 110
+    names = sorted(by_channel, key=lambda k: -by_channel[k])
+    chart.data = [[by_channel[n] for n in names] or [0]]
+    chart.categoryAxis.categoryNames = [n.replace("LeadChannel.", "") for n in names] or [""]
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars[0].fillColor = colors.HexColor("#2563eb")
+    drawing.add(chart)
+    return drawing
+
+
+def render_analytics_pdf(snapshot: AnalyticsSnapshot) -> bytes:
+    """Summary, leads-per-day chart, leads-by-channel chart and per-agent table."""
+    styles = getSampleStyleSheet()
+    metrics = snapshot.metrics
+    table_style = TableStyle(
+        [
+            ("FONT", (0, 0), (-1, -1), "Helvetica", 9),
+            ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 9),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#9ca3af")),
+            ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ]
+    )
+    summary = Table(
+        [
+            ["Metric", "Value"],
+            ["Total leads", f"{metrics.total_leads:,}"],
+            ["Converted leads", f"{metrics.converted_leads:,}"],
+            ["Conversion rate", f"{metrics.conversion_rate}%"],
+            ["Average lead score", f"{metrics.avg_lead_score}"],
+            ["MRR (USD)", f"{metrics.mrr_usd:,}"],
+        ],
+        colWidths=[200, 120],
+        hAlign="LEFT",
+    )
+    summary.setStyle(table_style)
+    agents = Table(
+        [["Agent", "Leads", "Converted", "Lost", "Conversion %", "Avg score"]]
+        + [
+            [a.agent_name, f"{a.leads:,}", f"{a.converted:,}", f"{a.lost:,}", f"{a.conversion_rate}", f"{a.avg_lead_score}"]
+            for a in snapshot.agents
+        ],
+        colWidths=[170, 60, 65, 50, 80, 65],
+        hAlign="LEFT",
+        repeatRows=1,
+    )
+    agents.setStyle(table_style)
+
+    story = [
+        Paragraph("Real Estate AI - Analytics Report", styles["Title"]),
+        Paragraph(f"Data as of {snapshot.as_of} (UTC)", styles["Normal"]),
+        Spacer(1, 12),
+        summary,
+        Spacer(1, 16),
+        Paragraph(f"Leads per day, last {len(snapshot.timeseries)} days", styles["Heading2"]),
+        _timeseries_chart(snapshot.timeseries),
+        Paragraph("Leads by channel", styles["Heading2"]),
+        _channel_chart(metrics.by_channel),
+        Paragraph("Agents", styles["Heading2"]),
+        agents,
     ]
+    buffer = BytesIO()
+    # invariant: no timestamps or random IDs in the file, so equal snapshots give equal bytes.
+    doc = SimpleDocTemplate(buffer, pagesize=letter, invariant=1, title="Analytics Report", leftMargin=50, rightMargin=50)
+    doc.build(story)
+    return buffer.getvalue()
+
+
+class ReportRenderStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+        self.render_ms_total = 0.0
+        self.last_render_ms = 0.0
+        self.last_bytes = 0
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_render(self, elapsed_ms: float, size: int) -> None:
+        with self._lock:
+            self.renders += 1
+            self.render_ms_total += elapsed_ms
+            self.last_render_ms = elapsed_ms
+            self.last_bytes = size
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            total = self.hits + self.renders
+            return {
+                "hits": self.hits,
+                "renders": self.renders,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "avg_render_ms": round(self.render_ms_total / self.renders, 2) if self.renders else 0.0,
+                "last_render_ms": round(self.last_render_ms, 2),
+                "last_bytes": self.last_bytes,
+            }
+
+
+render_stats = ReportRenderStats()
+# One lock per snapshot digest, so renders of different snapshots run side by side.
+_render_locks: dict[str, threading.Lock] = {}
+_render_locks_lock = threading.Lock()
+_MAX_RENDER_LOCKS = 64
+
+
+def _render_lock(digest: str) -> threading.Lock:
+    with _render_locks_lock:
+        lock = _render_locks.get(digest)
+        if lock is None:
+            if len(_render_locks) >= _MAX_RENDER_LOCKS:
+                # Drop idle locks; at worst a snapshot is rendered twice, never wrongly.
+                for key in [k for k, v in _render_locks.items() if not v.locked()]:
+                    del _render_locks[key]
+            lock = _render_locks[digest] = threading.Lock()
+        return lock
+
+
+def _cached_pdf_path(digest: str) -> str:
+    return os.path.join(get_settings().REPORT_CACHE_DIR, f"analytics-{digest}.pdf")
+
+
+def _read_cached_pdf(digest: str) -> bytes | None:
+    try:
+        with open(_cached_pdf_path(digest), "rb") as fh:
+            return fh.read()
+    except OSError:
+        return None
+
+
+def _store_cached_pdf(digest: str, pdf: bytes) -> None:
+    settings = get_settings()
+    try:
+        os.makedirs(settings.REPORT_CACHE_DIR, exist_ok=True)
+        tmp = f"{_cached_pdf_path(digest)}.{os.getpid()}"
+        with open(tmp, "wb") as fh:
+            fh.write(pdf)
+        os.replace(tmp, _cached_pdf_path(digest))
+        cached = sorted(
+            (entry for entry in os.scandir(settings.REPORT_CACHE_DIR) if entry.name.endswith(".pdf")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in cached[: -settings.REPORT_CACHE_MAX_FILES]:
+            os.remove(entry.path)
+    except OSError:
+        # The cache only saves work; a read-only or full disk must not fail the report.
+        pass
+
+
+def analytics_report(db: Session, snapshot: AnalyticsSnapshot | None = None) -> RenderedReport:
+    """
+    Analytics PDF for the current metrics (or `snapshot`), rendered at most once per distinct
+    snapshot.
+
+    Renders are cached on disk under REPORT_CACHE_DIR keyed by the snapshot digest, so API
+    processes and worker children on a host share them. Within a process renders of the same
+    snapshot are serialized, so a burst of identical scheduled reports renders once.
+    """
+    snapshot = snapshot or analytics_snapshot(db)
+    digest = snapshot.digest()
+    pdf = _read_cached_pdf(digest)
+    if pdf is None:
+        with _render_lock(digest):
+            pdf = _read_cached_pdf(digest)
+            if pdf is None:
+                started = time.perf_counter()
+                pdf = render_analytics_pdf(snapshot)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                _store_cached_pdf(digest, pdf)
+                render_stats.record_render(elapsed_ms, len(pdf))
+                return RenderedReport(pdf=pdf, digest=digest, cached=False, render_ms=round(elapsed_ms, 2))
+    render_stats.record_hit()
+    return RenderedReport(pdf=pdf, digest=digest, cached=True, render_ms=0.0)
+
+
+def analytics_pdf(db: Session) -> bytes:
+    return analytics_report(db).pdf
 
-    for line in lines:
-        p.drawString(50, y, line)
-        y -= 22
 
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return buffer.read()
+def report_render_stats() -> dict[str, float | int]:
+    return render_stats.stats()
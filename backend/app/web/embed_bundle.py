@@ -0,0 +1,57 @@
+import gzip
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+_WIDGET_PATH = Path(__file__).resolve().parent / "widget" / "embed.js"
+
+# Unversioned URL (already pasted into customer sites): short freshness, then revalidate
+# with the ETag; stale copies may be served while revalidating.
+REVALIDATE_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=86400"
+# URL carrying the current content hash (?v=...): the bytes behind it never change.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """A text asset loaded once, with precomputed compressed variants and per-variant ETags."""
+
+    media_type: str
+    version: str
+    variants: dict[str, bytes]  # content-coding ("identity", "gzip", "br") -> body
+
+    @classmethod
+    def load(cls, path: Path, media_type: str) -> "StaticAsset":
+        raw = path.read_bytes()
+        variants = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+        try:
+            import brotli
+
+            variants["br"] = brotli.compress(raw, quality=11)
+        except ImportError:
+            pass
+        return cls(media_type=media_type, version=hashlib.sha256(raw).hexdigest()[:16], variants=variants)
+
+    def etag(self, coding: str) -> str:
+        # Strong validators differ per representation, so a gzip ETag never validates a br body.
+        return f'"{self.version}"' if coding == "identity" else f'"{self.version}-{coding}"'
+
+    def negotiate(self, accept_encoding: str) -> str:
+        accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+        for coding in ("br", "gzip"):
+            if coding in self.variants and coding in accepted:
+                return coding
+        return "identity"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@lru_cache
+def get_embed_asset() -> StaticAsset:
+    return StaticAsset.load(_WIDGET_PATH, "application/javascript; charset=utf-8")
@@ -154,9 +154,17 @@ function renderLeads(rows) {
 }
 
 async function loadLeads() {
-  const res = await apiFetch("/api/v1/leads", { cache: "no-store" });
-  if (!res.ok) throw new Error("Failed to load leads");
-  return res.json();
+  // Page through with the keyset cursor so no single request loads every lead.
+  const rows = [];
+  let cursor = null;
+  do {
+    const qs = "?limit=500" + (cursor ? "&cursor=" + encodeURIComponent(cursor) : "");
+    const res = await apiFetch("/api/v1/leads" + qs, { cache: "no-store" });
+    if (!res.ok) throw new Error("Failed to load leads");
+    rows.push(...(await res.json()));
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return rows;
 }
 
 function onLeadsPage() {
@@ -0,0 +1,216 @@
+// Website chat widget: a tiny embedded chat UI that talks to our server-side agent team.
+// Served by /embed.js; the embed key and backend origin are read from this script's own src.
+(function() {
+  'use strict';
+  function findScriptSrc() {
+    try {
+      if (document.currentScript && document.currentScript.src) return document.currentScript.src;
+    } catch (e) {}
+    try {
+      var scripts = document.querySelectorAll('script[src]');
+      for (var i = scripts.length - 1; i >= 0; i--) {
+        var s = scripts[i].getAttribute('src') || '';
+        if (s.indexOf('/embed.js') !== -1 && s.indexOf('key=') !== -1) return scripts[i].src || s;
+      }
+    } catch (e) {}
+    return '';
+  }
+
+  var src = findScriptSrc();
+  var u = null;
+  try { u = new URL(src); } catch (e) {}
+  var backendOrigin = u ? u.origin : '';
+  var key = '';
+  try {
+    if (u && u.searchParams) key = u.searchParams.get('key') || '';
+  } catch (e) {}
+  if (!key || !backendOrigin) return;
+
+  function cssText() {
+    return [
+      '.reai-fab{position:fixed;right:18px;bottom:18px;z-index:2147483647;background:linear-gradient(135deg,#3b82f6,#2dd4bf);color:#081018;border:0;border-radius:999px;padding:12px 14px;font:800 14px/1.1 ui-sans-serif,system-ui;box-shadow:0 18px 55px rgba(59,130,246,.22);cursor:pointer}',
+      '.reai-panel{position:fixed;right:18px;bottom:78px;z-index:2147483647;width:min(420px,92vw);height:min(560px,78vh);display:none;flex-direction:column;border-radius:22px;overflow:hidden;border:1px solid rgba(255,255,255,.12);background:rgba(8,10,16,.88);backdrop-filter: blur(14px);box-shadow:0 24px 70px rgba(0,0,0,.55)}',
+      '.reai-head{padding:14px 14px;display:flex;align-items:center;justify-content:space-between;border-bottom:1px solid rgba(255,255,255,.10);background:rgba(255,255,255,.03)}',
+      '.reai-title{display:flex;flex-direction:column;gap:2px}',
+      '.reai-title b{font:800 14px/1.1 ui-sans-serif,system-ui;color:#eaf0ff;letter-spacing:.2px}',
+      '.reai-title span{font:600 11px/1 ui-sans-serif,system-ui;color:rgba(234,240,255,.65)}',
+      '.reai-x{border:1px solid rgba(255,255,255,.14);background:rgba(255,255,255,.05);color:#eaf0ff;border-radius:999px;padding:7px 10px;font:700 12px/1 ui-sans-serif,system-ui;cursor:pointer}',
+      '.reai-body{flex:1;overflow:auto;padding:14px;display:flex;flex-direction:column;gap:10px}',
+      '.reai-msg{max-width:88%;padding:10px 12px;border-radius:16px;border:1px solid rgba(255,255,255,.10);font:600 13px/1.35 ui-sans-serif,system-ui;white-space:pre-wrap;overflow-wrap:anywhere}',
+      '.reai-u{align-self:flex-end;background:rgba(59,130,246,.12);border-color:rgba(59,130,246,.22);color:#dbeafe}',
+      '.reai-a{align-self:flex-start;background:rgba(45,212,191,.10);border-color:rgba(45,212,191,.20);color:#ccfbf1}',
+      '.reai-foot{padding:12px;border-top:1px solid rgba(255,255,255,.10);display:flex;gap:10px}',
+      '.reai-in{flex:1;padding:10px 12px;border-radius:16px;border:1px solid rgba(255,255,255,.12);background:rgba(0,0,0,.20);color:#eaf0ff;outline:none;font:600 13px/1.2 ui-sans-serif,system-ui}',
+      '.reai-send{padding:10px 12px;border-radius:16px;border:0;background:linear-gradient(135deg,#3b82f6,#2dd4bf);color:#081018;font:900 13px/1 ui-sans-serif,system-ui;cursor:pointer}'
+    ].join('');
+  }
+
+  function el(tag, attrs) {
+    var n = document.createElement(tag);
+    if (attrs) {
+      Object.keys(attrs).forEach(function(k) {
+        if (k === 'text') n.textContent = attrs[k];
+        else n.setAttribute(k, attrs[k]);
+      });
+    }
+    return n;
+  }
+
+  function appendMsg(box, cls, text) {
+    var m = el('div', { class: 'reai-msg ' + cls });
+    m.textContent = text;
+    box.appendChild(m);
+    box.scrollTop = box.scrollHeight;
+  }
+
+  var style = el('style'); style.textContent = cssText(); document.head.appendChild(style);
+  var fab = el('button', { class:'reai-fab', type:'button', text:'Chat' });
+  var panel = el('div', { class:'reai-panel' });
+  var head = el('div', { class:'reai-head' });
+  var title = el('div', { class:'reai-title' });
+  title.appendChild(el('b', { text:'RealEstateAI Agent Team' }));
+  title.appendChild(el('span', { text:'Lead capture + qualification in real time' }));
+  var close = el('button', { class:'reai-x', type:'button', text:'Close' });
+  head.appendChild(title); head.appendChild(close);
+  var body = el('div', { class:'reai-body' });
+  var foot = el('div', { class:'reai-foot' });
+  var input = el('input', { class:'reai-in', placeholder:'Type your message...' });
+  var send = el('button', { class:'reai-send', type:'button', text:'Send' });
+  foot.appendChild(input); foot.appendChild(send);
+  panel.appendChild(head); panel.appendChild(body); panel.appendChild(foot);
+
+  function open() { panel.style.display='flex'; input.focus(); }
+  function hide() { panel.style.display='none'; }
+  fab.addEventListener('click', open);
+  close.addEventListener('click', hide);
+
+  var convKey = 'reai_conv_' + key.slice(0, 16);
+  function getConv() { try { return localStorage.getItem(convKey) || ''; } catch(e) { return ''; } }
+  function setConv(v) { try { localStorage.setItem(convKey, v); } catch(e) {} }
+
+  var booted = false;
+  function boot() {
+    if (booted) return;
+    booted = true;
+    appendMsg(body, 'reai-a', 'Hi. Tell me the location, budget, and property type you are looking for.');
+  }
+  fab.addEventListener('click', boot);
+
+  function showRecs(recs) {
+    if (!recs || !recs.length) return;
+    var list = recs.map(function(p) {
+      return '- ' + p.title + ' | ' + p.location + ' | $' + p.price;
+    }).join('\n');
+    appendMsg(body, 'reai-a', 'Suggested listings:\n' + list);
+  }
+
+  function chatUrl(path) {
+    return backendOrigin + '/api/v1/embed/chat/' + path + '?key=' + encodeURIComponent(key);
+  }
+
+  function postMessage(payload) {
+    return fetch(chatUrl('message'), {
+      method:'POST',
+      headers: { 'Content-Type':'application/json' },
+      body: JSON.stringify(payload)
+    }).then(function(r) {
+      return r.json().catch(function(){return {};}).then(function(j){ return { ok:r.ok, json:j }; });
+    }).then(function(res) {
+      if (!res.ok) throw new Error((res.json && res.json.detail) ? res.json.detail : 'Failed');
+      if (res.json && res.json.conversation_id) setConv(String(res.json.conversation_id));
+      appendMsg(body, 'reai-a', String(res.json.reply || 'Okay.'));
+      showRecs(res.json && res.json.recommendations);
+    });
+  }
+
+  // Server-Sent Events over a POST body: render the reply as soon as it arrives, then
+  // recommendations; `done` carries the conversation id.
+  function streamMessage(payload) {
+    return fetch(chatUrl('stream'), {
+      method:'POST',
+      headers: { 'Content-Type':'application/json', 'Accept':'text/event-stream' },
+      body: JSON.stringify(payload)
+    }).then(function(r) {
+      if (!r.ok) {
+        return r.json().catch(function(){return {};}).then(function(j) {
+          throw new Error((j && j.detail) ? j.detail : 'Failed');
+        });
+      }
+      var reader = r.body.getReader();
+      var decoder = new TextDecoder();
+      var buf = '';
+      var bubble = null;
+      function handle(frame) {
+        var ev = 'message', data = '';
+        frame.split('\n').forEach(function(line) {
+          if (line.indexOf('event:') === 0) ev = line.slice(6).trim();
+          else if (line.indexOf('data:') === 0) data += line.slice(5).trim();
+        });
+        var j = {};
+        try { j = data ? JSON.parse(data) : {}; } catch (e) { return; }
+        if (ev === 'delta') {
+          if (!bubble) {
+            bubble = el('div', { class: 'reai-msg reai-a' });
+            body.appendChild(bubble);
+          }
+          bubble.textContent += String(j.text || '');
+          body.scrollTop = body.scrollHeight;
+        } else if (ev === 'recommendations') {
+          showRecs(j.items);
+        } else if (ev === 'done') {
+          if (j.conversation_id) setConv(String(j.conversation_id));
+        } else if (ev === 'error') {
+          throw new Error(j.detail || 'Request failed.');
+        }
+      }
+      function pump() {
+        return reader.read().then(function(chunk) {
+          if (chunk.done) return;
+          buf += decoder.decode(chunk.value, { stream:true });
+          var idx;
+          while ((idx = buf.indexOf('\n\n')) !== -1) {
+            handle(buf.slice(0, idx));
+            buf = buf.slice(idx + 2);
+          }
+          return pump();
+        });
+      }
+      return pump();
+    });
+  }
+
+  var canStream = typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined';
+
+  function sendMsg() {
+    var t = (input.value || '').trim();
+    if (!t) return;
+    input.value = '';
+    appendMsg(body, 'reai-u', t);
+    var payload = {
+      conversation_id: getConv() || null,
+      message: t,
+      page_url: (location && location.href) ? String(location.href) : null,
+      referrer: (document && document.referrer) ? String(document.referrer) : null
+    };
+    (canStream ? streamMessage(payload) : postMessage(payload)).catch(function(err) {
+      appendMsg(body, 'reai-a', (err && err.message) ? err.message : 'Request failed.');
+    });
+  }
+
+  send.addEventListener('click', sendMsg);
+  input.addEventListener('keydown', function(e) { if (e.key === 'Enter') sendMsg(); });
+
+  function mount() {
+    try {
+      if (!document.body) return;
+      document.body.appendChild(fab);
+      document.body.appendChild(panel);
+    } catch (e) {}
+  }
+
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', mount, { once:true });
+  } else {
+    mount();
+  }
+})();
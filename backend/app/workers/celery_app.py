@@ -8,4 +8,18 @@ celery_app = Celery(
     "real_estate_ai",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.workers.tasks"],
 )
+
+# Needs a beat process (`celery ... beat`); relays also start as soon as a lead queues a message.
+# Similarity indexes are only ever built here, never on the request path.
+celery_app.conf.beat_schedule = {
+    "relay-message-outbox": {
+        "task": "app.workers.tasks.relay_outbox_messages",
+        "schedule": float(settings.OUTBOX_RELAY_INTERVAL_SECONDS),
+    },
+    "rebuild-embedding-indexes": {
+        "task": "app.workers.tasks.rebuild_embedding_indexes",
+        "schedule": float(settings.EMBEDDING_INDEX_MAX_AGE_SECONDS),
+    },
+}
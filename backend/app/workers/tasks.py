@@ -6,8 +6,14 @@ from app.core.config import get_settings
 from app.core.database import SessionLocal
 from app.models.lead import Lead, LeadChannel
 from app.models.report import ScheduledReport
+from app.services.ann_index import INDEX_KINDS, build_ann_index
+from app.services.assignment import rebuild_agent_workloads
+from app.services.audit import write_audit_rows
+from app.services.lead_import import run_lead_import
+from app.services.lead_stats import rebuild_lead_daily_stats
 from app.services.messaging import dispatch_message
-from app.services.reports import analytics_pdf
+from app.services.outbox import adopt_legacy_followups, relay_outbox
+from app.services.reports import analytics_report
 from app.workers.celery_app import celery_app
 
 settings = get_settings()
@@ -51,11 +57,27 @@ def send_followup_message(lead_id: int, channel: str, content: str) -> dict:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        return dispatch_message(db, LeadChannel(channel), message_payload)
+        return dispatch_message(LeadChannel(channel), message_payload)
     finally:
         db.close()
 
 
+@celery_app.task
+def relay_outbox_messages() -> dict:
+    return relay_outbox()
+
+
+@celery_app.task
+def drain_followups() -> dict:
+    # Kept for drain tasks queued before the outbox replaced the Redis follow-up queue.
+    db = SessionLocal()
+    try:
+        adopted = adopt_legacy_followups(db)
+    finally:
+        db.close()
+    return {"adopted": adopted, **relay_outbox()}
+
+
 @celery_app.task
 def send_scheduled_report(report_id: int) -> dict:
     db = SessionLocal()
@@ -64,19 +86,67 @@ def send_scheduled_report(report_id: int) -> dict:
         if not report:
             return {"status": "report_not_found", "report_id": report_id}
 
-        pdf = analytics_pdf(db)
+        # Reports due at the same time with the same metrics share one render.
+        rendered = analytics_report(db)
         result = _send_email(
             report.recipient_email,
             subject="Real Estate AI Scheduled Analytics Report",
             body="Attached is your scheduled analytics report.",
-            attachment=pdf,
+            attachment=rendered.pdf,
             attachment_name="analytics.pdf",
         )
-        return {"report_id": report.id, **result}
+        return {"report_id": report.id, "render_cached": rendered.cached, "render_ms": rendered.render_ms, **result}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def write_audit_batch(rows: list[dict]) -> dict:
+    write_audit_rows([{**r, "created_at": datetime.fromisoformat(r["created_at"])} for r in rows])
+    return {"status": "written", "count": len(rows)}
+
+
+@celery_app.task
+def import_leads_file(job_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        job = run_lead_import(db, job_id)
+        if not job:
+            return {"status": "job_not_found", "job_id": job_id}
+        return {
+            "status": job.status.value,
+            "job_id": job.id,
+            "rows_created": job.rows_created,
+            "rows_duplicate": job.rows_duplicate,
+            "rows_failed": job.rows_failed,
+        }
+    finally:
+        db.close()
+
+
+@celery_app.task
+def rebuild_agent_workload_index() -> dict:
+    db = SessionLocal()
+    try:
+        return {"status": "rebuilt", "agents": rebuild_agent_workloads(db)}
     finally:
         db.close()
 
 
+@celery_app.task
+def rebuild_lead_stats() -> dict:
+    db = SessionLocal()
+    try:
+        return {"status": "rebuilt", "buckets": rebuild_lead_daily_stats(db)}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def rebuild_embedding_indexes() -> dict:
+    return {kind: len(build_ann_index(kind)) for kind in INDEX_KINDS}
+
+
 @celery_app.task
 def send_daily_agent_summary(agent_email: str, summary_text: str) -> dict:
     result = _send_email(
@@ -0,0 +1,61 @@
+"""
+/embed.js delivery: bytes on the wire, 304 rate and requests/sec for returning visitors.
+
+Run against a running API: python scripts/bench_embed.py [base_url] [repeat_views]
+(default http://127.0.0.1:8000 and 500). Per Accept-Encoding profile, one first view is
+followed by repeat views that revalidate the way a browser does, sending If-None-Match with
+the ETag it was given (nothing to send when the server gives none). Requests are sequential
+over one keep-alive connection, so requests/sec is per client, not server capacity.
+"""
+
+import sys
+import time
+
+import requests
+
+PROFILES = {"identity": "identity", "gzip": "gzip", "gzip, br": "gzip, deflate, br"}
+
+
+def _wire_bytes(response: requests.Response) -> int:
+    # Content-Length is the (possibly compressed) body size; requests hands back decoded content.
+    return int(response.headers.get("content-length", len(response.content)))
+
+
+def run_profile(session: requests.Session, url: str, accept_encoding: str, repeat_views: int) -> dict:
+    first = session.get(url, headers={"Accept-Encoding": accept_encoding})
+    first.raise_for_status()
+    etag = first.headers.get("etag")
+    headers = {"Accept-Encoding": accept_encoding, **({"If-None-Match": etag} if etag else {})}
+    not_modified = transferred = 0
+    started = time.perf_counter()
+    for _ in range(repeat_views):
+        response = session.get(url, headers=headers)
+        not_modified += response.status_code == 304
+        transferred += _wire_bytes(response) if response.status_code == 200 else 0
+    elapsed = time.perf_counter() - started
+    return {
+        "first_view_bytes": _wire_bytes(first),
+        "encoding": first.headers.get("content-encoding", "identity"),
+        "cache_control": first.headers.get("cache-control", "-"),
+        "rate_304": not_modified / repeat_views,
+        "repeat_bytes": transferred / repeat_views,
+        "req_per_sec": repeat_views / elapsed,
+    }
+
+
+def main() -> None:
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+    repeat_views = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    url = f"{base_url.rstrip('/')}/embed.js?key=bench"
+    with requests.Session() as session:
+        for label, accept_encoding in PROFILES.items():
+            result = run_profile(session, url, accept_encoding, repeat_views)
+            print(
+                f"{label:>9}: first view {result['first_view_bytes']:5d} B ({result['encoding']}), "
+                f"repeat views {result['repeat_bytes']:7.0f} B avg, 304 rate {result['rate_304']:6.1%}, "
+                f"{result['req_per_sec']:6.0f} req/s  [{result['cache_control']}]"
+            )
+
+
+if __name__ == "__main__":
+    main()
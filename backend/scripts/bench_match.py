@@ -0,0 +1,86 @@
+"""
+Property match latency: the old per-request scoring loop vs ListingSnapshot.
+
+Run from backend/: python -m scripts.bench_match
+Both sides rank the same random catalogue; results are asserted equal. Times cover scoring
+only (no ORM loading, which the old loop also paid per request).
+"""
+
+import random
+import time
+
+from app.services.property_match import LEAD_WEIGHTS, ListingSnapshot, MatchQuery
+
+SIZES = (1_000, 10_000, 100_000)
+QUERIES = 50
+TYPES = ["villa", "apartment", "condo", "house", "office", "studio"]
+LOCATIONS = ["Dubai Marina", "Downtown Dubai", "JLT", "Abu Dhabi", "Sharjah", "Business Bay"] + [
+    f"Area {i}" for i in range(60)
+]
+
+
+def legacy_top_matches(rows: list[tuple[int, str, str, float]], query: MatchQuery, limit: int = 10) -> list:
+    # The loop property_recommendations ran before the match index: score every row, sort all.
+    ranked = []
+    for prop_id, property_type, location, price in rows:
+        score = 0.0
+        if query.property_type and property_type.lower() == query.property_type.lower():
+            score += 45
+        if query.location and query.location.lower() in location.lower():
+            score += 30
+        if query.budget and price <= query.budget:
+            score += 25
+        elif query.budget:
+            over_ratio = (price - query.budget) / query.budget
+            score += max(0.0, 20 - over_ratio * 20)
+        else:
+            score += 10
+        ranked.append((round(min(score, 100.0), 2), prop_id))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return ranked[:limit]
+
+
+def random_rows(n: int, rng: random.Random) -> list[tuple[int, str, str, float]]:
+    return [
+        (i + 1, rng.choice(TYPES), rng.choice(LOCATIONS), float(rng.randint(1, 60) * 50_000)) for i in range(n)
+    ]
+
+
+def random_queries(n: int, rng: random.Random) -> list[MatchQuery]:
+    return [
+        MatchQuery(
+            property_type=rng.choice(TYPES + [None]),
+            location=rng.choice(["dubai", "marina", "jlt", "area 1", None]),
+            budget=rng.choice([None, 400_000, 1_000_000, 1_500_000]),
+        )
+        for _ in range(n)
+    ]
+
+
+def _per_query_ms(fn, queries: list[MatchQuery]) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main() -> None:
+    rng = random.Random(7)
+    for size in SIZES:
+        rows = random_rows(size, rng)
+        queries = random_queries(QUERIES, rng)
+        started = time.perf_counter()
+        snapshot = ListingSnapshot(rows)
+        build_ms = (time.perf_counter() - started) * 1000
+        for query in queries:
+            assert snapshot.top_matches([query], LEAD_WEIGHTS)[0] == legacy_top_matches(rows, query)
+        legacy = _per_query_ms(lambda q: legacy_top_matches(rows, q), queries)
+        indexed = _per_query_ms(lambda q: snapshot.top_matches([q], LEAD_WEIGHTS), queries)
+        print(
+            f"{size:>7} listings: legacy {legacy:8.2f} ms/query  snapshot {indexed:6.2f} ms/query"
+            f"  ({legacy / indexed:5.1f}x, build {build_ms:.0f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -86,9 +86,17 @@ async function withAuthRetry(input: string, init: RequestInit = {}) {
 
 export async function fetchLeads(token: string): Promise<Lead[]> {
   localStorage.setItem("token", token);
-  const res = await withAuthRetry(`${API_BASE}/api/v1/leads`, { cache: "no-store" });
-  if (!res.ok) throw new Error("Failed to load leads");
-  return res.json();
+  // Page through with the keyset cursor so no single request loads every lead.
+  const leads: Lead[] = [];
+  let cursor: string | null = null;
+  do {
+    const qs = `?limit=500${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`;
+    const res = await withAuthRetry(`${API_BASE}/api/v1/leads${qs}`, { cache: "no-store" });
+    if (!res.ok) throw new Error("Failed to load leads");
+    leads.push(...((await res.json()) as Lead[]));
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return leads;
 }
 
 export async function createLead(token: string, payload: Record<string, unknown>): Promise<Lead> {